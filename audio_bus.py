@@ -0,0 +1,475 @@
+import os
+import time
+import select
+import threading
+import collections
+from dsp import PCM_FORMATS, PcmConverter, PolyphaseResampler, sample_width
+from metrics import Metrics, now_ns
+
+# Backpressure policies for subscribers that can't keep up with the capture thread
+DROP_OLDEST = "drop_oldest"  # Discard the oldest queued period to make room
+DROP_NEWEST = "drop_newest"  # Discard the incoming period, keep what is queued
+BLOCK = "block"              # Stall the capture thread until the subscriber catches up
+
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+# Sample formats understood by the bus and its subscriber views (see dsp.PCM_FORMATS)
+# -> ALSA constant name, so alsaaudio is only imported when a device is opened
+SAMPLE_FORMATS = {name: "PCM_FORMAT_" + name for name in PCM_FORMATS}
+
+OVERRUN = "overrun"  # The device's buffer overflowed before the capture thread read it
+DROPPED = "dropped"  # This subscriber fell behind and its queue policy discarded periods
+
+# Consecutive failed reads after which the device is closed and opened again
+MAX_RECOVERY_READS = 3
+
+
+class Gap(bytes):
+    """Marker read() returns where audio is missing from the stream
+
+    It is empty (and so falsy): consumers that only check `if data:` skip
+    it, while recognizers reset their state on it so audio from both sides
+    of the hole is never decoded as one utterance.
+    """
+
+    def __new__(cls, reason):
+        gap = super().__new__(cls)
+        gap.reason = reason  # OVERRUN or DROPPED
+        return gap
+
+
+def open_alsa_pcm(bus):
+    """Open the bus's ALSA capture device in non-blocking mode (read when poll says so)"""
+    import alsaaudio
+    return alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NONBLOCK,
+                         channels=bus.channels, rate=bus.rate,
+                         format=getattr(alsaaudio, SAMPLE_FORMATS[bus.sample_format]),
+                         periodsize=bus.periodsize, device=bus.device)
+
+
+class AudioSubscription:
+    """One consumer's view of the shared capture stream"""
+
+    def __init__(self, bus, name, channels, rate, sample_format, max_periods, policy):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        if channels != 1 and channels != bus.channels:
+            raise ValueError(f"Cannot produce {channels} channels from a {bus.channels}-channel bus")
+
+        self.bus = bus
+        self.name = name
+        self.channels = channels
+        self.rate = rate
+        self.sample_format = sample_format
+        self.max_periods = max_periods
+        self.policy = policy
+
+        self.periods_received = 0
+        self.periods_dropped = 0
+        self.gaps = 0  # Gap markers handed to the consumer
+        self.frames_read = 0  # Frames handed to the consumer, at this view's rate
+        self.closed = False
+        self._frame_bytes = channels * sample_width(sample_format)
+
+        # Per-stage conversion timings for this view
+        self.metrics = Metrics()
+        self._downmix_timer = self.metrics.stage('downmix')
+        self._resample_timer = self.metrics.stage('resample')
+        self._convert_timer = self.metrics.stage('convert')
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._head_gap = None  # Reason for a hole before the oldest queued period
+        self._tail_gap = None  # Reason for a hole before the next period to arrive
+
+        # Device bytes -> float32 (downmixed for mono views) -> view format, in reused buffers
+        mono = channels == 1 and bus.channels > 1
+        self._decoder = PcmConverter(bus.sample_format, bus.channels, mono=mono)
+        self._encoder = PcmConverter("FLOAT_LE", channels, sample_format)
+        
+        # Stateful anti-aliasing resampler so filter history carries across periods
+        self._resampler = None
+        if rate != bus.rate:
+            self._resampler = PolyphaseResampler(bus.rate, rate, channels=channels)
+
+    @property
+    def is_passthrough(self):
+        """True when the view matches the device format and periods are handed out as-is"""
+        return (self.channels == self.bus.channels and self.rate == self.bus.rate
+                and self.sample_format == self.bus.sample_format)
+
+    def _publish(self, data):
+        """Queue a raw period or a Gap (called from the capture thread)"""
+        with self._cond:
+            if self.closed:
+                return
+            if isinstance(data, Gap):
+                # Marked in front of whatever period arrives next
+                self._tail_gap = data.reason
+                return
+            if len(self._queue) >= self.max_periods:
+                if self.policy == DROP_NEWEST:
+                    self.periods_dropped += 1
+                    self._tail_gap = self._tail_gap or DROPPED
+                    return
+                if self.policy == DROP_OLDEST:
+                    if not isinstance(self._queue.popleft(), Gap):
+                        self.periods_dropped += 1
+                    self._head_gap = self._head_gap or DROPPED
+                else:
+                    while len(self._queue) >= self.max_periods and not self.closed:
+                        self._cond.wait()
+                    if self.closed:
+                        return
+            if self._tail_gap:
+                self._queue.append(Gap(self._tail_gap))
+                self._tail_gap = None
+            # The same immutable bytes object is shared by every subscriber
+            self._queue.append(data)
+            self.periods_received += 1
+            self._cond.notify_all()
+
+    def read(self, timeout=None):
+        """Return the next period converted to this view, a Gap, or None on timeout/close"""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            if self._head_gap:
+                data = Gap(self._head_gap)
+                self._head_gap = None
+            else:
+                data = self._queue.popleft()
+                self._cond.notify_all()
+        if isinstance(data, Gap):
+            self.gaps += 1
+            if self._resampler:
+                # Filter history from before the hole would smear into the audio after it
+                self._resampler.reset()
+            return data
+        data = self._convert(data)
+        self.frames_read += len(data) // self._frame_bytes
+        return data
+
+    @property
+    def position(self):
+        """Stream time (seconds) of the end of the last period read"""
+        return self.frames_read / self.rate
+
+    def pending(self):
+        """Number of periods waiting to be read"""
+        with self._cond:
+            return len(self._queue)
+
+    def pending_bytes(self):
+        """Bytes of raw periods waiting to be read"""
+        with self._cond:
+            return sum(len(data) for data in self._queue)
+
+    def stats(self):
+        """Queue counters and conversion stage timings for this subscriber"""
+        stats = self.metrics.stats()
+        stats['counters'].update({
+            'periods_received': self.periods_received,
+            'periods_dropped': self.periods_dropped,
+            'gaps': self.gaps,
+            'pending': self.pending(),
+        })
+        return stats
+
+    def close(self):
+        """Stop receiving periods and detach from the bus"""
+        with self._cond:
+            self.closed = True
+            self._queue.clear()
+            self._cond.notify_all()
+        self.bus.unsubscribe(self)
+
+    def _convert(self, raw_data):
+        """Convert a raw device period into this subscriber's format/rate view"""
+        if self.is_passthrough:
+            return raw_data
+
+        # Normalize to float32, downmixing to mono if requested
+        start = now_ns()
+        samples = self._decoder.decode(raw_data)
+        self._downmix_timer.record(now_ns() - start)
+
+        # Low-pass and resample to the subscriber's rate
+        if self._resampler:
+            start = now_ns()
+            samples = self._resampler.process(samples)
+            self._resample_timer.record(now_ns() - start)
+
+        # Round/clip into the requested sample format
+        start = now_ns()
+        data = self._encoder.encode(samples).tobytes()
+        self._convert_timer.record(now_ns() - start)
+
+        return data
+
+
+class AudioBus:
+    """Single ALSA capture stream fanned out to any number of subscribers"""
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, device="hw:0,0", channels=2, rate=48000, sample_format="S16_LE", periodsize=1024,
+                 pcm_factory=None, default_policy=DROP_OLDEST, adaptive_period=True,
+                 max_period_seconds=0.2, overrun_threshold=3, overrun_window=10.0):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        self.device = device
+        self.channels = channels
+        self.rate = rate
+        self.sample_format = sample_format
+        self.periodsize = periodsize
+
+        # Anything with read()/polldescriptors()/close() like alsaaudio.PCM can stand
+        # in for the device (e.g. audio_sources.ReplaySource for offline runs)
+        self.pcm_factory = pcm_factory or open_alsa_pcm
+        self.default_policy = default_policy
+
+        self.is_capturing = False
+        self.periods_captured = 0
+        self.bytes_captured = 0
+        self.overruns = 0
+        self.device_reopens = 0
+        
+        # Under sustained overruns (overrun_threshold within overrun_window seconds) the
+        # period grows until the device buffer covers the worst read latency measured
+        self.adaptive_period = adaptive_period
+        self.max_periodsize = int(max_period_seconds * rate)
+        self.overrun_threshold = overrun_threshold
+        self.overrun_window = overrun_window
+        self.period_adaptations = 0
+        self._overrun_times = collections.deque(maxlen=1000)  # Monotonic time of each overrun
+        self._max_read_interval_ns = 0  # Longest gap between reads since the last adaptation
+
+        # Device read timings
+        self.metrics = Metrics()
+        self._read_timer = self.metrics.stage('alsa_read')
+
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._pcm = None
+        self._wake_fds = None
+        self._capture_thread = None
+
+    @classmethod
+    def shared(cls, device="hw:0,0"):
+        """Return the process-wide bus for a device, creating it on first use
+
+        The device is opened in the native format that leaves the least
+        conversion for the recognizers (probed once per card and cached,
+        see device_probe); the constructor defaults apply if probing fails.
+        """
+        with cls._shared_lock:
+            bus = cls._shared.get(device)
+            if bus is None:
+                from device_probe import RECOGNIZER_FORMAT, negotiate_format
+                bus = cls(device=device, **negotiate_format(device, *RECOGNIZER_FORMAT))
+                cls._shared[device] = bus
+            return bus
+
+    def subscribe(self, name, channels=None, rate=None, sample_format=None,
+                  max_periods=64, policy=None):
+        """Register a consumer and start capturing if it is the first one"""
+        subscription = AudioSubscription(
+            self, name,
+            channels=channels or self.channels,
+            rate=rate or self.rate,
+            sample_format=sample_format or self.sample_format,
+            max_periods=max_periods,
+            policy=policy or self.default_policy,
+        )
+        with self._lock:
+            self._subscribers.append(subscription)
+        try:
+            self.start()
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a consumer and stop capturing once nobody is listening"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            remaining = len(self._subscribers)
+        if remaining == 0:
+            self.stop()
+
+    def start(self):
+        """Open the device and start the capture thread if it isn't already running"""
+        with self._lock:
+            if self.is_capturing:
+                return
+            previous_thread = self._capture_thread
+
+        # Make sure a previous capture thread has fully released the device
+        if previous_thread and previous_thread is not threading.current_thread():
+            previous_thread.join()
+
+        with self._lock:
+            if self.is_capturing:
+                return
+            # Open in the caller's thread so device errors reach whoever subscribed
+            self._pcm = self.pcm_factory(self)
+            self._wake_fds = os.pipe()
+            self.is_capturing = True
+            self._capture_thread = threading.Thread(target=self._capture_loop,
+                                                    args=(self._pcm, self._wake_fds))
+            self._capture_thread.daemon = True
+            self._capture_thread.start()
+
+        print(f"🎙️ Audio bus capturing from {self.device} ({self.channels}ch, {self.rate}Hz, {self.sample_format})")
+
+    def stop(self):
+        """Stop the capture thread and wait for it to release the device"""
+        with self._lock:
+            if not self.is_capturing:
+                return
+            self.is_capturing = False
+            capture_thread = self._capture_thread
+            # Wake the capture thread out of poll() immediately
+            os.write(self._wake_fds[1], b'x')
+
+        if capture_thread and capture_thread is not threading.current_thread():
+            capture_thread.join()
+
+    def overrun_rate(self, window=60.0):
+        """Device overruns per minute over the last `window` seconds (the capture health metric)"""
+        since = time.monotonic() - window
+        return sum(1 for at in self._overrun_times if at >= since) * 60.0 / window
+
+    def stats(self):
+        """Capture counters, overrun health and device read timings"""
+        stats = self.metrics.stats()
+        stats['counters'].update({
+            'periods': self.periods_captured,
+            'bytes': self.bytes_captured,
+            'overruns': self.overruns,
+            'overrun_rate_per_min': round(self.overrun_rate(), 2),
+            'periodsize': self.periodsize,
+            'period_adaptations': self.period_adaptations,
+            'device_reopens': self.device_reopens,
+            'subscribers': len(self._subscribers),
+        })
+        return stats
+
+    def _register_pcm(self, poller, audio):
+        """Poll the PCM's descriptors; returns the poll timeout to use"""
+        pcm_fds = audio.polldescriptors()
+        for fd, mask in pcm_fds:
+            poller.register(fd, mask)
+        # Without poll descriptors fall back to waking once per period
+        return None if pcm_fds else 1000.0 * self.periodsize / self.rate
+
+    def _reopen(self, audio, poller):
+        """Close the PCM and open it again (at the current period size); returns (pcm, poll timeout)"""
+        for fd, _ in audio.polldescriptors():
+            poller.unregister(fd)
+        audio.close()
+        with self._lock:
+            self._pcm = audio = self.pcm_factory(self)
+        self.device_reopens += 1
+        return audio, self._register_pcm(poller, audio)
+
+    def _on_overrun(self):
+        """Count an overrun, mark the hole for subscribers, and say whether the period should grow"""
+        now = time.monotonic()
+        self.overruns += 1
+        self._overrun_times.append(now)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription._publish(Gap(OVERRUN))
+
+        if not self.adaptive_period or self.periodsize >= self.max_periodsize:
+            return False
+        recent = sum(1 for at in self._overrun_times if at >= now - self.overrun_window)
+        return recent >= self.overrun_threshold
+
+    def _adapt_period(self):
+        """Grow the period so the device buffer (about 4 periods) covers the worst read latency"""
+        latency = self._max_read_interval_ns / 1e9
+        needed = int(latency * self.rate / 3) + 1
+        periodsize = min(max(2 * self.periodsize, needed), self.max_periodsize)
+        print(f"⚠️ {self.overrun_threshold}+ overruns in {self.overrun_window:.0f}s on {self.device}: "
+              f"period {self.periodsize} -> {periodsize} frames (worst read latency {latency * 1000:.0f} ms)")
+        self.periodsize = periodsize
+        self.period_adaptations += 1
+        self._overrun_times.clear()
+        self._max_read_interval_ns = 0
+
+    def _capture_loop(self, audio, wake_fds):
+        """Sleep until the PCM has a period ready, then publish it to every subscriber"""
+        wake_fd = wake_fds[0]
+        poller = select.poll()
+        poller.register(wake_fd, select.POLLIN)
+        timeout_ms = self._register_pcm(poller, audio)
+        failed_reads = 0
+        last_read = None
+
+        try:
+            while self.is_capturing:
+                events = poller.poll(timeout_ms)
+                if any(fd == wake_fd for fd, _ in events):
+                    break
+
+                # Drain every period that is ready before going back to sleep
+                while self.is_capturing:
+                    start = now_ns()
+                    try:
+                        length, data = audio.read()
+                    except Exception as e:
+                        # Errors pyalsaaudio doesn't recover itself (e.g. -ESTRPIPE after a suspend)
+                        print(f"⚠️ Capture read failed on {self.device}: {e}")
+                        length, data = -1, b''
+                    if length < 0:
+                        # -EPIPE: the device overran and pyalsaaudio has re-prepared the PCM.
+                        # A prepared capture stream only restarts on a read, so read again
+                        # right away instead of waiting in poll()
+                        failed_reads += 1
+                        last_read = None
+                        adapt = self._on_overrun()
+                        if adapt:
+                            self._adapt_period()
+                        if adapt or failed_reads >= MAX_RECOVERY_READS:
+                            # A freshly opened PCM starts like it did at startup
+                            audio, timeout_ms = self._reopen(audio, poller)
+                            failed_reads = 0
+                            break
+                        continue
+                    if length == 0:
+                        break
+                    failed_reads = 0
+                    self._read_timer.record(now_ns() - start)
+                    if last_read is not None:
+                        self._max_read_interval_ns = max(self._max_read_interval_ns, start - last_read)
+                    last_read = start
+
+                    self.periods_captured += 1
+                    self.bytes_captured += len(data)
+                    with self._lock:
+                        subscribers = list(self._subscribers)
+                    for subscription in subscribers:
+                        subscription._publish(data)
+
+        except Exception as e:
+            print(f"❌ Error in audio bus capture loop: {e}")
+        finally:
+            with self._lock:
+                self.is_capturing = False
+            try:
+                audio.close()
+            except Exception:
+                pass
+            for fd in wake_fds:
+                os.close(fd)
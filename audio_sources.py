@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import select
+import threading
+import numpy as np
+import util
+from dsp import PcmConverter, PolyphaseResampler, sample_width
+
+
+class ReplaySource:
+    """PCM-like capture source that plays back audio held in memory
+
+    Drop-in replacement for alsaaudio.PCM behind an AudioBus (pass
+    `lambda bus: source` as the bus's pcm_factory). In real-time mode periods
+    become readable at the pace a sound card would deliver them; otherwise
+    every period is readable immediately, so the pipeline runs as fast as
+    its consumers allow.
+    """
+
+    def __init__(self, samples, rate, channels=1, sample_format="S16_LE", periodsize=1024,
+                 realtime=True, tail_silence=1.0):
+        """`samples` is float32 in [-1, 1], shaped (frames,) or (frames, channels)"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1 and channels > 1:
+            samples = np.repeat(samples[:, None], channels, axis=1)
+
+        # Trailing silence lets VAD gates close and recognizers endpoint the last utterance
+        silence = np.zeros((int(rate * tail_silence),) + samples.shape[1:], dtype=np.float32)
+        samples = np.concatenate([samples, silence])
+
+        self._data = PcmConverter("FLOAT_LE", channels, sample_format).encode(samples).tobytes()
+
+        self.rate = rate
+        self.channels = channels
+        self.periodsize = periodsize
+        self.realtime = realtime
+        self.duration = len(samples) / rate
+        self.finished = threading.Event()
+
+        self._frame_bytes = channels * sample_width(sample_format)
+        self._period_bytes = periodsize * self._frame_bytes
+        self._offset = 0
+        self._periods_read = 0
+        self._started_at = None
+
+        # In fast mode a permanently readable pipe makes poll() return immediately
+        self._ready_fds = None
+        if not realtime:
+            self._ready_fds = os.pipe()
+            os.write(self._ready_fds[1], b'x')
+
+    def polldescriptors(self):
+        """Descriptors the bus should poll (none in real-time mode: it wakes once per period)"""
+        if self._ready_fds is None:
+            return []
+        return [(self._ready_fds[0], select.POLLIN)]
+
+    def read(self):
+        """Return (frames, data) like alsaaudio.PCM.read() in non-blocking mode"""
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+
+        if self._offset >= len(self._data):
+            self._finish()
+            return 0, b''
+
+        if self.realtime:
+            due = (time.monotonic() - self._started_at) * self.rate / self.periodsize
+            if self._periods_read >= int(due):
+                return 0, b''
+
+        data = self._data[self._offset:self._offset + self._period_bytes]
+        self._offset += len(data)
+        self._periods_read += 1
+        return len(data) // self._frame_bytes, data
+
+    def _finish(self):
+        """Mark the end of the stream and stop looking readable"""
+        if self.finished.is_set():
+            return
+        if self._ready_fds is not None:
+            os.read(self._ready_fds[0], 1)
+        self.finished.set()
+
+    def close(self):
+        """Release the pipe used for fast mode"""
+        if self._ready_fds is not None:
+            for fd in self._ready_fds:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self._ready_fds = None
+
+
+def generate_audio(kind, seconds, rate=16000, seed=0):
+    """Synthetic mono float32 test audio: 'silence', 'noise' (pink-ish) or 'tone'"""
+    frames = int(seconds * rate)
+    if kind == 'silence':
+        return np.zeros(frames, dtype=np.float32)
+    if kind == 'noise':
+        rng = np.random.default_rng(seed)
+        white = rng.standard_normal(frames).astype(np.float32)
+        # A short moving average tilts white noise towards a room-noise-like spectrum
+        colored = np.convolve(white, np.ones(8, dtype=np.float32) / 8, mode='same')
+        return (colored * (0.05 / max(float(np.std(colored)), 1e-9))).astype(np.float32)
+    if kind == 'tone':
+        t = np.arange(frames, dtype=np.float32) / rate
+        return (0.1 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+    raise ValueError(f"Unknown generated audio kind: {kind}")
+
+
+def load_fixture(path, rate=16000):
+    """Load a WAV fixture and its optional label sidecar (same name, .json)
+
+    The sidecar looks like {"wake_words": [{"start": 1.2, "end": 1.9, "text": "hey furby"}]}
+    with times in seconds from the start of the file.
+    """
+    samples = util.read_wav_mono(path, rate)
+    labels = []
+    label_path = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(label_path):
+        with open(label_path) as f:
+            labels = json.load(f).get('wake_words', [])
+    return samples, labels
+
+
+def to_capture_format(samples, rate, capture_rate, capture_channels):
+    """Turn 16 kHz mono fixture audio into what the sound card would deliver"""
+    if capture_rate != rate:
+        samples = PolyphaseResampler(rate, capture_rate).process(samples).copy()
+    if capture_channels > 1:
+        samples = np.repeat(samples[:, None], capture_channels, axis=1)
+    return samples
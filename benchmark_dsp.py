@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the DSP kernels used on the capture path
+"""
+
+import time
+import tracemalloc
+import numpy as np
+from dsp import PcmConverter, PolyphaseResampler, downmix, select_channel, accumulator_dtype
+
+PERIOD_FRAMES = 1024
+DURATION_SECONDS = 10.0
+
+
+def time_per_period(fn, periods, repeats=5):
+    """Best-of-N wall time for running fn over every period, returned per period in seconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for period in periods:
+            fn(period)
+        best = min(best, time.perf_counter() - start)
+    return best / len(periods)
+
+
+def benchmark_resampler(in_rate, out_rate, channels=1):
+    """Stream DURATION_SECONDS of noise through the resampler one period at a time"""
+    rng = np.random.default_rng(0)
+    total_frames = int(in_rate * DURATION_SECONDS)
+    shape = (total_frames,) if channels == 1 else (total_frames, channels)
+    audio = (rng.standard_normal(shape) * 3000).astype(np.int16)
+    periods = [audio[i:i + PERIOD_FRAMES] for i in range(0, total_frames, PERIOD_FRAMES)]
+
+    resampler = PolyphaseResampler(in_rate, out_rate, channels=channels)
+    out = np.empty((resampler.max_output_length(PERIOD_FRAMES),) + shape[1:], dtype=np.float32)
+    per_period = time_per_period(lambda p: resampler.process(p, out=out), periods)
+
+    period_duration = PERIOD_FRAMES / in_rate
+    load = per_period / period_duration * 100
+    print(f"   {in_rate:>6} -> {out_rate:<6} {channels}ch: {per_period * 1e6:8.1f} µs/period "
+          f"({load:.3f}% of real time)")
+    return load
+
+
+def measure_aliasing(tone_hz=12000):
+    """Compare how much of an out-of-band tone survives naive decimation vs the resampler"""
+    t = np.arange(48000) / 48000
+    tone = np.sin(2 * np.pi * tone_hz * t).astype(np.float32)
+    naive = tone[::3][256:]
+    filtered = PolyphaseResampler(48000, 16000).process(tone)[256:]
+
+    def db(x):
+        return 20 * np.log10(max(np.sqrt(np.mean(x ** 2)), 1e-12) / np.sqrt(0.5))
+
+    print(f"   {tone_hz} Hz tone folded into 16 kHz output: "
+          f"naive [::3] {db(naive):6.1f} dB, polyphase {db(filtered):6.1f} dB")
+
+
+def heap_bytes_per_call(fn, arg, calls=200):
+    """Peak traced heap growth while calling fn repeatedly after warm-up"""
+    fn(arg)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for _ in range(calls):
+        fn(arg)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return peak
+
+
+def report_kernel(name, fn, periods, frames_per_period):
+    """Print µs/period and heap use for one kernel; returns the heap peak"""
+    per_period = time_per_period(fn, periods)
+    heap = heap_bytes_per_call(fn, periods[0])
+    load = per_period / (frames_per_period / 48000) * 100
+    print(f"   {name:<30} {per_period * 1e6:7.1f} µs/period ({load:.3f}% of real time), "
+          f"heap peak {heap} B")
+    return heap
+
+
+def benchmark_kernels():
+    """Downmix, channel select and format conversion on 48 kHz stereo periods"""
+    rng = np.random.default_rng(0)
+    total_frames = int(48000 * DURATION_SECONDS)
+    audio = np.clip(rng.standard_normal((total_frames, 2)) * 0.1, -1, 1).astype(np.float32)
+    chunks = [audio[i:i + PERIOD_FRAMES] for i in range(0, total_frames, PERIOD_FRAMES)]
+
+    heaps = []
+    # Standalone kernels on integer frames with caller-provided buffers
+    int16_periods = [(chunk * 32767).astype(np.int16) for chunk in chunks]
+    int32_periods = [(chunk * 2147483647).astype(np.int32) for chunk in chunks]
+    out16 = np.empty(PERIOD_FRAMES, dtype=np.int16)
+    out32 = np.empty(PERIOD_FRAMES, dtype=np.int32)
+    acc16 = np.empty((2, PERIOD_FRAMES), dtype=accumulator_dtype(np.int16))
+    acc32 = np.empty((2, PERIOD_FRAMES), dtype=accumulator_dtype(np.int32))
+    heaps.append(report_kernel("downmix S16 2ch -> S16",
+                               lambda p: downmix(p, out=out16, accumulator=acc16), int16_periods, PERIOD_FRAMES))
+    heaps.append(report_kernel("downmix S32 2ch -> S32",
+                               lambda p: downmix(p, out=out32, accumulator=acc32), int32_periods, PERIOD_FRAMES))
+    heaps.append(report_kernel("select channel S32",
+                               lambda p: select_channel(p, 1, out=out32), int32_periods, PERIOD_FRAMES))
+
+    # Raw device bytes through PcmConverter, as the audio bus uses it
+    for in_format in ("S16_LE", "S24_3LE", "S32_LE"):
+        raw_periods = [PcmConverter("FLOAT_LE", 2, in_format).encode(chunk).tobytes() for chunk in chunks]
+        for label, options in (("stereo", {}), ("mono", {'mono': True}), ("ch0", {'channel': 0})):
+            converter = PcmConverter(in_format, 2, mono=options.get('mono', False), channel=options.get('channel'))
+            heaps.append(report_kernel(f"decode {in_format} -> float {label}",
+                                       converter.decode, raw_periods, PERIOD_FRAMES))
+
+    mono_chunks = [chunk[:, 0].copy() for chunk in chunks]
+    for out_format in ("S16_LE", "S24_3LE", "S32_LE"):
+        converter = PcmConverter("FLOAT_LE", 1, out_format)
+        heaps.append(report_kernel(f"encode float mono -> {out_format}",
+                                   converter.encode, mono_chunks, PERIOD_FRAMES))
+    return max(heaps)
+
+
+def main():
+    print("DSP Kernel Benchmarks")
+    print("=" * 40)
+    print(f"Period: {PERIOD_FRAMES} frames, stream: {DURATION_SECONDS:.0f} s\n")
+
+    print("🔁 Polyphase resampler")
+    loads = [
+        benchmark_resampler(48000, 16000),
+        benchmark_resampler(44100, 16000),
+        benchmark_resampler(16000, 8000),
+        benchmark_resampler(48000, 44100),
+        benchmark_resampler(48000, 16000, channels=2),
+    ]
+
+    print("\n📉 Anti-aliasing")
+    measure_aliasing()
+
+    print("\n🎚️ Downmix / conversion kernels")
+    heap = benchmark_kernels()
+
+    print("\n" + "=" * 40)
+    worst = max(loads)
+    verdict = "✅" if worst < 1.0 else "⚠️"
+    print(f"{verdict} Worst resampler load: {worst:.3f}% of real time (target < 1%)")
+    # A few hundred bytes of Python objects (views, scalars) are expected; sample buffers are not
+    verdict = "✅" if heap < 4096 else "⚠️"
+    print(f"{verdict} Worst kernel heap peak over 200 calls: {heap} B (no per-call sample buffers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Overhead check for the always-on stage instrumentation
+
+Times the exact pattern the capture path uses per period (two clock reads
+and a histogram record for each stage, plus counter updates) and fails if
+it costs more than the per-period budget.
+"""
+
+import sys
+import time
+from metrics import Metrics, now_ns
+
+STAGES = ('alsa_read', 'downmix', 'resample', 'vad', 'recognizer', 'callback')
+PERIODS = 200000
+BUDGET_US = 5.0  # Allowed instrumentation cost per period
+
+
+def instrumented_period(metrics, timers):
+    """One period's worth of instrumentation with no real work in between"""
+    for timer in timers:
+        start = now_ns()
+        timer.record(now_ns() - start)
+    metrics.count('periods')
+    metrics.count('bytes', 4096)
+
+
+def bare_period(metrics, timers):
+    """Same loop shape without the instrumentation calls"""
+    for timer in timers:
+        pass
+
+
+def measure(fn):
+    """Best-of-5 seconds per period"""
+    metrics = Metrics()
+    timers = [metrics.stage(name) for name in STAGES]
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(PERIODS):
+            fn(metrics, timers)
+        best = min(best, time.perf_counter() - start)
+    return best / PERIODS, metrics
+
+
+def main():
+    print("Instrumentation Overhead")
+    print("=" * 40)
+
+    instrumented, metrics = measure(instrumented_period)
+    bare, _ = measure(bare_period)
+    overhead_us = (instrumented - bare) * 1e6
+
+    print(f"⏱️ {len(STAGES)} stages + 2 counters: {overhead_us:.2f} µs per period")
+    print(f"   ({overhead_us / len(STAGES) * 1000:.0f} ns per stage timing)")
+    print(f"   Periods recorded: {metrics.counters['periods']}")
+
+    print("\n" + "=" * 40)
+    if overhead_us < BUDGET_US:
+        print(f"✅ Within the {BUDGET_US:.1f} µs per-period budget")
+        return 0
+    print(f"❌ Exceeds the {BUDGET_US:.1f} µs per-period budget")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Phrase matching cost vs number of phrases: compiled PhraseIndex vs linear scan
+
+Builds indexes of 1 to 10,000 synthetic command phrases (plus the wake
+words) and times matching typical recognizer results against them. The
+index should stay flat as phrases are added; the old per-phrase substring
+scan grows linearly.
+"""
+
+import time
+import random
+from phrase_index import PhraseIndex
+
+PHRASE_COUNTS = (1, 10, 100, 1000, 10000)
+WAKE_WORDS = ["hey furby", "hey assistant"]
+UTTERANCES = [
+    "hey furby turn the kitchen lights off",
+    "hay ferby what's the weather like tomorrow",
+    "could you set a timer for ten minutes",
+    "i was just talking to my sister about dinner",
+    "hey assistant volume up a little bit please",
+]
+
+
+def synthetic_phrases(count, seed=0):
+    """Random 1-4 word phrases over a command-like vocabulary"""
+    rng = random.Random(seed)
+    verbs = ["turn", "set", "play", "stop", "open", "close", "dim", "start", "show", "call"]
+    nouns = [f"{word}{i}" for i in range(200) for word in ("lamp", "timer", "room", "song", "door")]
+    phrases = set()
+    while len(phrases) < count:
+        words = [rng.choice(verbs)] + [rng.choice(nouns) for _ in range(rng.randint(0, 3))]
+        phrases.add(' '.join(words))
+    return list(phrases)
+
+
+def linear_scan(phrases, text):
+    """The detectors' previous approach: substring test per phrase"""
+    return [phrase for phrase in phrases if phrase in text]
+
+
+def time_per_call(fn, repeats=200):
+    """Best-of-5 time per call over all utterances, in microseconds"""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for text in UTTERANCES:
+                fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / (repeats * len(UTTERANCES)) * 1e6
+
+
+def main():
+    print("Phrase Index Benchmark")
+    print("=" * 40)
+    print(f"{'phrases':>8}{'build ms':>10}{'index µs':>10}{'fuzzy µs':>10}{'linear µs':>11}")
+    results = []
+    for count in PHRASE_COUNTS:
+        phrases = WAKE_WORDS + synthetic_phrases(count)
+        start = time.perf_counter()
+        index = PhraseIndex(phrases)
+        build = (time.perf_counter() - start) * 1000
+        exact = PhraseIndex(phrases, fuzzy=False)
+
+        fuzzy_us = time_per_call(index.search)
+        exact_us = time_per_call(exact.search)
+        linear_us = time_per_call(lambda text: linear_scan(phrases, text), repeats=20)
+        results.append(fuzzy_us)
+        print(f"{len(phrases):>8}{build:>10.1f}{exact_us:>10.1f}{fuzzy_us:>10.1f}{linear_us:>11.1f}")
+
+    print("\n🔎 Matches with the largest index:")
+    for text in UTTERANCES[:2]:
+        match = index.best(text)
+        print(f"   '{text}' -> {match.phrase if match else None}"
+              + (f" (score {match.score:.2f}, tokens {match.start}-{match.end})" if match else ""))
+
+    print("\n" + "=" * 40)
+    growth = results[-1] / results[0]
+    verdict = "✅" if growth < 2.0 else "⚠️"
+    print(f"{verdict} Fuzzy match time grows {growth:.2f}x from {PHRASE_COUNTS[0]} to "
+          f"{PHRASE_COUNTS[-1]} phrases (target < 2x)")
+
+
+if __name__ == "__main__":
+    main()
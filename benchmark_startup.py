@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for the wake word pipeline
+
+Spawns fresh interpreters and measures, from process start, how long it
+takes to import the stack, capture the first period and get the first
+recognizer result. Audio comes from a real-time ReplaySource (so model
+loading overlaps capture exactly as on a device) unless --device is given.
+Fails if the median time to the first period or first recognition exceeds
+its budget.
+
+Examples:
+    python benchmark_startup.py --backend vosk --model vosk-model
+    python benchmark_startup.py --backend whisper --model tiny fixtures/hey_furby.wav
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+START_ENV = "STARTUP_BENCHMARK_T0"
+ENGINE_MODULES = ("vosk", "faster_whisper", "ctranslate2", "av")
+
+
+def run_child(args):
+    """Runs in the spawned interpreter: start the pipeline and time each milestone"""
+    t0 = float(os.environ[START_ENV])
+    marks = {'interpreter': time.monotonic() - t0}
+
+    import voice_assistant_controller
+    from audio_bus import AudioBus
+    marks['imports'] = time.monotonic() - t0
+
+    options = {'load_in_background': True}
+    if args.model:
+        options['model_path'] = args.model
+    if not args.device:
+        import numpy as np
+        from audio_sources import ReplaySource, generate_audio, load_fixture, to_capture_format
+        if args.fixture:
+            samples, _ = load_fixture(args.fixture)
+        else:
+            # A second of silence, then a loud tone the VAD passes on to the recognizer
+            samples = np.concatenate([generate_audio('silence', 1.0), 5.0 * generate_audio('tone', 3.0)])
+        capture = to_capture_format(samples, 16000, args.capture_rate, args.capture_channels)
+        source = ReplaySource(capture, args.capture_rate, args.capture_channels, realtime=True)
+        options['audio_bus'] = AudioBus(device="replay", channels=args.capture_channels,
+                                        rate=args.capture_rate, pcm_factory=lambda bus: source)
+    else:
+        options['audio_bus'] = AudioBus(device=args.device)
+
+    detector = voice_assistant_controller.create_detector(args.backend, **options)
+    detector.start_listening()
+    marks['listening'] = time.monotonic() - t0
+
+    recognizer = detector.metrics.stage('recognizer')
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline and ('first_recognition' not in marks or 'model_ready' not in marks):
+        if 'first_period' not in marks and detector.audio_bus.periods_captured:
+            marks['first_period'] = time.monotonic() - t0
+        if 'model_ready' not in marks and detector.model_ready.is_set():
+            marks['model_ready'] = time.monotonic() - t0
+        if 'first_recognition' not in marks and recognizer.count:
+            marks['first_recognition'] = time.monotonic() - t0
+        time.sleep(0.001)
+
+    # Only the selected engine's modules should have been imported
+    marks['engines_imported'] = [name for name in ENGINE_MODULES if name in sys.modules]
+    print(json.dumps(marks))
+    os._exit(0)  # Skip teardown; only the startup path is being measured
+
+
+def run_once(argv):
+    """Spawn one child and return its milestones (None on failure)"""
+    env = dict(os.environ)
+    env[START_ENV] = repr(time.monotonic())  # CLOCK_MONOTONIC is shared across processes
+    completed = subprocess.run([sys.executable, __file__, '--child'] + argv,
+                               capture_output=True, text=True, env=env)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    print(completed.stdout[-2000:])
+    print(completed.stderr[-2000:])
+    return None
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Startup-time budget benchmark")
+    parser.add_argument('fixture', nargs='?', help="WAV to replay (default: generated noise + tone)")
+    parser.add_argument('--backend', default="vosk")
+    parser.add_argument('--model', help="Model path or Whisper model size")
+    parser.add_argument('--device', help="Capture from this ALSA device instead of replaying audio")
+    parser.add_argument('--capture-rate', type=int, default=48000)
+    parser.add_argument('--capture-channels', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--max-first-period', type=float, default=1.0,
+                        help="Budget (s) from process start to the first captured period")
+    parser.add_argument('--max-first-recognition', type=float, default=10.0,
+                        help="Budget (s) from process start to the first recognizer result")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    argv = sys.argv[1:]
+    args = parse_args(argv)
+    if args.child:
+        run_child(args)
+        return 0
+
+    print("Startup Time Benchmark")
+    print("=" * 40)
+    runs = []
+    for i in range(args.runs):
+        marks = run_once(argv)
+        if marks is None:
+            print(f"❌ Run {i + 1} failed")
+            return 1
+        runs.append(marks)
+
+    print(f"🔧 Backend: {args.backend}, engine modules imported: {runs[0]['engines_imported']}")
+    for name in ('interpreter', 'imports', 'listening', 'first_period', 'model_ready', 'first_recognition'):
+        values = [marks[name] for marks in runs if name in marks]
+        if values:
+            print(f"⏱️ {name:<18} median {statistics.median(values):6.3f}s  "
+                  f"max {max(values):6.3f}s  ({len(values)}/{len(runs)} runs)")
+        else:
+            print(f"⏱️ {name:<18} not reached")
+
+    print("\n" + "=" * 40)
+    failed = False
+    for name, budget in (('first_period', args.max_first_period),
+                         ('first_recognition', args.max_first_recognition)):
+        values = [marks[name] for marks in runs if name in marks]
+        if len(values) < len(runs):
+            print(f"❌ {name} not reached in every run")
+            failed = True
+        elif statistics.median(values) > budget:
+            print(f"❌ {name} exceeds the {budget:.1f}s budget")
+            failed = True
+        else:
+            print(f"✅ {name} within the {budget:.1f}s budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
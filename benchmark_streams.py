@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+How many concurrent capture streams one core can serve
+
+Runs the DetectionService on N real-time replay streams (noise with a
+loud burst every few seconds, offset per stream so windows overlap in
+time) inside a child process pinned to --cores cores, for N = 1, 2, ...
+A stream count is sustained if nothing was dropped (capture periods or
+Whisper windows) and the process used less than --max-load of its cores.
+
+Examples:
+    python benchmark_streams.py --backend whisper --model tiny
+    python benchmark_streams.py --backend whisper --model tiny --max-batch 1   # unbatched baseline
+    python benchmark_streams.py --backend vosk --model vosk-model --cores 2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def stream_audio(index, seconds, burst_every=4.0):
+    """Background noise with a loud tone burst every burst_every seconds"""
+    from audio_sources import generate_audio
+    audio = generate_audio('noise', seconds, SAMPLE_RATE, seed=index)
+    burst = 5.0 * generate_audio('tone', 1.0, SAMPLE_RATE)
+    # Stagger the streams so their windows become ready at slightly different times
+    first = 1.0 + 0.37 * index % burst_every
+    for start in np.arange(first, seconds - 1.0, burst_every):
+        offset = int(start * SAMPLE_RATE)
+        audio[offset:offset + len(burst)] += burst
+    return audio
+
+
+def run_child(args):
+    """Runs in the pinned child: serve args.streams replay streams and report load and drops"""
+    from audio_bus import AudioBus
+    from audio_sources import ReplaySource, to_capture_format
+    from detection_service import DetectionService
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, set(range(args.cores)))
+
+    sources = {}
+    replays = []
+    for i in range(args.streams):
+        capture = to_capture_format(stream_audio(i, args.seconds), SAMPLE_RATE, args.capture_rate, 2)
+        source = ReplaySource(capture, args.capture_rate, 2, realtime=True)
+        replays.append(source)
+        sources[f"mic{i}"] = AudioBus(device=f"replay{i}", channels=2, rate=args.capture_rate,
+                                      pcm_factory=lambda bus, source=source: source)
+
+    options = {'max_batch': args.max_batch} if args.backend == "whisper" else {}
+    service = DetectionService(sources, backend=args.backend, model_path=args.model, **options)
+    detections = []
+    service.set_callback(lambda source, text: detections.append(source))
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    service.start()
+    for source in replays:
+        source.finished.wait()
+    deadline = time.monotonic() + 10.0
+    while not service.is_idle() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    stats = service.stats()
+    periods_dropped = sum(s['counters'].get('periods_dropped', 0) for s in stats['streams'].values())
+    windows_dropped = sum(s['counters'].get('windows_dropped', 0) for s in stats['streams'].values())
+    result = {
+        'streams': args.streams,
+        'load': round(cpu / wall / args.cores, 3),
+        'periods_dropped': periods_dropped,
+        'windows_dropped': windows_dropped,
+        'detections': len(detections),
+        'batcher': stats['batcher'],
+    }
+    print(json.dumps(result))
+    os._exit(0)  # Skip teardown; only steady-state load is being measured
+
+
+def run_streams(streams, argv):
+    """Spawn one child for this stream count and return its result (None on failure)"""
+    completed = subprocess.run([sys.executable, __file__, '--child', '--streams', str(streams)] + argv,
+                               capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    print(completed.stdout[-2000:])
+    print(completed.stderr[-2000:])
+    return None
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Concurrent streams per core benchmark")
+    parser.add_argument('--backend', default="whisper", choices=("whisper", "vosk"))
+    parser.add_argument('--model', help="Model path or Whisper model size")
+    parser.add_argument('--cores', type=int, default=1, help="Cores the service is pinned to")
+    parser.add_argument('--max-streams', type=int, default=8)
+    parser.add_argument('--max-batch', type=int, default=4, help="Whisper windows per batched call")
+    parser.add_argument('--seconds', type=float, default=30.0, help="Audio per stream")
+    parser.add_argument('--capture-rate', type=int, default=48000)
+    parser.add_argument('--max-load', type=float, default=0.9, help="Highest sustainable CPU load per core")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--streams', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    argv = sys.argv[1:]
+    args = parse_args(argv)
+    if args.child:
+        run_child(args)
+        return 0
+
+    print("Concurrent Streams Benchmark")
+    print("=" * 40)
+    print(f"🔧 Backend: {args.backend}, cores: {args.cores}, {args.seconds:.0f}s of audio per stream\n")
+    sustained = 0
+    for streams in range(1, args.max_streams + 1):
+        result = run_streams(streams, argv)
+        if result is None:
+            print(f"❌ {streams} stream(s): run failed")
+            break
+        ok = (result['load'] < args.max_load and not result['periods_dropped']
+              and not result['windows_dropped'])
+        batch = f", mean batch {result['batcher']['mean_batch_size']}" if result['batcher'] else ""
+        print(f"{'✅' if ok else '❌'} {streams} stream(s): load {result['load']:.0%} per core, "
+              f"{result['periods_dropped']} periods / {result['windows_dropped']} windows dropped, "
+              f"{result['detections']} detections{batch}")
+        if not ok:
+            break
+        sustained = streams
+
+    print("\n" + "=" * 40)
+    print(f"📈 Sustained {sustained} stream(s) on {args.cores} core(s): "
+          f"{sustained / args.cores:.1f} streams per core")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per-window Whisper latency: in-memory WAV round trip vs float32 array input
+
+Usage: python benchmark_whisper.py [model] fixture.wav [fixture.wav ...]
+"""
+
+import io
+import sys
+import time
+import wave
+import numpy as np
+import util
+from faster_whisper import WhisperModel
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 3.0
+OVERLAP_SECONDS = 1.0
+
+
+def windows_from_fixtures(paths):
+    """Cut every fixture into the detector's 3 s windows with 1 s overlap"""
+    window = int(SAMPLE_RATE * WINDOW_SECONDS)
+    step = window - int(SAMPLE_RATE * OVERLAP_SECONDS)
+    windows = []
+    for path in paths:
+        audio = util.read_wav_mono(path, SAMPLE_RATE)
+        for start in range(0, len(audio) - window + 1, step):
+            windows.append(audio[start:start + window])
+    return windows
+
+
+def transcribe(model, audio):
+    """Run the detector's transcription settings and drain the segment generator"""
+    segments, info = model.transcribe(audio, language="en", beam_size=1, best_of=1, temperature=0.0)
+    return " ".join(segment.text.strip() for segment in segments)
+
+
+def via_wav(model, audio_float):
+    """Previous path: encode int16 into an in-memory WAV and let Whisper decode it again"""
+    audio_int16 = np.clip(np.rint(audio_float * 32768.0), -32768, 32767).astype(np.int16)
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(audio_int16.tobytes())
+    wav_buffer.seek(0)
+    return transcribe(model, wav_buffer)
+
+
+def via_array(model, audio_float):
+    """Current path: hand the float32 window straight to Whisper"""
+    return transcribe(model, audio_float)
+
+
+def measure(name, fn, model, windows):
+    """Time fn over every window and print mean/p50/p95 latency"""
+    latencies = []
+    for audio in windows:
+        start = time.perf_counter()
+        fn(model, audio)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    print(f"   {name:<14} mean {latencies.mean():7.1f} ms   p50 {np.percentile(latencies, 50):7.1f} ms   "
+          f"p95 {np.percentile(latencies, 95):7.1f} ms")
+    return latencies.mean()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__.strip())
+        return
+    model_path = "tiny"
+    if not args[0].endswith('.wav'):
+        model_path = args.pop(0)
+
+    print("Whisper Window Latency Benchmark")
+    print("=" * 40)
+    windows = windows_from_fixtures(args)
+    print(f"📁 {len(args)} fixture(s), {len(windows)} windows of {WINDOW_SECONDS:.0f} s")
+
+    print(f"🔧 Loading Faster-Whisper model: {model_path}")
+    model = WhisperModel(model_path, device="cpu", compute_type="int8")
+
+    # Warm up so the first measured window doesn't pay cold-start cost
+    via_array(model, windows[0])
+
+    print("\n⏱️ Per-window latency")
+    before = measure("WAV round trip", via_wav, model, windows)
+    after = measure("float32 array", via_array, model, windows)
+
+    print("\n" + "=" * 40)
+    print(f"📈 Saved {before - after:.1f} ms per window ({(before - after) / before * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import time
+import threading
+from dsp import to_float
+from prompt_capture import align_phrase_end
+from phrase_index import PhraseIndex
+from inference_queue import InferenceQueue, DROP_OLDEST
+from model_registry import ModelRegistry
+from wake_word_detector import WakeWordDetector
+from metrics import now_ns
+
+
+class CascadeWakeWordDetector:
+    """Two-stage wake word detection: Vosk nominates, Whisper verifies
+
+    A grammar-constrained Vosk detector (cheap, but it maps any similar
+    sound onto a wake phrase) runs on every period. Each candidate it
+    fires becomes a span of its lookback ring - pre_roll_seconds before the
+    end of the phrase to post_roll_seconds after - which a worker thread
+    transcribes with Whisper. Only verified candidates reach the callback,
+    so Whisper runs on a few seconds per candidate instead of on all audio
+    while false triggers stay at Whisper's level.
+    """
+
+    # Greedy and without word timings; only a verified candidate is aligned for its phrase end
+    TRANSCRIBE_OPTIONS = {'language': "en", 'beam_size': 1, 'best_of': 1, 'temperature': 0.0}
+
+    def __init__(self, model_path="vosk-model", verifier_model="base", wake_words=["hey furby", "hey assistant"],
+                 sample_rate=16000, audio_bus=None, use_vad=True, model_registry=None,
+                 load_in_background=False, startup_buffer_seconds=15.0, lookback_seconds=10.0,
+                 pre_roll_seconds=2.0, post_roll_seconds=0.3, refractory_seconds=2.0,
+                 max_pending_candidates=4, queue_policy=DROP_OLDEST, device="hw:0,0"):
+        self.verifier_model_path = verifier_model
+        self.wake_words = [word.lower() for word in wake_words]
+        # Exact matches only: the verifier exists to hold false triggers at Whisper's level
+        self.phrase_index = PhraseIndex(self.wake_words, fuzzy=False)
+        self.sample_rate = sample_rate
+        self.model_registry = model_registry or ModelRegistry.shared()
+        self.wake_word_callback = None
+        self.is_listening = False
+
+        # Stage 1 owns capture, VAD and the lookback ring candidates are cut from
+        self.stage1 = WakeWordDetector(model_path=model_path, wake_words=wake_words, sample_rate=sample_rate,
+                                       audio_bus=audio_bus, use_vad=use_vad, model_registry=self.model_registry,
+                                       load_in_background=load_in_background,
+                                       startup_buffer_seconds=startup_buffer_seconds,
+                                       lookback_seconds=lookback_seconds, device=device)
+        self.stage1.set_wake_word_callback(self._nominate)
+        self.audio_bus = self.stage1.audio_bus
+        self.lookback = self.stage1.lookback
+
+        # Candidates are (start, length) spans of the lookback ring
+        self.pre_roll = int(pre_roll_seconds * sample_rate)
+        self.post_roll = int(post_roll_seconds * sample_rate)
+        self.refractory_size = int(refractory_seconds * sample_rate)
+        self.inference_queue = InferenceQueue(max_pending=max_pending_candidates, policy=queue_policy)
+        self.verifier_thread = None
+        self.last_detection = None  # Last verified detection (same keys as the stage detectors)
+        self._last_verified_end = None
+
+        # Stage counters and the verify timing share the Vosk detector's metrics
+        self.metrics = self.stage1.metrics
+        self._verify_timer = self.metrics.stage('verify')
+        self._align_timer = self.metrics.stage('align')
+
+        self.model_ready = threading.Event()
+        self.verifier_model = None
+        if load_in_background:
+            threading.Thread(target=self.setup_model, name="cascade-model-load", daemon=True).start()
+        else:
+            self.setup_model()
+
+    @property
+    def model(self):
+        return self.stage1.model
+
+    @property
+    def subscription(self):
+        return self.stage1.subscription
+
+    def setup_model(self):
+        """Load the Whisper verifier (the Vosk stage loads itself)"""
+        try:
+            self.verifier_model = self.model_registry.acquire("whisper", self.verifier_model_path,
+                                                              compute_type="int8", device="cpu")
+            print(f"✅ Whisper verifier ready: {self.verifier_model_path}")
+        except Exception as e:
+            print(f"❌ Error loading Whisper verifier: {e}")
+            self.verifier_model = None
+        finally:
+            self.stage1.model_ready.wait()
+            self.model_ready.set()
+
+    def set_wake_word_callback(self, callback):
+        """Set callback function to be called when a wake word is verified"""
+        self.wake_word_callback = callback
+
+    def start_listening(self):
+        """Start both stages"""
+        if self.model_ready.is_set() and not self.verifier_model:
+            print("❌ Cannot start cascade - Whisper verifier not loaded")
+            return
+        if self.verifier_thread and self.verifier_thread.is_alive():
+            return
+
+        self.is_listening = True
+        self.inference_queue.reopen()
+        self.stage1.start_listening()
+        self.verifier_thread = threading.Thread(target=self._verify_loop, name="cascade-verifier", daemon=True)
+        self.verifier_thread.start()
+
+    def stop_listening(self):
+        """Stop both stages; a candidate being verified is allowed to finish"""
+        self.is_listening = False
+        # Closed first, so a nomination blocked on a full queue (BLOCK policy) lets stage 1 stop
+        self.inference_queue.close()
+        self.stage1.stop_listening()
+        if self.verifier_thread and self.verifier_thread is not threading.current_thread():
+            self.verifier_thread.join()
+        self.verifier_thread = None
+
+    def close(self):
+        """Stop listening and give both models back to the registry"""
+        self.stop_listening()
+        self.stage1.close()
+        self.model_ready.wait()
+        if self.verifier_model:
+            self.model_registry.release(self.verifier_model)
+            self.verifier_model = None
+
+    def _nominate(self, text):
+        """Stage 1 callback (listening thread): queue the candidate span for verification"""
+        end = self.stage1.last_detection['end_sample']
+        self.metrics.count('candidates')
+        last = self._last_verified_end
+        if last is not None and abs(end - last) < self.refractory_size:
+            # Whisper already confirmed this utterance
+            self.metrics.count('duplicates_suppressed')
+            return
+        start = max(end - self.pre_roll, self.lookback.oldest)
+        self.inference_queue.put(start, end + self.post_roll - start)
+
+    def _verify_loop(self):
+        """Worker loop - verify queued candidates until the queue is closed"""
+        # Candidates nominated while Whisper is still loading wait in the queue
+        while self.is_listening and not self.model_ready.wait(0.1):
+            pass
+        if self.is_listening and not self.verifier_model:
+            print("❌ Cascade stopped - Whisper verifier failed to load")
+            self.stop_listening()
+            return
+
+        while self.is_listening:
+            candidate = self.inference_queue.get(timeout=0.5)
+            if candidate is None:
+                continue
+            start, length = candidate
+            if self._verify(start, length):
+                self.inference_queue.mark_processed()
+            else:
+                self.inference_queue.mark_dropped()
+
+    def _verify(self, start, length):
+        """Transcribe one candidate span with Whisper; returns False if its audio was lost"""
+        cond = self.stage1._lookback_cond
+        with cond:
+            # The post-roll may not have been captured yet
+            while self.lookback.written < start + length and self.stage1.is_listening:
+                cond.wait(0.1)
+            length = min(length, self.lookback.written - start)
+            if length <= 0 or self.lookback.is_overrun(start):
+                return False
+            audio = to_float(self.lookback.view(start, length), "S16_LE")
+
+        begin = now_ns()
+        try:
+            segments, _ = self.verifier_model.transcribe(audio, **self.TRANSCRIBE_OPTIONS)
+            segments = list(segments)
+        except Exception as e:
+            print(f"⚠️ Whisper verification error: {e}")
+            return False
+        finally:
+            self._verify_timer.record(now_ns() - begin)
+
+        for segment in segments:
+            text = segment.text.lower().strip()
+            wake_word = self._matched_wake_word(text)
+            if wake_word:
+                end = self._align(audio, wake_word)
+                end_sample = start + int((segment.end if end is None else end) * self.sample_rate)
+                self.metrics.count('verified')
+                self._on_wake_word(text, end_sample, end is not None)
+                return True
+        print(f"🚫 Whisper rejected candidate: {' '.join(s.text.strip() for s in segments) or '(silence)'}")
+        self.metrics.count('rejected')
+        return True
+
+    def _align(self, audio, wake_word):
+        """End time of the wake phrase in a verified candidate, from a second pass with word timings"""
+        begin = now_ns()
+        try:
+            return align_phrase_end(self.verifier_model, audio, wake_word, self.phrase_index,
+                                    **self.TRANSCRIBE_OPTIONS)
+        except Exception as e:
+            print(f"⚠️ Whisper word alignment error: {e}")
+            return None
+        finally:
+            self._align_timer.record(now_ns() - begin)
+
+    def _on_wake_word(self, text, end_sample, precise_end=True):
+        """Report a verified detection"""
+        print(f"🎯 Cascade wake word verified: {text}")
+        self._last_verified_end = end_sample
+        self.last_detection = {
+            'text': text,
+            'end_sample': end_sample,
+            'precise_end': precise_end,
+            'detected_sample': self.lookback.written,
+            'time': time.time(),
+        }
+        if self.wake_word_callback:
+            self.wake_word_callback(text)
+
+    def open_prompt(self, start=None, **options):
+        """Stream the audio after the last verified wake word (see WakeWordDetector.open_prompt)"""
+        if start is None and self.last_detection:
+            start = self.last_detection['end_sample']
+        return self.stage1.open_prompt(start=start, **options)
+
+    def whisper_duty_cycle(self):
+        """Fraction of the audio stream's duration Whisper spent verifying (and aligning)"""
+        audio_seconds = self.lookback.written / self.sample_rate
+        if not audio_seconds:
+            return 0.0
+        return (self._verify_timer.total_ns + self._align_timer.total_ns) / 1e9 / audio_seconds
+
+    def stats(self):
+        """Vosk pipeline stats plus the verification stage's counters"""
+        stats = self.stage1.stats()
+        for name, value in self.inference_queue.stats().items():
+            stats['counters'][f'candidates_{name}'] = value
+        stats['counters']['whisper_duty_cycle'] = round(self.whisper_duty_cycle(), 4)
+        return stats
+
+    def memory_footprint(self):
+        """Stage 1's buffers; candidates are spans of its lookback ring, so they add nothing"""
+        return self.stage1.memory_footprint()
+
+    def _matched_wake_word(self, text):
+        """The wake word Whisper heard exactly in text, or None"""
+        match = self.phrase_index.best(text)
+        return match.phrase if match else None
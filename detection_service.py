@@ -0,0 +1,138 @@
+import time
+import functools
+import threading
+import collections
+from audio_bus import AudioBus
+from model_registry import ModelRegistry
+from metrics import format_stats
+
+
+class DetectionService:
+    """Wake word detection for several capture sources in one process
+
+    `sources` maps a stream name (e.g. a room) to an ALSA device string or
+    an AudioBus. Every stream gets its own detector - its own capture
+    subscription, VAD, rings and recognizer state - while the model is
+    loaded once: Vosk streams share it through the model registry, and
+    Whisper streams share one WhisperBatcher, which merges windows pending
+    on different streams into batched encoder calls. Detections are
+    reported as callback(source, text) and kept in `events` tagged with
+    their source.
+    """
+
+    def __init__(self, sources, backend="whisper", model_path=None, wake_words=["hey furby", "hey assistant"],
+                 max_batch=4, batch_wait=0.05, model_registry=None, max_events=100, **detector_options):
+        import voice_assistant_controller
+
+        self.backend = backend
+        self.model_registry = model_registry or ModelRegistry.shared()
+        self.callback = None
+        self.events = collections.deque(maxlen=max_events)  # Recent detections, newest last
+        self._events_lock = threading.Lock()
+
+        self.batcher = None
+        self._model = None
+        if backend == "whisper":
+            from whisper_batcher import WhisperBatcher
+            self._model = self.model_registry.acquire("whisper", model_path or "base", compute_type="int8",
+                                                      device="cpu")
+            self.batcher = WhisperBatcher(self._model, max_batch=max_batch, max_wait=batch_wait)
+            detector_options['transcriber'] = self.batcher
+        elif model_path:
+            detector_options['model_path'] = model_path
+
+        self.detectors = {}
+        for name, source in sources.items():
+            bus = source if isinstance(source, AudioBus) else AudioBus.shared(source)
+            detector = voice_assistant_controller.create_detector(
+                backend, wake_words=wake_words, audio_bus=bus, model_registry=self.model_registry,
+                **detector_options)
+            detector.set_wake_word_callback(functools.partial(self._on_wake_word, name))
+            self.detectors[name] = detector
+        print(f"✅ Detection service ready: {len(self.detectors)} {backend} stream(s) {list(self.detectors)}")
+
+    def set_callback(self, callback):
+        """Set callback(source, text), called for every detection on any stream"""
+        self.callback = callback
+
+    def start(self):
+        """Start listening on every stream"""
+        for detector in self.detectors.values():
+            detector.start_listening()
+
+    def stop(self):
+        """Stop listening on every stream"""
+        for detector in self.detectors.values():
+            detector.stop_listening()
+
+    def close(self):
+        """Stop every stream and release the shared model"""
+        for detector in self.detectors.values():
+            detector.close()
+        if self.batcher:
+            self.batcher.close()
+            self.batcher = None
+        if self._model:
+            self.model_registry.release(self._model)
+            self._model = None
+
+    def _on_wake_word(self, source, text):
+        """Detector callback (runs on that stream's threads): tag and record the detection"""
+        detection = dict(self.detectors[source].last_detection or {'text': text, 'time': time.time()})
+        detection['source'] = source
+        with self._events_lock:
+            self.events.append(detection)
+        print(f"🎯 [{source}] wake word: {text}")
+        if self.callback:
+            self.callback(source, text)
+
+    def is_idle(self):
+        """True when no stream has audio or windows waiting"""
+        for detector in self.detectors.values():
+            subscription = detector.subscription
+            if subscription and subscription.pending():
+                return False
+            queue = getattr(detector, 'inference_queue', None)
+            if queue and not queue.is_idle():
+                return False
+        return True
+
+    def stats(self):
+        """Per-stream pipeline stats plus the batcher's counters"""
+        return {
+            'streams': {name: detector.stats() for name, detector in self.detectors.items()},
+            'batcher': self.batcher.stats() if self.batcher else None,
+        }
+
+    def memory_footprint(self):
+        """Every stream's buffers (prefixed with its name) plus the batcher's"""
+        footprint = {}
+        for name, detector in self.detectors.items():
+            for part, size in detector.memory_footprint().items():
+                footprint[f'{name}_{part}'] = size
+        if self.batcher:
+            footprint.update(self.batcher.memory_footprint())
+        return footprint
+
+    def print_stats(self):
+        """Print a summary for every stream"""
+        stats = self.stats()
+        for name, stream_stats in stats['streams'].items():
+            print(f"📊 [{name}]")
+            print(format_stats(stream_stats))
+        if stats['batcher']:
+            print(f"📦 Whisper batches: {stats['batcher']}")
+
+
+# Example usage: two USB microphones
+if __name__ == "__main__":
+    service = DetectionService({'kitchen': "hw:1,0", 'living_room': "hw:2,0"}, backend="whisper",
+                               model_path="tiny")
+    service.set_callback(lambda source, text: print(f"🔔 {source}: {text}"))
+    service.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        service.print_stats()
+        service.close()
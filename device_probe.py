@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Capture device capability probe
+
+Opens an ALSA capture device once per candidate configuration (channels x
+rate x sample format, plus a few period sizes) and records what the
+hardware actually accepted. Results are cached on disk keyed by the card's
+identity (its ALSA id, USB id and PCM info), so startup only re-probes when
+the hardware changes. negotiate_format() picks the configuration that
+leaves the least conversion for the bus's subscribers: with a card that
+delivers 16 kHz mono S16 the recognizers get periods untouched.
+
+    python device_probe.py --device hw:1,0            # show (and cache) capabilities
+    python device_probe.py --device hw:1,0 --refresh  # probe again
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from audio_bus import SAMPLE_FORMATS
+from dsp import sample_width
+
+CANDIDATE_CHANNELS = (1, 2)
+CANDIDATE_RATES = (16000, 32000, 44100, 48000)
+CANDIDATE_FORMATS = ("S16_LE", "S24_LE", "S32_LE")
+CANDIDATE_PERIOD_MS = (10, 20, 40)
+
+# What the recognizers consume; the bus is opened as close to this as the card allows
+RECOGNIZER_FORMAT = (1, 16000, "S16_LE")
+DEFAULT_PERIOD_MS = 21.3  # 1024 frames at 48 kHz, the bus's historical period
+
+# Lines of /proc/asound/cardN/pcmMc/info that identify the hardware
+STABLE_PCM_INFO = ('id', 'name', 'subname', 'subdevices_count')
+
+CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache"),
+                          "embedded-audio", "device_probe.json")
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _card_and_device(device):
+    """(card index, PCM device number) of an ALSA device string, or (None, None)"""
+    match = re.match(r'^(?:plug)?hw:(?:CARD=)?([^,]+)(?:,(?:DEV=)?(\d+))?', device)
+    if not match:
+        return None, None
+    card, pcm = match.group(1), int(match.group(2) or 0)
+    if not card.isdigit():
+        # Card ids are symlinks to cardN in /proc/asound
+        index = re.search(r'card(\d+)$', os.path.realpath(f'/proc/asound/{card}'))
+        return (int(index.group(1)) if index else None), pcm
+    return int(card), pcm
+
+
+def _stable_pcm_info(info):
+    """The lines of a PCM info file that describe the hardware (not e.g. subdevices_avail,
+    which changes whenever another client has the device open)"""
+    fields = dict(line.split(':', 1) for line in info.splitlines() if ':' in line)
+    return "\n".join(f"{key}: {fields[key].strip()}" for key in STABLE_PCM_INFO if key in fields)
+
+
+def card_identity(device):
+    """Stable key for the hardware behind a device string
+
+    Hashes the card's ALSA id, USB vendor:product id and the hardware lines
+    of its capture PCM info, so plugging a different microphone into the
+    same slot changes the key. Devices that aren't a card (e.g. "default")
+    are keyed by name alone.
+    """
+    card, pcm = _card_and_device(device)
+    parts = [device]
+    if card is not None:
+        base = f'/proc/asound/card{card}'
+        parts += [_read(f'{base}/id'), _read(f'{base}/usbid'),
+                  _stable_pcm_info(_read(f'{base}/pcm{pcm}c/info'))]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def _open_pcm(device, channels, rate, sample_format, periodsize):
+    import alsaaudio
+    return alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NONBLOCK, channels=channels, rate=rate,
+                         format=getattr(alsaaudio, SAMPLE_FORMATS[sample_format]),
+                         periodsize=periodsize, device=device)
+
+
+def _try_config(device, channels, rate, sample_format, periodsize, open_pcm):
+    """Granted period size if the device opened with exactly this format, else None"""
+    try:
+        pcm = open_pcm(device, channels, rate, sample_format, periodsize)
+    except Exception:
+        return None
+    try:
+        # ALSA may silently pick the nearest configuration; info() (pyalsaaudio >= 0.10)
+        # tells us what was actually set
+        info = pcm.info() if hasattr(pcm, 'info') else {}
+        if (info.get('channels', channels), info.get('rate', rate),
+                info.get('format_name', sample_format)) != (channels, rate, sample_format):
+            return None
+        return info.get('period_size', periodsize)
+    finally:
+        pcm.close()
+
+
+class DeviceCapabilities:
+    """Capture configurations a device accepted, with the period sizes it granted"""
+
+    def __init__(self, device, identity, configs, probed_at=None):
+        self.device = device
+        self.identity = identity
+        self.configs = configs  # [{'channels', 'rate', 'format', 'period_sizes'}]
+        self.probed_at = probed_at or time.time()
+
+    def supports(self, channels, rate, sample_format):
+        return any((config['channels'], config['rate'], config['format']) == (channels, rate, sample_format)
+                   for config in self.configs)
+
+    def best_format(self, channels=1, rate=16000, sample_format="S16_LE", period_ms=DEFAULT_PERIOD_MS):
+        """Cheapest native (channels, rate, sample_format, periodsize) for a consumer format
+
+        Preference order: no upsampling, no resampling at all, integer
+        decimation (48k -> 16k), no downmix, same sample format, then the
+        least data per second. Returns None if nothing was supported.
+        """
+        def cost(config):
+            return (config['rate'] < rate, config['rate'] != rate, config['rate'] % rate != 0,
+                    config['channels'] != channels, config['format'] != sample_format,
+                    config['channels'] * config['rate'] * sample_width(config['format']))
+
+        if not self.configs:
+            return None
+        best = min(self.configs, key=cost)
+        target = best['rate'] * period_ms / 1000
+        periodsize = min(best['period_sizes'], key=lambda size: abs(size - target))
+        return best['channels'], best['rate'], best['format'], periodsize
+
+    def to_dict(self):
+        return {'device': self.device, 'identity': self.identity, 'configs': self.configs,
+                'probed_at': self.probed_at}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['device'], data['identity'], data['configs'], data['probed_at'])
+
+
+def probe_device(device, open_pcm=None):
+    """Open the device in every candidate configuration and record what worked"""
+    open_pcm = open_pcm or _open_pcm
+    print(f"🔍 Probing capture formats of {device}...")
+    start = time.monotonic()
+    configs = []
+    for sample_format in CANDIDATE_FORMATS:
+        for rate in CANDIDATE_RATES:
+            for channels in CANDIDATE_CHANNELS:
+                granted = set()
+                for period_ms in CANDIDATE_PERIOD_MS:
+                    size = _try_config(device, channels, rate, sample_format, int(rate * period_ms / 1000),
+                                       open_pcm)
+                    if size is None:
+                        break  # The format itself was refused
+                    granted.add(size)
+                if granted:
+                    configs.append({'channels': channels, 'rate': rate, 'format': sample_format,
+                                    'period_sizes': sorted(granted)})
+    print(f"✅ {device}: {len(configs)} capture configuration(s) in {time.monotonic() - start:.2f}s")
+    return DeviceCapabilities(device, card_identity(device), configs)
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_capabilities(device, cache_path=CACHE_PATH, refresh=False, open_pcm=None):
+    """Capabilities from the on-disk cache, probing only for new (or changed) hardware"""
+    identity = card_identity(device)
+    cache = _load_cache(cache_path)
+    if not refresh and identity in cache:
+        return DeviceCapabilities.from_dict(cache[identity])
+
+    capabilities = probe_device(device, open_pcm)
+    if capabilities.configs:
+        # An empty result usually means the device was busy or absent; don't remember that
+        cache[identity] = capabilities.to_dict()
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump(cache, f, indent=1)
+        except OSError as e:
+            print(f"⚠️ Could not write device probe cache {cache_path}: {e}")
+    return capabilities
+
+
+def negotiate_format(device, channels=1, rate=16000, sample_format="S16_LE", cache_path=CACHE_PATH):
+    """AudioBus options for the cheapest native format, or {} to keep the bus defaults"""
+    try:
+        best = load_capabilities(device, cache_path).best_format(channels, rate, sample_format)
+    except Exception as e:
+        print(f"⚠️ Device probe failed for {device}: {e}")
+        return {}
+    if best is None:
+        print(f"⚠️ No probed capture format for {device}; using the defaults")
+        return {}
+    channels, rate, sample_format, periodsize = best
+    return {'channels': channels, 'rate': rate, 'sample_format': sample_format, 'periodsize': periodsize}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe (and cache) a capture device's native formats")
+    parser.add_argument('--device', default="hw:0,0")
+    parser.add_argument('--refresh', action='store_true', help="Probe again even if cached")
+    parser.add_argument('--cache', default=CACHE_PATH, help="Cache file")
+    args = parser.parse_args()
+
+    capabilities = load_capabilities(args.device, args.cache, refresh=args.refresh)
+    print(f"Device {args.device} (identity {capabilities.identity})")
+    print("=" * 40)
+    for config in capabilities.configs:
+        print(f"   {config['channels']}ch {config['rate']:>5}Hz {config['format']:<7} "
+              f"periods {config['period_sizes']}")
+    best = capabilities.best_format(*RECOGNIZER_FORMAT)
+    if best:
+        print(f"🎯 Recognizer capture format: {best[0]}ch {best[1]}Hz {best[2]}, {best[3]} frames per period")
+    else:
+        print("❌ No capture configuration worked - is the device busy or missing?")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
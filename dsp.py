@@ -0,0 +1,352 @@
+from fractions import Fraction
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def design_lowpass(num_taps, cutoff, beta=8.0):
+    """Kaiser-windowed sinc low-pass filter (cutoff as a fraction of Nyquist, unity DC gain)"""
+    n = np.arange(num_taps) - (num_taps - 1) / 2.0
+    taps = cutoff * np.sinc(cutoff * n) * np.kaiser(num_taps, beta)
+    return taps / taps.sum()
+
+
+# Above this many phases, gathering every output's window at once beats looping over phases
+GATHER_MIN_PHASES = 8
+
+
+class PolyphaseResampler:
+    """Streaming rational-ratio resampler with an anti-aliasing polyphase FIR
+
+    Filter history and the fractional output phase are carried across calls,
+    so feeding a stream period by period gives the same result as resampling
+    it in one go, whatever the period length.
+    """
+
+    def __init__(self, in_rate, out_rate, channels=1, taps_per_phase=64, rolloff=0.9, beta=8.0):
+        ratio = Fraction(int(out_rate), int(in_rate))
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.up = ratio.numerator
+        self.down = ratio.denominator
+        self.taps_per_phase = taps_per_phase
+
+        # Prototype filter at the upsampled rate, cut off below the lower of the two Nyquist rates
+        cutoff = rolloff / max(self.up, self.down)
+        prototype = design_lowpass(taps_per_phase * self.up, cutoff, beta) * self.up
+
+        # phases[p, k] = prototype[p + k * up], time-reversed so each phase can be
+        # dotted directly against a window of input samples ordered oldest first
+        self._phases = np.ascontiguousarray(
+            prototype.reshape(taps_per_phase, self.up).T[:, ::-1], dtype=np.float32)
+
+        self._history = taps_per_phase - 1
+        self._work = None
+        self._out = None
+        self._gather = None
+        self._pos = 0  # Next output position relative to the next input block, in 1/up input samples
+        self._ensure_capacity(4096)
+
+    def _shape(self, frames):
+        return (frames,) if self.channels == 1 else (frames, self.channels)
+
+    def _ensure_capacity(self, frames):
+        """Grow the work/output buffers (only happens when a larger block than ever before arrives)"""
+        needed = self._history + frames
+        if self._work is not None and len(self._work) >= needed:
+            return
+        work = np.zeros(self._shape(needed), dtype=np.float32)
+        if self._work is not None:
+            work[:self._history] = self._work[:self._history]
+        self._work = work
+        max_out = self.max_output_length(frames)
+        self._out = np.empty(self._shape(max_out), dtype=np.float32)
+
+        if self.up >= GATHER_MIN_PHASES:
+            steps = np.arange(max_out, dtype=np.int64) * self.down
+            self._gather = {
+                'steps': steps,
+                'pos': np.empty_like(steps),
+                'base': np.empty_like(steps),
+                'phase': np.empty_like(steps),
+                'windows': np.empty(self._shape(max_out) + (self.taps_per_phase,), dtype=np.float32),
+                'coeffs': np.empty((max_out, self.taps_per_phase), dtype=np.float32),
+            }
+
+    def max_output_length(self, frames):
+        """Upper bound on the number of output frames produced for `frames` input frames"""
+        return -(-frames * self.up // self.down) + 1
+
+    def output_length(self, frames):
+        """Exact number of output frames the next call to process() will produce"""
+        available = frames * self.up - self._pos
+        if available <= 0:
+            return 0
+        return -(-available // self.down)
+
+    def reset(self):
+        """Clear filter history (e.g. after a gap in the input stream)"""
+        self._work[:self._history] = 0
+        self._pos = 0
+
+    def process(self, samples, out=None):
+        """Resample one block of frames and return a float32 view of the output
+
+        `samples` may be any numeric dtype; it is converted to float32 without
+        rescaling. The result is written into `out` when given (which must hold
+        at least max_output_length(len(samples)) frames), otherwise into an
+        internal buffer that is reused by the next call.
+        """
+        frames = len(samples)
+        self._ensure_capacity(frames)
+        history = self._history
+
+        work = self._work[:history + frames]
+        work[history:] = samples
+
+        count = self.output_length(frames)
+        if out is None:
+            out = self._out
+        out = out[:count]
+
+        if count:
+            # windows[b] holds the taps_per_phase input frames ending at input frame b
+            windows = sliding_window_view(work, self.taps_per_phase, axis=0)
+            if self._gather is None:
+                self._process_by_phase(windows, out, count)
+            else:
+                self._process_by_gather(windows, out, count)
+
+        self._pos += count * self.down - frames * self.up
+
+        # Keep the last taps_per_phase - 1 inputs as history for the next block
+        self._work[:history] = work[frames:]
+        return out
+
+    def _process_by_phase(self, windows, out, count):
+        """One strided matmul per filter phase (cheap when there are few phases)"""
+        # Outputs n0, n0 + up, n0 + 2*up, ... share a filter phase and step `down` inputs apart
+        for n0 in range(min(self.up, count)):
+            base, phase = divmod(self._pos + n0 * self.down, self.up)
+            group = out[n0::self.up]
+            np.matmul(windows[base::self.down][:len(group)], self._phases[phase], out=group)
+
+    def _process_by_gather(self, windows, out, count):
+        """Gather every output's window and coefficients, then do one batched dot product"""
+        g = self._gather
+        pos = np.add(g['steps'][:count], self._pos, out=g['pos'][:count])
+        base, phase = np.divmod(pos, self.up, out=(g['base'][:count], g['phase'][:count]))
+        gathered = np.take(windows, base, axis=0, out=g['windows'][:count])
+        coeffs = np.take(self._phases, phase, axis=0, out=g['coeffs'][:count])
+        if self.channels == 1:
+            np.einsum('nt,nt->n', gathered, coeffs, out=out)
+        else:
+            np.einsum('nct,nt->nc', gathered, coeffs, out=out)
+
+
+# PCM sample formats: name -> (storage dtype, bytes per sample, full scale)
+PCM_FORMATS = {
+    "S16_LE": (np.dtype('<i2'), 2, float(1 << 15)),
+    "S24_LE": (np.dtype('<i4'), 4, float(1 << 23)),   # 24-bit samples in 32-bit containers
+    "S24_3LE": (np.dtype('<i4'), 3, float(1 << 31)),  # Packed; unpacked as value << 8
+    "S32_LE": (np.dtype('<i4'), 4, float(1 << 31)),
+    "FLOAT_LE": (np.dtype('<f4'), 4, 1.0),            # Normalized to [-1, 1]
+}
+
+
+def sample_width(sample_format):
+    """Bytes per sample on the wire"""
+    return PCM_FORMATS[sample_format][1]
+
+
+def accumulator_dtype(dtype):
+    """Float type that sums up to 256 channels of `dtype` exactly (no overflow, no truncation)"""
+    return np.dtype(np.float32) if np.dtype(dtype).itemsize <= 2 else np.dtype(np.float64)
+
+
+def _clip_range(sample_format):
+    """Representable range of a format after scaling by its full scale"""
+    dtype, width, _ = PCM_FORMATS[sample_format]
+    if sample_format in ("S24_LE", "S24_3LE"):
+        return -(1 << 23), (1 << 23) - 1
+    info = np.iinfo(dtype)
+    return info.min, info.max
+
+
+def unpack_s24(raw, out):
+    """Packed 3-byte samples -> int32 (sample << 8) written into out"""
+    count = len(raw) // 3
+    wide = out[:count].view(np.uint8).reshape(count, 4)
+    wide[:, 0] = 0
+    wide[:, 1:] = np.frombuffer(raw, dtype=np.uint8, count=count * 3).reshape(count, 3)
+    return out[:count]
+
+
+def pack_s24(samples, out):
+    """int32 (sample << 8) -> packed 3-byte samples written into out (uint8, 3 per sample)"""
+    count = samples.size
+    packed = out[:count * 3].reshape(count, 3)
+    packed[:] = samples.reshape(-1).view(np.uint8).reshape(count, 4)[:, 1:]
+    return out[:count * 3]
+
+
+# Mixed-type ufuncs (e.g. float32 += int16) cast through temporary buffers, so every
+# kernel below casts with np.copyto() first and then only does same-type arithmetic in place
+
+def downmix(frames, out=None, accumulator=None):
+    """Average (frames, channels) samples into one channel, summing in a wider type
+
+    Integer output is rounded to nearest. Pass `out` and `accumulator` (a
+    (2, frames) array of accumulator_dtype()) to avoid allocating.
+    """
+    count, channels = frames.shape
+    if out is None:
+        out = np.empty(count, dtype=frames.dtype)
+    if accumulator is None:
+        accumulator = np.empty((2, count), dtype=accumulator_dtype(frames.dtype))
+    out = out[:count]
+    acc = accumulator[0, :count]
+    column = accumulator[1, :count]
+
+    np.copyto(acc, frames[:, 0], casting='unsafe')
+    for channel in range(1, channels):
+        np.copyto(column, frames[:, channel], casting='unsafe')
+        np.add(acc, column, out=acc)
+    np.multiply(acc, acc.dtype.type(1.0 / channels), out=acc)
+    if out.dtype.kind != 'f':
+        np.rint(acc, out=acc)
+    np.copyto(out, acc, casting='unsafe')
+    return out
+
+
+def select_channel(frames, channel, out=None):
+    """Copy one channel of (frames, channels) samples"""
+    if out is None:
+        out = np.empty(len(frames), dtype=frames.dtype)
+    out = out[:len(frames)]
+    np.copyto(out, frames[:, channel], casting='unsafe')
+    return out
+
+
+def to_float(samples, sample_format, out=None):
+    """Storage samples -> float32 normalized to [-1, 1]"""
+    if out is None:
+        out = np.empty(samples.shape, dtype=np.float32)
+    out = out[:len(samples)]
+    np.copyto(out, samples, casting='unsafe')
+    full_scale = PCM_FORMATS[sample_format][2]
+    if full_scale != 1.0:
+        np.multiply(out, np.float32(1.0 / full_scale), out=out)
+    return out
+
+
+def from_float(samples, sample_format, out=None, scratch=None):
+    """float32 in [-1, 1] -> storage samples, rounded to nearest and clipped
+
+    `scratch` (accumulator_dtype() of the storage dtype) holds the scaled
+    values; float64 for 24/32-bit formats, since float32 can't represent
+    their full-scale values exactly.
+    """
+    dtype, _, full_scale = PCM_FORMATS[sample_format]
+    if out is None:
+        out = np.empty(samples.shape, dtype=dtype)
+    out = out[:len(samples)]
+    if dtype.kind == 'f':
+        np.copyto(out, samples, casting='same_kind')
+        return out
+    if scratch is None:
+        scratch = np.empty(samples.shape, dtype=accumulator_dtype(dtype))
+    scratch = scratch[:len(samples)]
+    wide = scratch.dtype.type
+    low, high = _clip_range(sample_format)
+    packed = sample_format == "S24_3LE"
+
+    np.copyto(scratch, samples, casting='same_kind')
+    # Packed 24-bit is rounded at 24 bits, then stored as value << 8 for pack_s24()
+    np.multiply(scratch, wide(float(1 << 23) if packed else full_scale), out=scratch)
+    np.rint(scratch, out=scratch)
+    np.maximum(scratch, wide(low), out=scratch)
+    np.minimum(scratch, wide(high), out=scratch)
+    if packed:
+        np.multiply(scratch, wide(256.0), out=scratch)
+    np.copyto(out, scratch, casting='unsafe')
+    return out
+
+
+class PcmConverter:
+    """Allocation-free interleaved PCM <-> float32 conversion
+
+    decode() turns raw device bytes into normalized float32, either keeping
+    every channel, averaging them (in a wider type) or picking one.
+    encode() turns float32 into any PCM format with rounding and clipping.
+    Buffers grow to the largest period seen and are then reused, so
+    steady-state calls allocate nothing; results are views into them that
+    stay valid until the next call.
+    """
+
+    def __init__(self, in_format="S16_LE", in_channels=1, out_format="FLOAT_LE", mono=False, channel=None):
+        for sample_format in (in_format, out_format):
+            if sample_format not in PCM_FORMATS:
+                raise ValueError(f"Unsupported sample format: {sample_format}")
+        self.in_format = in_format
+        self.in_channels = in_channels
+        self.out_format = out_format
+        self.mono = mono or channel is not None
+        self.channel = channel  # Take this channel instead of averaging when mono
+
+        self._capacity = 0
+        self._ensure_capacity(4096)
+
+    def _ensure_capacity(self, frames):
+        """Grow the buffers (only happens when a larger period than ever before arrives)"""
+        if frames <= self._capacity:
+            return
+        in_dtype = PCM_FORMATS[self.in_format][0]
+        out_dtype = PCM_FORMATS[self.out_format][0]
+        shape = (frames,) if self.mono else (frames, self.in_channels)
+
+        self._unpacked = np.empty(frames * self.in_channels, dtype=in_dtype)
+        self._accumulator = np.empty((2, frames), dtype=accumulator_dtype(in_dtype))
+        self._float = np.empty(shape, dtype=np.float32)
+        # Flat, so encode() can take (frames,) or (frames, channels) input
+        self._scratch = np.empty(frames * self.in_channels, dtype=accumulator_dtype(out_dtype))
+        self._encoded = np.empty(frames * self.in_channels, dtype=out_dtype)
+        self._packed = np.empty(frames * self.in_channels * 3, dtype=np.uint8)
+        self._capacity = frames
+
+    def decode(self, raw):
+        """Raw interleaved bytes -> float32, shaped (frames,) when mono else (frames, channels)"""
+        width = PCM_FORMATS[self.in_format][1]
+        frames = len(raw) // (width * self.in_channels)
+        self._ensure_capacity(frames)
+        count = frames * self.in_channels
+
+        if self.in_format == "S24_3LE":
+            samples = unpack_s24(memoryview(raw)[:count * 3], self._unpacked)
+        else:
+            samples = np.frombuffer(raw, dtype=PCM_FORMATS[self.in_format][0], count=count)
+        samples = samples.reshape(frames, self.in_channels)
+
+        if not self.mono:
+            return to_float(samples, self.in_format, out=self._float)
+        if self.channel is not None:
+            return to_float(samples[:, self.channel], self.in_format, out=self._float)
+        if self.in_channels == 1:
+            return to_float(samples[:, 0], self.in_format, out=self._float)
+
+        # Average in the wide accumulator, then normalize
+        acc = downmix(samples, out=self._accumulator[0], accumulator=self._accumulator)
+        out = self._float[:frames]
+        np.copyto(out, acc, casting='same_kind')
+        np.multiply(out, np.float32(1.0 / PCM_FORMATS[self.in_format][2]), out=out)
+        return out
+
+    def encode(self, samples):
+        """float32 -> samples in out_format (uint8 bytes for S24_3LE)"""
+        self._ensure_capacity(-(-samples.size // self.in_channels))
+        out = self._encoded[:samples.size].reshape(samples.shape)
+        scratch = self._scratch[:samples.size].reshape(samples.shape)
+        if self.out_format == "S24_3LE":
+            wide = from_float(samples, "S24_3LE", out=out, scratch=scratch)
+            return pack_s24(wide, self._packed)
+        return from_float(samples, self.out_format, out=out, scratch=scratch)
@@ -0,0 +1,132 @@
+import threading
+import collections
+
+# What to do with a new window when inference hasn't caught up with the queue
+DROP_OLDEST = "drop_oldest"        # Discard the oldest pending window
+SKIP_TO_LATEST = "skip_to_latest"  # Discard everything pending, keep only the new window
+COALESCE = "coalesce"              # Merge the new window into the newest pending one
+BLOCK = "block"                    # Make the producer wait (offline replay, never drops)
+
+POLICIES = (DROP_OLDEST, SKIP_TO_LATEST, COALESCE, BLOCK)
+
+
+class InferenceQueue:
+    """Bounded queue of audio windows waiting for inference
+
+    Windows are (start, length) spans of stream positions in a ring buffer,
+    so queueing never copies audio. When the queue is full the configured
+    policy decides what gets thrown away, and every outcome is counted.
+    """
+
+    def __init__(self, max_pending=2, policy=DROP_OLDEST, max_window=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown inference queue policy: {policy}")
+        self.max_pending = max_pending
+        self.policy = policy
+        self.max_window = max_window  # Longest span a coalesced window may cover
+
+        self.windows_queued = 0
+        self.windows_dropped = 0
+        self.windows_coalesced = 0
+        self.windows_processed = 0
+        self.in_flight = 0  # Windows taken by a worker and not yet marked done
+        self.closed = False
+
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, start, length):
+        """Queue a window, applying the drop policy if the queue is full"""
+        with self._cond:
+            if self.closed:
+                return
+            self.windows_queued += 1
+
+            if self.policy == BLOCK:
+                while len(self._pending) >= self.max_pending and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    return
+
+            if len(self._pending) >= self.max_pending:
+                if self.policy == COALESCE and self._coalesce(start, length):
+                    self._cond.notify_all()
+                    return
+                if self.policy == SKIP_TO_LATEST:
+                    self.windows_dropped += len(self._pending)
+                    self._pending.clear()
+                else:
+                    self._pending.popleft()
+                    self.windows_dropped += 1
+
+            self._pending.append((start, length))
+            self._cond.notify_all()
+
+    def _coalesce(self, start, length):
+        """Extend the newest pending window to also cover the new one, if it fits"""
+        last_start, last_length = self._pending[-1]
+        merged_start = min(last_start, start)
+        merged_end = max(last_start + last_length, start + length)
+        if self.max_window and merged_end - merged_start > self.max_window:
+            return False
+        self._pending[-1] = (merged_start, merged_end - merged_start)
+        self.windows_coalesced += 1
+        return True
+
+    def get(self, timeout=None):
+        """Return the next (start, length) window, or None on timeout/close"""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return None
+            self.in_flight += 1
+            self._cond.notify_all()
+            return self._pending.popleft()
+
+    def mark_processed(self):
+        """Record that a worker finished a window"""
+        with self._cond:
+            self.windows_processed += 1
+            self.in_flight -= 1
+
+    def mark_dropped(self):
+        """Record that a worker had to give up on a window (e.g. audio overwritten)"""
+        with self._cond:
+            self.windows_dropped += 1
+            self.in_flight -= 1
+
+    def is_idle(self):
+        """True when nothing is pending and no worker is busy with a window"""
+        with self._cond:
+            return not self._pending and self.in_flight == 0
+
+    def pending(self):
+        """Number of windows waiting for a worker"""
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """Wake every waiting worker and stop accepting windows"""
+        with self._cond:
+            self.closed = True
+            self.windows_dropped += len(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def reopen(self):
+        """Accept windows again after close()"""
+        with self._cond:
+            self.closed = False
+
+    def stats(self):
+        """Counters for queued, dropped, coalesced and processed windows"""
+        with self._cond:
+            return {
+                'queued': self.windows_queued,
+                'dropped': self.windows_dropped,
+                'coalesced': self.windows_coalesced,
+                'processed': self.windows_processed,
+                'pending': len(self._pending),
+                'in_flight': self.in_flight,
+            }
@@ -1,7 +1,25 @@
+import argparse
+import memory
 import voice_assistant_controller
 
 def main():
-    controller = voice_assistant_controller.VoiceAssistantController()
+    parser = argparse.ArgumentParser(description="Voice assistant")
+    parser.add_argument('--backend', choices=voice_assistant_controller.BACKENDS, default="vosk",
+                        help="Wake word engine (only this one is imported)")
+    parser.add_argument('--model', help="Model path or Whisper model size")
+    parser.add_argument('--verifier-model', help="Whisper model size verifying Vosk candidates (cascade backend)")
+    parser.add_argument('--device', help="ALSA capture device (default hw:0,0; its native format is probed once)")
+    parser.add_argument('--profile', choices=sorted(memory.PROFILES), default="default",
+                        help="Deployment preset (low-memory: small models, capped buffers, 300 MB budget)")
+    parser.add_argument('--memory-budget', type=int, help="Memory budget in MB (overrides the profile's)")
+    args = parser.parse_args()
+    
+    try:
+        controller = voice_assistant_controller.VoiceAssistantController(
+            backend=args.backend, model_path=args.model, verifier_model=args.verifier_model,
+            profile=args.profile, memory_budget_mb=args.memory_budget, device=args.device)
+    except memory.MemoryBudgetError as e:
+        parser.exit(1, f"❌ {e}\n")
     controller.listen()
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Memory accounting for the voice assistant
+
+Components that hold audio or models report what they keep resident through
+memory_footprint(), a dict of {part: bytes}; snapshot() combines those with
+the process RSS (and the top tracemalloc allocations when tracing) so a
+Pi deployment can see where its memory goes. PROFILES holds deployment
+presets; the low-memory one picks the small models, caps every buffer and
+sets a budget that check_budget() enforces before anything is loaded.
+
+Snapshot command (builds a detector, optionally listens, prints the report):
+    python memory.py --backend vosk --profile low-memory
+    python memory.py --backend whisper --model tiny --listen 10 --trace 15
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+
+MB = 1024 * 1024
+
+# Approximate resident size of int8 faster-whisper models by size name (weights plus
+# runtime buffers); model directories are sized from their files instead
+WHISPER_INT8_MB = {'tiny': 45, 'base': 85, 'small': 270, 'medium': 800, 'large': 1600}
+
+# Deployment presets: per-backend detector options, other component options and
+# the memory budget (MB) checked before the models load
+PROFILES = {
+    'default': {},
+    'low-memory': {
+        'memory_budget_mb': 300,
+        'detector': {
+            # setup_vosk.py provisions the small English model at vosk-model
+            'vosk': {'model_path': "vosk-model", 'lookback_seconds': 4.0, 'startup_buffer_seconds': 3.0},
+            'whisper': {'model_path': "tiny", 'lookback_seconds': 4.0, 'startup_buffer_seconds': 3.0,
+                        'max_pending_windows': 1, 'max_segment_seconds': 3.0, 'overlap_seconds': 0.5},
+            'cascade': {'model_path': "vosk-model", 'verifier_model': "tiny", 'lookback_seconds': 4.0,
+                        'startup_buffer_seconds': 3.0, 'max_pending_candidates': 1},
+        },
+        'registry': {'max_idle_models': 0},
+        'playback': {'cache_size': 4, 'max_cached_seconds': 2.0},
+        'recording': {'max_pending_blocks': 2},
+    },
+}
+
+
+class MemoryBudgetError(RuntimeError):
+    """The configured models and buffers cannot fit in the memory budget"""
+
+
+def _proc_kb(path, field):
+    """A 'Field: N kB' value from a /proc file, in bytes (0 where unavailable)"""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def rss_bytes(pid="self"):
+    """Resident set size of a process (0 where /proc isn't available)"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def peak_rss_bytes():
+    """Highest resident set size this process has reached"""
+    return _proc_kb('/proc/self/status', 'VmHWM')
+
+
+def available_bytes():
+    """Memory the kernel could hand out without swapping (None where unknown)"""
+    return _proc_kb('/proc/meminfo', 'MemAvailable') or None
+
+
+def footprint(component):
+    """A component's {part: bytes}, or {} if it doesn't report one"""
+    report = getattr(component, 'memory_footprint', None)
+    return report() if report else {}
+
+
+def snapshot(components=None, top=10):
+    """Process RSS, each component's footprint and (if tracing) the top Python allocations"""
+    snap = {
+        'rss': rss_bytes(),
+        'peak_rss': peak_rss_bytes(),
+        'available': available_bytes(),
+        'components': {name: footprint(component) for name, component in (components or {}).items()},
+        'allocations': [],
+    }
+    if tracemalloc.is_tracing():
+        stats = tracemalloc.take_snapshot().statistics('lineno')
+        snap['allocations'] = [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size)
+                               for stat in stats[:top]]
+    return snap
+
+
+def format_snapshot(snap, budget_mb=None):
+    """Readable multi-line version of snapshot()"""
+    lines = [f"RSS {snap['rss'] / MB:.1f} MB (peak {snap['peak_rss'] / MB:.1f} MB)"
+             + (f" of a {budget_mb} MB budget" if budget_mb else "")
+             + (f", {snap['available'] / MB:.0f} MB available" if snap['available'] else "")]
+    for name, parts in snap['components'].items():
+        if not parts:
+            continue
+        total = sum(parts.values())
+        detail = ", ".join(f"{part} {size / MB:.2f}" for part, size in parts.items())
+        lines.append(f"   {name}: {total / MB:.2f} MB ({detail})")
+    if snap['allocations']:
+        lines.append("   top Python allocations:")
+        for where, size in snap['allocations']:
+            lines.append(f"      {size / 1024:8.1f} KB  {where}")
+    return "\n".join(lines)
+
+
+def profile_options(profile, section, backend=None):
+    """Options a profile sets for one section (and backend, for 'detector')"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown memory profile: {profile}")
+    options = PROFILES[profile].get(section, {})
+    return dict(options.get(backend, {}) if backend else options)
+
+
+def _directory_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def estimate_model_bytes(engine, path):
+    """Expected resident size of a model, or None if it can't be told before loading
+
+    Vosk and converted Whisper models load roughly their files' size; Whisper
+    size names ("tiny", "base.en", "large-v3") use WHISPER_INT8_MB.
+    """
+    if path and os.path.isdir(path):
+        return _directory_bytes(path)
+    if engine == "whisper" and path:
+        size = re.match(r'(?:distil-)?([a-z]+)', os.path.basename(path))
+        if size and size.group(1) in WHISPER_INT8_MB:
+            return WHISPER_INT8_MB[size.group(1)] * MB
+    return None
+
+
+def check_budget(budget_mb, models):
+    """Raise MemoryBudgetError unless the process plus models fit in the budget
+
+    `models` is a list of (engine, path). Run it before loading anything:
+    the current RSS plus every model's estimate must fit in budget_mb and
+    in the memory the system has available.
+    """
+    planned = {'process': rss_bytes()}
+    for engine, path in models:
+        size = estimate_model_bytes(engine, path)
+        if size is None:
+            print(f"⚠️ Can't estimate the {engine} model '{path}'; leaving it out of the budget check")
+            continue
+        planned[f"{engine} model '{path}'"] = size
+    total = sum(planned.values())
+    detail = ", ".join(f"{name} {size / MB:.0f} MB" for name, size in planned.items())
+
+    if budget_mb and total > budget_mb * MB:
+        raise MemoryBudgetError(f"Needs ~{total / MB:.0f} MB but the memory budget is {budget_mb} MB "
+                                f"({detail}); use smaller models or raise the budget")
+    available = available_bytes()
+    if available is not None and total - planned['process'] > available:
+        raise MemoryBudgetError(f"Models need ~{(total - planned['process']) / MB:.0f} MB but only "
+                                f"{available / MB:.0f} MB is available ({detail})")
+    print(f"✅ Memory plan: ~{total / MB:.0f} MB" + (f" of {budget_mb} MB" if budget_mb else "") + f" ({detail})")
+    return planned
+
+
+def planned_models(backend, options):
+    """(engine, path) of every model a detector built with these options will load"""
+    if backend == "vosk":
+        return [("vosk", options.get('model_path', "vosk-model"))]
+    if backend == "whisper":
+        return [("whisper", options.get('model_path', "base"))]
+    if backend == "cascade":
+        return [("vosk", options.get('model_path', "vosk-model")),
+                ("whisper", options.get('verifier_model', "base"))]
+    raise ValueError(f"Unknown wake word backend: {backend}")
+
+
+def main():
+    import voice_assistant_controller
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Memory snapshot of a wake word detector")
+    parser.add_argument('--backend', choices=voice_assistant_controller.BACKENDS, default="vosk")
+    parser.add_argument('--model', help="Model path or Whisper model size")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default="default")
+    parser.add_argument('--memory-budget', type=int, help="Budget in MB (overrides the profile's)")
+    parser.add_argument('--listen', type=float, default=0.0, help="Seconds to listen before the snapshot")
+    parser.add_argument('--trace', type=int, default=0, metavar='N',
+                        help="Track Python allocations and list the top N")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracemalloc.start()
+    options = profile_options(args.profile, 'detector', args.backend)
+    if args.model:
+        options['model_path'] = args.model
+    budget_mb = args.memory_budget or PROFILES[args.profile].get('memory_budget_mb')
+    try:
+        check_budget(budget_mb, planned_models(args.backend, options))
+    except MemoryBudgetError as e:
+        print(f"❌ {e}")
+        return 1
+
+    registry = ModelRegistry(memory_budget_mb=budget_mb, **profile_options(args.profile, 'registry'))
+    detector = voice_assistant_controller.create_detector(args.backend, model_registry=registry, **options)
+    recorder = voice_assistant_controller.create_recorder(args.profile, audio_bus=detector.audio_bus)
+    player = voice_assistant_controller.create_player(args.profile)
+    if args.listen:
+        detector.start_listening()
+        time.sleep(args.listen)
+        detector.stop_listening()
+
+    print("Memory Snapshot")
+    print("=" * 40)
+    components = {'detector': detector, 'models': registry, 'recorder': recorder, 'player': player}
+    print(format_snapshot(snapshot(components, top=args.trace), budget_mb))
+    print(f"   caps: recorder {recorder.max_pending_blocks} pending blocks of {recorder.block_bytes / 1024:.0f} KB, "
+          f"player {player.cache_size} clips of up to {player.max_cached_seconds:g}s")
+    player.close()
+    detector.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
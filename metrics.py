@@ -0,0 +1,117 @@
+import time
+from bisect import bisect_left
+
+# Upper bucket edges in nanoseconds (1 µs ... 5 s, roughly 1-2-5 spaced)
+BUCKET_EDGES_NS = tuple(
+    int(mantissa * 10 ** exponent) * 1000
+    for exponent in range(0, 7)
+    for mantissa in (1, 2, 5)
+)
+
+# Cheapest monotonic clock with nanosecond resolution; call it around a stage
+# and pass the difference to Histogram.record()
+now_ns = time.perf_counter_ns
+
+
+class Histogram:
+    """Fixed-bucket latency histogram - O(log buckets) record, no allocation"""
+
+    __slots__ = ('buckets', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_EDGES_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        """Add one measurement"""
+        self.buckets[bisect_left(BUCKET_EDGES_NS, elapsed_ns)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile(self, q):
+        """Upper edge (ns) of the bucket containing the q-th percentile"""
+        if self.count == 0:
+            return 0
+        target = self.count * q / 100.0
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                if i < len(BUCKET_EDGES_NS):
+                    return min(BUCKET_EDGES_NS[i], self.max_ns)
+                return self.max_ns
+        return self.max_ns
+
+    def summary(self):
+        """Count plus mean/p50/p95/max in microseconds"""
+        mean_us = self.total_ns / self.count / 1000 if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean_us': round(mean_us, 1),
+            'p50_us': self.percentile(50) / 1000,
+            'p95_us': self.percentile(95) / 1000,
+            'max_us': self.max_ns / 1000,
+        }
+
+
+class Metrics:
+    """Per-stage latency histograms plus named counters
+
+    Meant to stay on in production: hot paths look a histogram up once
+    (stage()) and then only pay for two clock reads and a bucket increment.
+    Updates are not locked; under the GIL a rare lost increment is the worst
+    case, which is fine for monitoring.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    def stage(self, name):
+        """Return the histogram for a stage, creating it on first use"""
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram()
+        return histogram
+
+    def record(self, name, elapsed_ns):
+        """Record one timing for a stage"""
+        self.stage(name).record(elapsed_ns)
+
+    def count(self, name, amount=1):
+        """Increment a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stats(self):
+        """Snapshot of every stage summary and counter"""
+        return {
+            'stages': {name: histogram.summary() for name, histogram in list(self.stages.items())},
+            'counters': dict(self.counters),
+        }
+
+
+def merge_stats(*snapshots):
+    """Combine stats() snapshots from the pipeline stages into one, in pipeline order"""
+    merged = {'stages': {}, 'counters': {}}
+    for snapshot in snapshots:
+        if snapshot:
+            merged['stages'].update(snapshot.get('stages', {}))
+            merged['counters'].update(snapshot.get('counters', {}))
+    return merged
+
+
+def format_stats(stats, indent="   "):
+    """Render a stats() snapshot as readable lines"""
+    lines = []
+    for name, summary in stats.get('stages', {}).items():
+        lines.append(f"{indent}{name:<12} n={summary['count']:<8} mean {summary['mean_us']:>9.1f} µs  "
+                     f"p50 {summary['p50_us']:>9.1f} µs  p95 {summary['p95_us']:>9.1f} µs  "
+                     f"max {summary['max_us']:>10.1f} µs")
+    counters = stats.get('counters', {})
+    if counters:
+        lines.append(indent + ", ".join(f"{name}={value}" for name, value in counters.items()))
+    return "\n".join(lines)
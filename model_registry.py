@@ -0,0 +1,222 @@
+import time
+import threading
+import collections
+from concurrent.futures import Future
+import numpy as np
+from memory import rss_bytes
+
+
+def _load_vosk(path, compute_type, threads, **options):
+    import vosk
+    return vosk.Model(path)
+
+
+def _load_whisper(path, compute_type, threads, **options):
+    from faster_whisper import WhisperModel
+    return WhisperModel(path, device=options.pop('device', "cpu"), compute_type=compute_type or "int8",
+                        cpu_threads=threads or 0, **options)
+
+
+def _warm_up_vosk(model):
+    """Decode half a second of silence so first-use allocations happen now"""
+    import vosk
+    recognizer = vosk.KaldiRecognizer(model, 16000)
+    recognizer.AcceptWaveform(bytes(16000))
+    recognizer.FinalResult()
+
+
+def _warm_up_whisper(model):
+    """Run one short transcription so the first real window isn't the cold one"""
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en",
+                                   beam_size=1, best_of=1, temperature=0.0)
+    list(segments)
+
+
+# engine -> (loader, warm-up)
+ENGINES = {
+    'vosk': (_load_vosk, _warm_up_vosk),
+    'whisper': (_load_whisper, _warm_up_whisper),
+}
+
+
+class _Entry:
+    """One loaded model and its bookkeeping"""
+
+    def __init__(self, key, model, size_bytes, load_seconds):
+        self.key = key
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.refcount = 0
+        self.warm = threading.Event()
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded recognizer models
+
+    Models are keyed by (engine, path, compute type, threads, options) and
+    loaded once; every detector asking for the same key gets the same
+    object. Released models stay cached while unreferenced (for quick
+    restarts) until they fall out of the idle LRU or the memory budget.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_idle_models=1, memory_budget_mb=None):
+        self.max_idle_models = max_idle_models  # Unreferenced models kept loaded
+        self.memory_budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+
+        self.loads = 0
+        self.hits = 0
+        self.unloads = 0
+
+        self._entries = collections.OrderedDict()  # key -> _Entry, least recently used first
+        self._by_id = {}  # id(model) -> _Entry
+        self._loading = {}  # key -> Future of the load in progress; other acquirers wait on it
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shared(cls):
+        """Return the registry used by every detector in this process"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def acquire(self, engine, path, compute_type=None, threads=None, warm_up=True, **options):
+        """Return the model for this key, loading it on first use
+
+        Each acquire() must be paired with a release(). With warm_up, a
+        throwaway inference runs in the background after the first load;
+        wait_warm() blocks until it has finished. Loads run outside the
+        registry lock, so different models load in parallel; acquirers of a
+        key that is still loading wait for that load (and get its error).
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown model engine: {engine}")
+        key = (engine, path, compute_type, threads, tuple(sorted(options.items())))
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    entry.refcount += 1
+                    return entry.model
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = Future()
+                    break
+            pending.result()  # Raises if that load failed; otherwise take its entry
+
+        try:
+            entry = self._load(key, options)
+        except Exception as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = entry
+            self._by_id[id(entry.model)] = entry
+            self.loads += 1
+            entry.refcount += 1
+            del self._loading[key]
+            self._evict()  # A new load may push idle models over the budget
+        pending.set_result(entry)
+        if warm_up:
+            threading.Thread(target=self._warm_up, args=(entry,), daemon=True,
+                             name=f"warm-up-{engine}").start()
+        else:
+            entry.warm.set()
+        return entry.model
+
+    def _load(self, key, options):
+        """Load a model (without the lock; loads of other keys may overlap, so the RSS
+        growth attributed to each is approximate)"""
+        engine, path, compute_type, threads, _ = key
+        loader = ENGINES[engine][0]
+        print(f"🔧 Loading {engine} model: {path}")
+        rss_before = rss_bytes()
+        start = time.monotonic()
+        model = loader(path, compute_type, threads, **options)
+        entry = _Entry(key, model, max(rss_bytes() - rss_before, 0), time.monotonic() - start)
+        print(f"✅ {engine} model loaded in {entry.load_seconds:.1f}s "
+              f"(~{entry.size_bytes / 1024 / 1024:.0f} MB)")
+        return entry
+
+    def _warm_up(self, entry):
+        """Background warm-up inference; failures only cost the cold start"""
+        try:
+            start = time.monotonic()
+            ENGINES[entry.key[0]][1](entry.model)
+            print(f"🔥 {entry.key[0]} model warmed up in {time.monotonic() - start:.2f}s")
+        except Exception as e:
+            print(f"⚠️ Model warm-up failed: {e}")
+        finally:
+            entry.warm.set()
+
+    def wait_warm(self, model, timeout=None):
+        """Block until the model's warm-up inference has finished"""
+        entry = self._by_id.get(id(model))
+        return entry.warm.wait(timeout) if entry else True
+
+    def release(self, model):
+        """Drop one reference; unreferenced models become eligible for unloading"""
+        with self._lock:
+            entry = self._by_id.get(id(model))
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            self._evict()
+
+    def _evict(self):
+        """Unload idle models, least recently used first, past the idle count or memory budget"""
+        idle = [entry for entry in self._entries.values() if entry.refcount == 0]
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        while idle and (len(idle) > self.max_idle_models or
+                        (self.memory_budget is not None and total > self.memory_budget)):
+            entry = idle.pop(0)
+            total -= entry.size_bytes
+            self._unload(entry)
+
+    def _unload(self, entry):
+        """Forget a model so it can be garbage collected"""
+        del self._entries[entry.key]
+        del self._by_id[id(entry.model)]
+        self.unloads += 1
+        print(f"🗑️ Unloaded {entry.key[0]} model: {entry.key[1]}")
+
+    def clear(self):
+        """Unload every unreferenced model"""
+        with self._lock:
+            for entry in [entry for entry in self._entries.values() if entry.refcount == 0]:
+                self._unload(entry)
+
+    def memory_footprint(self):
+        """Resident size of each loaded model (the RSS growth measured while loading it)"""
+        with self._lock:
+            return {f"{entry.key[0]}:{entry.key[1]}": entry.size_bytes for entry in self._entries.values()}
+
+    def stats(self):
+        """Counters plus one line per loaded model"""
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'hits': self.hits,
+                'unloads': self.unloads,
+                'models': [
+                    {
+                        'engine': entry.key[0],
+                        'path': entry.key[1],
+                        'refcount': entry.refcount,
+                        'size_mb': round(entry.size_bytes / 1024 / 1024, 1),
+                        'load_seconds': round(entry.load_seconds, 2),
+                        'warm': entry.warm.is_set(),
+                    }
+                    for entry in self._entries.values()
+                ],
+            }
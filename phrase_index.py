@@ -0,0 +1,165 @@
+import re
+import collections
+
+# A matched phrase: token span [start, end) in the searched text, score in (0, 1]
+PhraseMatch = collections.namedtuple('PhraseMatch', 'phrase start end score exact')
+
+_SOUNDEX = {letter: digit for digit, letters in
+            {'1': 'bfpv', '2': 'cgjkqsxz', '3': 'dt', '4': 'l', '5': 'mn', '6': 'r'}.items()
+            for letter in letters}
+
+
+def normalize(text):
+    """Lowercase word tokens with punctuation stripped (apostrophes kept)"""
+    return [token for token in (re.sub(r"[^\w']", "", word) for word in text.lower().split()) if token]
+
+
+def phonetic_key(token):
+    """Soundex code of a token ("hey" and "hay" -> h000, "furby" and "ferby" -> f610)"""
+    letters = [c for c in token if c.isalpha()]
+    if not letters:
+        return token
+    key = [letters[0]]
+    last = _SOUNDEX.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX.get(letter, '')
+        if digit and digit != last:
+            key.append(digit)
+        if letter not in 'hw':
+            last = digit
+    return (''.join(key) + '000')[:4]
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it is known to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class _TokenAutomaton:
+    """Aho-Corasick automaton over token sequences
+
+    Tokens are interned to ints; each state maps token ids to the next
+    state, and outputs follow dictionary-suffix links, so a scan costs one
+    dict lookup per token plus one step per match, whatever the number of
+    phrases.
+    """
+
+    def __init__(self, sequences):
+        self.vocabulary = {}
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]  # Sequence ids ending exactly at each state
+        self.lengths = []
+
+        for sequence_id, sequence in enumerate(sequences):
+            state = 0
+            for token in sequence:
+                token_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                next_state = self.goto[state].get(token_id)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][token_id] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append(sequence_id)
+            self.lengths.append(len(sequence))
+
+        # Breadth-first: failure links, then fold each state's suffix outputs into it
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token_id, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and token_id not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token_id, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+                queue.append(child)
+
+    def scan(self, tokens):
+        """Yield (sequence id, start, end) for every occurrence in tokens"""
+        state = 0
+        for position, token in enumerate(tokens):
+            token_id = self.vocabulary.get(token)
+            if token_id is None:
+                state = 0
+                continue
+            while state and token_id not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token_id, 0)
+            for sequence_id in self.outputs[state]:
+                yield sequence_id, position + 1 - self.lengths[sequence_id], position + 1
+
+
+class PhraseIndex:
+    """Compiled matcher for wake words and command phrases
+
+    Built once per phrase list. Phrases are found as whole normalized
+    tokens by an Aho-Corasick automaton (exact, score 1.0); with fuzzy
+    matching a second automaton over per-token Soundex codes nominates
+    near-misses ("hey ferby", "hay furby"), which are kept if their
+    spelling is within max_edit_ratio edits of the phrase and scored by
+    that distance.
+    """
+
+    def __init__(self, phrases, fuzzy=True, max_edit_ratio=0.25, min_score=0.0):
+        self.phrases = []
+        sequences = []
+        seen = set()
+        for phrase in phrases:
+            tokens = normalize(phrase)
+            key = ' '.join(tokens)
+            if tokens and key not in seen:
+                seen.add(key)
+                self.phrases.append(key)
+                sequences.append(tokens)
+        self.fuzzy = fuzzy
+        self.max_edit_ratio = max_edit_ratio
+        self.min_score = min_score
+
+        self._exact = _TokenAutomaton(sequences)
+        self._phonetic = _TokenAutomaton([[phonetic_key(t) for t in tokens] for tokens in sequences]) \
+            if fuzzy else None
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def search(self, text):
+        """Every phrase occurrence in text (a string or a token list), ordered by position"""
+        tokens = normalize(text) if isinstance(text, str) else text
+        matches = {}
+        for phrase_id, start, end in self._exact.scan(tokens):
+            matches[(phrase_id, start)] = PhraseMatch(self.phrases[phrase_id], start, end, 1.0, True)
+
+        if self._phonetic:
+            keys = [phonetic_key(token) for token in tokens]
+            for phrase_id, start, end in self._phonetic.scan(keys):
+                if (phrase_id, start) in matches:
+                    continue
+                phrase = self.phrases[phrase_id]
+                limit = max(1, int(len(phrase) * self.max_edit_ratio))
+                distance = edit_distance(' '.join(tokens[start:end]), phrase, limit)
+                score = 1.0 - distance / len(phrase)
+                if distance <= limit and score >= self.min_score:
+                    matches[(phrase_id, start)] = PhraseMatch(phrase, start, end, score, False)
+
+        return sorted(matches.values(), key=lambda match: (match.start, -match.score))
+
+    def best(self, text):
+        """Highest-scoring match in text (the longer, then later, one on ties), or None"""
+        matches = self.search(text)
+        if not matches:
+            return None
+        return max(matches, key=lambda match: (match.score, match.end - match.start, match.end))
@@ -1,35 +1,303 @@
+import os
 import wave
-import alsaaudio
+import queue
+import threading
+import collections
+from concurrent.futures import Future
+import numpy as np
+from dsp import PcmConverter, PolyphaseResampler, sample_width
+from metrics import Metrics, now_ns
+
+# WAV sample width (bytes) -> PCM sample format
+WAV_FORMATS = {2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+
+
+def open_alsa_playback(manager, channels, rate, sample_format):
+    """Open the manager's ALSA device for blocking playback in the given format"""
+    import alsaaudio
+    from audio_bus import SAMPLE_FORMATS
+    return alsaaudio.PCM(alsaaudio.PCM_PLAYBACK, alsaaudio.PCM_NORMAL,
+                         channels=channels, rate=rate,
+                         format=getattr(alsaaudio, SAMPLE_FORMATS[sample_format]),
+                         periodsize=manager.periodsize, device=manager.device)
+
+
+class Clip:
+    """Interleaved PCM bytes plus their format, ready to be written to a device"""
+
+    def __init__(self, data, channels, rate, sample_format):
+        self.data = data
+        self.channels = channels
+        self.rate = rate
+        self.sample_format = sample_format
+        self.frame_bytes = channels * sample_width(sample_format)
+
+    @property
+    def frames(self):
+        return len(self.data) // self.frame_bytes
+
+    @property
+    def duration(self):
+        return self.frames / self.rate
+
+    @property
+    def format(self):
+        """(channels, rate, sample_format), the device configuration this clip needs"""
+        return self.channels, self.rate, self.sample_format
+
+
+class FormatConverter:
+    """Streaming conversion of PCM chunks to another channel count, rate and sample format"""
+
+    def __init__(self, in_format, out_format):
+        in_channels, in_rate, in_sample_format = in_format
+        out_channels, out_rate, out_sample_format = out_format
+        if out_channels not in (1, in_channels) and in_channels != 1:
+            raise ValueError(f"Cannot play {in_channels} channels on a {out_channels}-channel device")
+        self.out_channels = out_channels
+        self._decoder = PcmConverter(in_sample_format, in_channels, mono=1 in (in_channels, out_channels))
+        self._resampler = PolyphaseResampler(in_rate, out_rate, channels=min(in_channels, out_channels)) \
+            if in_rate != out_rate else None
+        self._encoder = PcmConverter("FLOAT_LE", out_channels, out_sample_format)
+
+    def convert(self, data):
+        samples = self._decoder.decode(data)
+        if self._resampler:
+            samples = self._resampler.process(samples)
+        if samples.ndim == 1 and self.out_channels > 1:
+            # Mono source on a multichannel device: same signal on every channel
+            samples = np.repeat(samples[:, None], self.out_channels, axis=1)
+        return self._encoder.encode(samples).tobytes()
+
 
 class PlaybackManager:
-    """Audio playback manager using ALSA"""
+    """Audio playback manager using ALSA
 
-    def __init__(self):
-        self.device = "hw:0,0"
+    The device is opened once and kept open; clips are written from a queue
+    by a dedicated thread, so play() returns immediately with a Future that
+    completes when the clip has been handed to the device (True) or was
+    stopped early (False). The device format follows each clip (reopening
+    only when it changes) unless a fixed output format is given, in which
+    case clips are converted to it. Short clips are decoded once and kept in
+    an LRU cache, so earcons start within one period.
+    """
+
+    def __init__(self, device="hw:0,0", periodsize=1024, channels=None, rate=None, sample_format=None,
+                 cache_size=16, max_cached_seconds=5.0, pcm_factory=None):
+        self.device = device
+        self.periodsize = periodsize  # Frames per write (1024 at 48 kHz = one write per ~21 ms)
+
+        # Fixed output format; None means "whatever the clip is"
+        self.output_channels = channels
+        self.output_rate = rate
+        self.output_sample_format = sample_format
+
+        # Decoded clips by (path, mtime), most recently used last
+        self.cache_size = cache_size
+        self.max_cached_seconds = max_cached_seconds
+        self._cache = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.pcm_factory = pcm_factory or open_alsa_playback
+        self._pcm = None
+        self._pcm_format = None
+
+        self._queue = queue.Queue()
+        self._interrupt = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        self.metrics = Metrics()
+        self._write_timer = self.metrics.stage('write')
+        self._start_timer = self.metrics.stage('start')  # play() -> first period written
+
+    def _output_format(self, clip_format):
+        """Device format for a clip: the fixed output format where set, else the clip's own"""
+        channels, rate, sample_format = clip_format
+        return (self.output_channels or channels, self.output_rate or rate,
+                self.output_sample_format or sample_format)
+
+    def load(self, filepath):
+        """Decoded clip for a WAV file, from the cache if possible (None if too long to cache)"""
+        key = (os.path.abspath(filepath), os.path.getmtime(filepath))
+        with self._cache_lock:
+            clip = self._cache.get(key)
+            if clip:
+                self._cache.move_to_end(key)
+                self.metrics.count('cache_hits')
+                return clip
+        self.metrics.count('cache_misses')
 
-    def play_file(self, filepath):
-        """Play back audio from a wav file"""
-        # Open the wave file for reading
         with wave.open(filepath, 'rb') as file:
-            # Get file parameters
-            channels = file.getnchannels()
-            sample_width = file.getsampwidth()
-            framerate = file.getframerate()
-            frames = file.getnframes()
-            
-            # Open the device for playback in blocking mode
-            out = alsaaudio.PCM(alsaaudio.PCM_PLAYBACK, alsaaudio.PCM_NORMAL,
-                               channels=channels, rate=framerate, format=alsaaudio.PCM_FORMAT_S32_LE,
-                               periodsize=160, device=self.device)
-            
-            # Read and play the file
-            while True:
-                data = file.readframes(160)
-                if not data:
-                    break
-                
-                # Write data to the device (blocking mode handles timing automatically)
-                out.write(data)
-            
-            # Close the device (automatically waits for completion in blocking mode)
-            out.close()
+            clip_format = self._wav_format(file)
+            if file.getnframes() / file.getframerate() > self.max_cached_seconds:
+                return None
+            data = file.readframes(file.getnframes())
+
+        output_format = self._output_format(clip_format)
+        if output_format != clip_format:
+            data = FormatConverter(clip_format, output_format).convert(data)
+        clip = Clip(data, *output_format)
+
+        with self._cache_lock:
+            self._cache[key] = clip
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return clip
+
+    def preload(self, *filepaths):
+        """Decode clips into the cache ahead of their first play()"""
+        for filepath in filepaths:
+            self.load(filepath)
+
+    def _wav_format(self, file):
+        sample_width = file.getsampwidth()
+        if sample_width not in WAV_FORMATS:
+            raise ValueError(f"Unsupported sample width: {sample_width}")
+        return file.getnchannels(), file.getframerate(), WAV_FORMATS[sample_width]
+
+    def play(self, source, interrupt=False):
+        """Queue a WAV path or Clip for playback and return a Future
+
+        With interrupt=True whatever is playing stops and pending clips are
+        cancelled first (for responses that must be heard right away).
+        """
+        future = Future()
+        if interrupt:
+            self.stop()
+        self._ensure_thread()
+        self._queue.put((source, future, now_ns()))
+        return future
+
+    def play_file(self, filepath):
+        """Play back audio from a wav file (blocks until it has been played)"""
+        return self.play(filepath).result()
+
+    def stop(self):
+        """Stop the current clip and cancel everything queued"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item:
+                item[1].cancel()
+        self._interrupt.set()
+
+    def close(self):
+        """Stop playback, end the playback thread and close the device"""
+        self.stop()
+        with self._thread_lock:
+            thread = self._thread
+            self._thread = None
+        if thread:
+            self._queue.put(None)
+            thread.join()
+        self._close_device()
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if not self._thread:
+                self._thread = threading.Thread(target=self._playback_loop, name="playback", daemon=True)
+                self._thread.start()
+
+    def _playback_loop(self):
+        """Playback thread: play queued clips one after another on the open device"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            source, future, queued_ns = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._interrupt.clear()
+            try:
+                future.set_result(self._play(source, queued_ns))
+            except Exception as e:
+                print(f"❌ Playback error: {e}")
+                self._close_device()  # Reopen cleanly for the next clip
+                future.set_exception(e)
+
+    def _play(self, source, queued_ns):
+        """Write one clip or file to the device period by period; False if interrupted"""
+        clip = source if isinstance(source, Clip) else self.load(source)
+        if clip:
+            return self._write_periods(self._clip_periods(clip), clip.format, queued_ns)
+
+        # Too long to cache: stream it from the file
+        with wave.open(source, 'rb') as file:
+            clip_format = self._wav_format(file)
+            periods = iter(lambda: file.readframes(self.periodsize), b'')
+            output_format = self._output_format(clip_format)
+            if output_format != clip_format:
+                converter = FormatConverter(clip_format, output_format)
+                periods = (converter.convert(data) for data in periods)
+            return self._write_periods(periods, output_format, queued_ns)
+
+    def _clip_periods(self, clip):
+        """Zero-copy period slices of an in-memory clip"""
+        data = memoryview(clip.data)
+        step = self.periodsize * clip.frame_bytes
+        for offset in range(0, len(data), step):
+            yield data[offset:offset + step]
+
+    def _write_periods(self, periods, pcm_format, queued_ns):
+        pcm = self._open_device(pcm_format)
+        channels, _, sample_format = pcm_format
+        period_bytes = self.periodsize * channels * sample_width(sample_format)
+        first = True
+        for data in self._whole_periods(periods, period_bytes):
+            if self._interrupt.is_set():
+                return False
+            start = now_ns()
+            pcm.write(data)
+            self._write_timer.record(now_ns() - start)
+            if first:
+                self._start_timer.record(now_ns() - queued_ns)
+                first = False
+        self.metrics.count('clips_played')
+        return True
+
+    @staticmethod
+    def _whole_periods(chunks, period_bytes):
+        """Re-chunk a stream into whole periods (a resampler's chunks vary in length);
+        only the final period is padded with silence"""
+        carry = bytearray()
+        for data in chunks:
+            if not carry and len(data) == period_bytes:
+                yield data  # Already whole: pass it through without copying
+                continue
+            carry += data
+            while len(carry) >= period_bytes:
+                yield bytes(carry[:period_bytes])
+                del carry[:period_bytes]
+        if carry:
+            yield bytes(carry) + bytes(period_bytes - len(carry))
+
+    def _open_device(self, pcm_format):
+        """The open device, reopened only if the format changes"""
+        if self._pcm and self._pcm_format == pcm_format:
+            return self._pcm
+        self._close_device()
+        self._pcm = self.pcm_factory(self, *pcm_format)
+        self._pcm_format = pcm_format
+        self.metrics.count('device_opens')
+        return self._pcm
+
+    def _close_device(self):
+        if self._pcm:
+            self._pcm.close()
+        self._pcm = None
+        self._pcm_format = None
+
+    def memory_footprint(self):
+        """Bytes of decoded clips held in the cache"""
+        with self._cache_lock:
+            return {'clip_cache': sum(len(clip.data) for clip in self._cache.values())}
+
+    def stats(self):
+        """Write/start timings plus cache and device counters"""
+        stats = self.metrics.stats()
+        stats['counters']['cached_clips'] = len(self._cache)
+        stats['counters']['pending'] = self._queue.qsize()
+        return stats
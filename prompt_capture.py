@@ -0,0 +1,156 @@
+import time
+import numpy as np
+from vad import VoiceActivityDetector
+from phrase_index import PhraseIndex, normalize
+
+# Why a prompt stream ended
+END_SILENCE = "silence"          # Trailing silence after speech
+END_NO_SPEECH = "no_speech"      # Nobody spoke within no_speech_timeout
+END_MAX_DURATION = "max_duration"
+END_OVERRUN = "overrun"          # Reader fell so far behind the lookback ring was overwritten
+END_STOPPED = "stopped"          # Detector stopped listening
+
+
+def find_phrase_end(words, phrase, index=None):
+    """End time of the last occurrence of `phrase` in a list of (word, end_time) pairs, or None
+
+    With a PhraseIndex containing the phrase, near-misses of it count too.
+    """
+    tokens = []
+    owners = []  # Word each token came from
+    for i, (word, _) in enumerate(words):
+        for token in normalize(word):
+            tokens.append(token)
+            owners.append(i)
+    target = ' '.join(normalize(phrase))
+    index = index or PhraseIndex([target], fuzzy=False)
+    ends = [match.end for match in index.search(tokens) if match.phrase == target]
+    if not ends:
+        return None
+    return words[owners[max(ends) - 1]][1]
+
+
+def align_phrase_end(model, audio, phrase, index=None, **options):
+    """End time of `phrase` in audio from a Whisper pass with word timings, or None
+
+    Word timestamps cost an extra alignment pass, so detectors transcribe
+    without them and call this only for the audio that matched a wake word.
+    Options go to model.transcribe().
+    """
+    segments, _ = model.transcribe(audio, word_timestamps=True, **options)
+    words = [(word.word, word.end) for segment in segments for word in segment.words or []]
+    return find_phrase_end(words, phrase, index)
+
+
+class PromptStream:
+    """The audio that follows a wake word, read live from a detector's lookback ring
+
+    Starts at an absolute stream position (normally the end of the wake
+    phrase, which may already be in the past) and ends as soon as the VAD
+    sees `trailing_silence` seconds of non-speech after the user started
+    talking, rather than after a fixed timeout.
+    """
+
+    def __init__(self, ring, cond, start, sample_rate=16000, is_active=None, trailing_silence=0.7,
+                 no_speech_timeout=4.0, max_duration=15.0, frame_ms=20, noise_floor_db=None):
+        self.ring = ring
+        self.sample_rate = sample_rate
+        self.start = max(start, ring.oldest)
+        self.position = self.start  # Next stream position to hand out
+        self.finished = False
+        self.end_reason = None
+        self.speech_started = False
+        self.opened_at = time.monotonic()
+        self.finished_at = None
+
+        self._cond = cond
+        self._is_active = is_active or (lambda: True)
+        self._max_samples = int(max_duration * sample_rate)
+        self._no_speech_samples = int(no_speech_timeout * sample_rate)
+
+        # Endpointing runs on whole frames, starting from the detector's learned noise floor
+        self._vad = VoiceActivityDetector(sample_rate, frame_ms)
+        self._vad.noise_floor_db = noise_floor_db
+        self._frame_size = self._vad.frame_size
+        self._silence_frames = int(trailing_silence * 1000 / frame_ms)
+        self._silence_run = 0
+        self._scale = np.float32(1.0 if ring.dtype.kind == 'f' else 1 << (8 * ring.dtype.itemsize - 1))
+        self._frame = np.zeros(self._frame_size, dtype=np.float32)
+
+    @property
+    def duration(self):
+        """Seconds of prompt audio handed out so far"""
+        return (self.position - self.start) / self.sample_rate
+
+    def read(self, timeout=None):
+        """Next whole frames of prompt audio (a copy); empty on timeout, None once the prompt has ended"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self.finished:
+                available = (self.ring.written - self.position) // self._frame_size * self._frame_size
+                if available:
+                    break
+                if not self._is_active():
+                    self._finish(END_STOPPED)
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return np.zeros(0, dtype=self.ring.dtype)
+                self._cond.wait(0.1 if remaining is None else min(remaining, 0.1))
+            if self.finished:
+                return None
+            if self.ring.is_overrun(self.position):
+                self._finish(END_OVERRUN)
+                return None
+            chunk = self.ring.view(self.position, available).copy()
+
+        return self._endpoint(chunk)
+
+    def _endpoint(self, chunk):
+        """Run the VAD over a chunk; trim it at the endpoint if one is found"""
+        for offset in range(0, len(chunk), self._frame_size):
+            frame = chunk[offset:offset + self._frame_size]
+            np.divide(frame, self._scale, out=self._frame, casting='unsafe')
+            self.position += self._frame_size
+            elapsed = self.position - self.start
+
+            if self._vad.is_speech(self._frame):
+                self.speech_started = True
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+
+            reason = None
+            if self.speech_started and self._silence_run >= self._silence_frames:
+                reason = END_SILENCE
+            elif not self.speech_started and elapsed >= self._no_speech_samples:
+                reason = END_NO_SPEECH
+            elif elapsed >= self._max_samples:
+                reason = END_MAX_DURATION
+            if reason:
+                self._finish(reason)
+                return chunk[:offset + self._frame_size]
+        return chunk
+
+    def _finish(self, reason):
+        self.finished = True
+        self.end_reason = reason
+        self.finished_at = time.monotonic()
+
+    def read_all(self):
+        """Block until the prompt ends and return all of it"""
+        chunks = []
+        while True:
+            chunk = self.read()
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        if not chunks:
+            return np.zeros(0, dtype=self.ring.dtype)
+        return np.concatenate(chunks)
+
+    def close(self):
+        """Stop the prompt early"""
+        with self._cond:
+            if not self.finished:
+                self._finish(END_STOPPED)
@@ -1,24 +1,54 @@
 import time
 import util
 import wave
-import alsaaudio
+import queue
 import threading
+from audio_bus import AudioBus
+from dsp import sample_width
+from metrics import Metrics, now_ns
 
 class RecordingManager:
-    """Audio recording manager using ALSA"""
+    """Audio recording manager using ALSA
 
-    def __init__(self):
+    The bus delivers the recording already downmixed and converted to the
+    target format. Periods are gathered into large blocks and written by a
+    dedicated thread, so a slow SD card never stalls the capture loop.
+    """
+
+    def __init__(self, audio_bus=None, channels=1, rate=16000, sample_format="S16_LE",
+                 block_seconds=1.0, max_pending_blocks=8, device="hw:0,0"):
         self.recording = False
-        self.device = "hw:0,0"
+        self.device = device  # Capture device when no audio_bus is given
+        self.subscription = None
+        
+        # Shared capture stream (one device open for every consumer)
+        self.audio_bus = audio_bus or AudioBus.shared(self.device)
+        
+        # Target file format (mono 16-bit is what the recognizers use)
+        self.channels = channels
+        self.rate = rate
+        self.sample_format = sample_format
+        self.sample_width = sample_width(sample_format)
+        self.block_bytes = int(block_seconds * rate) * channels * self.sample_width
+        self.max_pending_blocks = max_pending_blocks
+        
+        # Writer counters (see stats())
+        self.metrics = Metrics()
+        self._write_timer = self.metrics.stage('write')
+        self.bytes_written = 0
+        self.max_writer_lag = 0.0  # Longest backlog (seconds of audio) seen in the writer queue
+        self._write_queue = None
 
     def list_devices(self):
         """List available audio devices"""
+        import alsaaudio
         print("Available audio devices:")
         for device in alsaaudio.pcms(alsaaudio.PCM_CAPTURE):
             print(device)
 
     def list_cards(self):
         """List available audio cards with their indices"""
+        import alsaaudio
         print("Available audio cards:")
         cards = alsaaudio.cards()
         for i, card in enumerate(cards):
@@ -26,88 +56,132 @@ class RecordingManager:
         return cards
 
     def start_recording(self):
-        """Start recording audio from the default device"""
+        """Record from the shared capture stream until stop_recording(); returns the file path"""
         timestamp = time.time()
         filename = f"input_{timestamp}.wav"
         filepath = util.create_file("recordings", filename)
 
         self.recording = True
+        self.bytes_written = 0
+        self.max_writer_lag = 0.0
 
-        # Open the device in non-blocking capture mode with a common sample rate
-        inp = alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NONBLOCK, 
-                           channels=2, rate=16000, format=alsaaudio.PCM_FORMAT_S32_LE, 
-                           periodsize=160, device=self.device)
-        
-        # Check what rate the device actually set
-
-        # Configure the wave file with the actual rate
-        file = wave.open(filepath, 'wb')
-        file.setnchannels(2)  # Stereo recording
-        file.setsampwidth(4) # PCM_FORMAT_S16_LE (16-bit = 2 bytes)
-        file.setframerate(16000)  # Use actual rate, not requested rate
-
-        while self.recording:
-            # Read data from the device
-            l, data = inp.read()
-            if l:
-                file.writeframes(data)
-            time.sleep(0.001)
-
-        # Clean up resources
-        file.close()
-        inp.close()  # Explicitly close the PCM device
+        # Receive audio already in the file's format from the shared capture stream
+        subscription = self.audio_bus.subscribe("recorder", channels=self.channels, rate=self.rate,
+                                                sample_format=self.sample_format)
+        self.subscription = subscription
+
+        # Blocks go to the writer through a bounded queue; if the card is so slow that it
+        # fills up, the subscription's queue absorbs the backlog (and counts any drops)
+        self._write_queue = queue.Queue(maxsize=self.max_pending_blocks)
+        writer = threading.Thread(target=self._writer_loop, args=(filepath, self._write_queue),
+                                  name="recording-writer")
+        writer.start()
+
+        block = bytearray()
+        try:
+            while self.recording:
+                # Wait for the next period from the audio bus
+                data = subscription.read(timeout=0.1)
+                if data:
+                    block += data
+                    if len(block) >= self.block_bytes:
+                        self._queue_block(bytes(block))
+                        block.clear()
+        finally:
+            # Whatever happened, flush the tail and let the writer finalize the header
+            if block:
+                self._queue_block(bytes(block))
+            self._write_queue.put(None)
+            writer.join()
+            subscription.close()  # Detach from the audio bus
+            self.subscription = None
         return filepath
 
+    def _queue_block(self, block):
+        """Hand a block to the writer thread and track how far behind it is"""
+        self._write_queue.put(block)
+        self.max_writer_lag = max(self.max_writer_lag, self.writer_lag())
+
+    def _writer_loop(self, filepath, blocks):
+        """Writer thread: append blocks to the WAV file until the end marker"""
+        with open(filepath, 'wb') as f:
+            file = wave.open(f, 'wb')
+            file.setnchannels(self.channels)
+            file.setsampwidth(self.sample_width)
+            file.setframerate(self.rate)
+            try:
+                while True:
+                    block = blocks.get()
+                    if block is None:
+                        break
+                    start = now_ns()
+                    # writeframes() also patches the RIFF/data sizes, so after the flush the
+                    # file on disk is a valid WAV even if the process dies before close()
+                    file.writeframes(block)
+                    f.flush()
+                    self._write_timer.record(now_ns() - start)
+                    self.bytes_written += len(block)
+            except Exception as e:
+                print(f"❌ Recording writer error: {e}")
+                # Keep draining so the recording loop never blocks on a dead writer
+                while blocks.get() is not None:
+                    pass
+            finally:
+                file.close()
+
+    def writer_lag(self):
+        """Seconds of recorded audio waiting for the writer"""
+        if not self._write_queue:
+            return 0.0
+        return self._write_queue.qsize() * self.block_bytes / (self.rate * self.channels * self.sample_width)
+
+    def stats(self):
+        """Writer timings plus bytes written, writer lag and capture drops"""
+        stats = self.metrics.stats()
+        stats['counters'].update({
+            'bytes_written': self.bytes_written,
+            'writer_lag_s': round(self.writer_lag(), 2),
+            'max_writer_lag_s': round(self.max_writer_lag, 2),
+        })
+        subscription = self.subscription
+        if subscription:
+            stats['counters']['periods_dropped'] = subscription.periods_dropped
+            stats['counters']['gaps'] = subscription.gaps  # Holes in the file's audio (overruns, drops)
+        return stats
+
+    def memory_footprint(self):
+        """Bytes waiting in the capture queue and for the writer thread"""
+        subscription = self.subscription
+        write_queue = self._write_queue
+        return {
+            'capture_queue': subscription.pending_bytes() if subscription else 0,
+            'pending_blocks': write_queue.qsize() * self.block_bytes if write_queue else 0,
+        }
+
     def stop_recording(self):
         """Stop recording audio"""
         self.recording = False
+        if self.subscription:
+            # Wake the recording loop instead of waiting for the next period
+            self.subscription.close()
         print("Recording stopped")
 
 """
-For testing recording and stereo-to-mono conversion:
+For testing recording and mono playback:
 """
 if __name__ == "__main__":
     import playback_manager
-    import wave
     
-    # Record audio
+    # Record 16kHz mono 16-bit audio
     rm = RecordingManager()
     threading.Timer(5, rm.stop_recording).start()
-    stereo_filepath = rm.start_recording()
-    
-    print(f"Stereo recording saved to: {stereo_filepath}")
-    
-    # Convert stereo to mono and save
-    mono_filepath = stereo_filepath.replace('.wav', '_mono.wav')
-    
-    # Read the stereo file and convert to mono
-    with wave.open(stereo_filepath, 'rb') as stereo_file:
-        stereo_data = stereo_file.readframes(-1)  # Read all frames
-        mono_data = util.stereo_to_mono(stereo_data, bit_depth=32)  # Use 32-bit conversion
-        
-        # Convert mono back to stereo (duplicate channels) for better device compatibility
-        import numpy as np
-        mono_samples = np.frombuffer(mono_data, dtype='<i4')
-        fake_stereo = np.zeros((len(mono_samples), 2), dtype='<i4')
-        fake_stereo[:, 0] = mono_samples  # Left channel
-        fake_stereo[:, 1] = mono_samples  # Right channel (duplicate)
-        
-        # Save as stereo file with identical L/R channels
-        with wave.open(mono_filepath, 'wb') as mono_file:
-            mono_file.setnchannels(2)  # Stereo (but with identical channels)
-            mono_file.setsampwidth(4)  # 32-bit (same as source)
-            mono_file.setframerate(16000)
-            mono_file.writeframes(fake_stereo.tobytes())
-    
-    print(f"Mono version saved to: {mono_filepath}")
-    
-    # Play back both versions
-    pm = playback_manager.PlaybackManager()
-    
-    print("Playing stereo version...")
-    pm.play_file(stereo_filepath)
+    mono_filepath = rm.start_recording()
     
-    time.sleep(1)
+    print(f"Mono recording saved to: {mono_filepath}")
+    print(f"Writer stats: {rm.stats()['counters']}")
     
-    print("Playing mono version...")
-    pm.play_file(mono_filepath)
\ No newline at end of file
+    # The playback device wants stereo 32-bit; the playback manager converts on load
+    pm = playback_manager.PlaybackManager(channels=2, sample_format="S32_LE")
+    print("Playing recording...")
+    pm.play_file(mono_filepath)
+    pm.close()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Offline replay benchmark for the wake word engines
+
+Streams WAV fixtures (with optional .json label sidecars) and/or generated
+audio through the unchanged detector pipelines, using a ReplaySource in
+place of the sound card. Each engine/model runs in its own process so CPU
+time and peak RSS are measured in isolation.
+
+Examples:
+    python replay_benchmark.py fixtures/*.wav
+    python replay_benchmark.py --engine vosk:vosk-model --engine whisper:tiny \\
+        --engine whisper:base --generate noise:600 fixtures/*.wav
+    python replay_benchmark.py --realtime --engine whisper:tiny fixtures/hey_furby.wav
+    python replay_benchmark.py --engine cascade:vosk-model+tiny --generate noise:600 fixtures/*.wav
+"""
+
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import numpy as np
+import voice_assistant_controller
+from audio_bus import AudioBus, BLOCK, DROP_OLDEST
+from audio_sources import ReplaySource, generate_audio, load_fixture, to_capture_format
+
+SAMPLE_RATE = 16000
+GAP_SECONDS = 0.5  # Silence inserted between fixtures
+VERIFIER_COUNTERS = ('candidates', 'verified', 'rejected', 'duplicates_suppressed', 'whisper_duty_cycle')
+
+
+def build_stream(fixtures, generated):
+    """Concatenate fixtures and generated audio into one 16 kHz stream with shifted labels"""
+    pieces = []
+    labels = []
+    offset = 0.0
+    gap = np.zeros(int(SAMPLE_RATE * GAP_SECONDS), dtype=np.float32)
+
+    for path in fixtures:
+        samples, fixture_labels = load_fixture(path, SAMPLE_RATE)
+        for label in fixture_labels:
+            labels.append({**label, 'start': label['start'] + offset, 'end': label['end'] + offset})
+        pieces.extend([samples, gap])
+        offset += (len(samples) + len(gap)) / SAMPLE_RATE
+
+    for spec in generated:
+        kind, seconds = spec.split(':')
+        samples = generate_audio(kind, float(seconds), SAMPLE_RATE)
+        pieces.extend([samples, gap])
+        offset += (len(samples) + len(gap)) / SAMPLE_RATE
+
+    if not pieces:
+        raise SystemExit("Nothing to replay - pass WAV fixtures and/or --generate kind:seconds")
+    return np.concatenate(pieces), labels
+
+
+def create_detector(engine, model_path, wake_words, bus, realtime):
+    """Construct a detector exactly as production does, but on the replay bus"""
+    options = {}
+    if engine in ('whisper', 'cascade'):
+        from inference_queue import BLOCK as QUEUE_BLOCK, DROP_OLDEST as QUEUE_DROP_OLDEST
+        # Offline, inference sets the pace instead of dropping windows
+        options['queue_policy'] = QUEUE_DROP_OLDEST if realtime else QUEUE_BLOCK
+    if engine == 'cascade':
+        # cascade:<vosk model>+<whisper verifier model>
+        model_path, _, verifier = model_path.partition('+')
+        options['verifier_model'] = verifier or "tiny"
+    return voice_assistant_controller.create_detector(engine, model_path=model_path, wake_words=wake_words,
+                                                      audio_bus=bus, **options)
+
+
+def is_idle(detector):
+    """True once the detector has consumed everything the source produced"""
+    subscription = detector.subscription
+    if subscription and subscription.pending():
+        return False
+    queue = getattr(detector, 'inference_queue', None)
+    return queue is None or queue.is_idle()
+
+
+def score(detections, labels, tolerance):
+    """Match detections to labeled wake words; unmatched detections are false alarms"""
+    matched = set()
+    latencies = []
+    false_alarms = 0
+    for position, _ in detections:
+        for i, label in enumerate(labels):
+            if i not in matched and label['start'] <= position <= label['end'] + tolerance:
+                matched.add(i)
+                latencies.append(position - label['end'])
+                break
+        else:
+            false_alarms += 1
+    return len(matched), false_alarms, latencies
+
+
+def run_single(spec, args):
+    """Replay the stream through one engine in this process and return its measurements"""
+    engine, model_path = spec.split(':', 1)
+    stream, labels = build_stream(args.fixtures, args.generate)
+    capture = to_capture_format(stream, SAMPLE_RATE, args.capture_rate, args.capture_channels)
+
+    source = ReplaySource(capture, args.capture_rate, args.capture_channels,
+                          periodsize=args.periodsize, realtime=args.realtime)
+    bus = AudioBus(device="replay", channels=args.capture_channels, rate=args.capture_rate,
+                   periodsize=args.periodsize, pcm_factory=lambda bus: source,
+                   default_policy=DROP_OLDEST if args.realtime else BLOCK)
+
+    detector = create_detector(engine, model_path, args.wake_words, bus, args.realtime)
+    if not detector.model:
+        raise SystemExit(f"Model for {spec} failed to load")
+    # Measure steady state, not the first-inference cold start
+    detector.model_registry.wait_warm(detector.model)
+    if getattr(detector, 'verifier_model', None):
+        detector.model_registry.wait_warm(detector.verifier_model)
+
+    detections = []
+    subscription_ref = []
+
+    def on_wake_word(text):
+        # Stream time of the audio the detector had consumed when it fired
+        detections.append((subscription_ref[0].position, text))
+
+    detector.set_wake_word_callback(on_wake_word)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    detector.start_listening()
+    subscription_ref.append(detector.subscription)
+
+    while not (source.finished.is_set() and is_idle(detector)):
+        time.sleep(0.02)
+    time.sleep(0.2)  # Let the last period clear the recognizer
+    counters = detector.stats()['counters']
+    detector.close()
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    hits, false_alarms, latencies = score(detections, labels, args.tolerance)
+
+    return {
+        'engine': spec,
+        'audio_seconds': round(source.duration, 2),
+        'wall_seconds': round(wall, 2),
+        'rtf': round(wall / source.duration, 4),
+        'cpu_seconds': round(cpu, 2),
+        'cpu_rtf': round(cpu / source.duration, 4),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'labels': len(labels),
+        'hits': hits,
+        'false_alarms': false_alarms,
+        'false_alarms_per_hour': round(false_alarms / source.duration * 3600, 2),
+        'latency_mean': round(float(np.mean(latencies)), 3) if latencies else None,
+        'latency_p95': round(float(np.percentile(latencies, 95)), 3) if latencies else None,
+        'detections': [(round(position, 3), text) for position, text in detections],
+        # Cascade only: how many candidates Whisper saw and how busy it was
+        'verifier': {name: counters[name] for name in VERIFIER_COUNTERS if name in counters},
+    }
+
+
+def run_isolated(spec, argv):
+    """Run one engine in a child process so CPU time and peak RSS aren't shared"""
+    command = [sys.executable, __file__, '--single', spec] + argv
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    print(completed.stdout[-2000:])
+    print(completed.stderr[-2000:])
+    return {'engine': spec, 'error': f"exit code {completed.returncode}"}
+
+
+def print_report(results):
+    """Print one row per engine"""
+    print("\n📊 REPLAY RESULTS")
+    print("=" * 100)
+    print(f"{'engine':<22}{'RTF':>8}{'CPU RTF':>9}{'RSS MB':>9}{'hits':>9}{'FA':>6}{'FA/h':>8}"
+          f"{'lat mean':>10}{'lat p95':>9}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['engine']:<22}  ❌ {result['error']}")
+            continue
+        hit_text = f"{result['hits']}/{result['labels']}"
+        latency_mean = f"{result['latency_mean']:.2f}s" if result['latency_mean'] is not None else "-"
+        latency_p95 = f"{result['latency_p95']:.2f}s" if result['latency_p95'] is not None else "-"
+        print(f"{result['engine']:<22}{result['rtf']:>8.3f}{result['cpu_rtf']:>9.3f}"
+              f"{result['peak_rss_mb']:>9.1f}{hit_text:>9}{result['false_alarms']:>6}"
+              f"{result['false_alarms_per_hour']:>8.1f}{latency_mean:>10}{latency_p95:>9}")
+    print("=" * 100)
+    for result in results:
+        if result.get('verifier'):
+            counters = ", ".join(f"{name} {value}" for name, value in result['verifier'].items())
+            print(f"🔎 {result['engine']}: {counters}")
+    print("RTF = wall time / audio time, latency = detection time - end of labeled wake word")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Offline wake word engine benchmark")
+    parser.add_argument('fixtures', nargs='*', help="WAV fixtures (labels read from <name>.json)")
+    parser.add_argument('--engine', action='append', help="engine:model, e.g. vosk:vosk-model or whisper:tiny")
+    parser.add_argument('--generate', action='append', default=[],
+                        help="Generated audio kind:seconds (silence, noise, tone)")
+    parser.add_argument('--realtime', action='store_true', help="Pace audio like a sound card")
+    parser.add_argument('--capture-rate', type=int, default=48000)
+    parser.add_argument('--capture-channels', type=int, default=2)
+    parser.add_argument('--periodsize', type=int, default=1024)
+    parser.add_argument('--wake-words', nargs='+', default=["hey furby", "hey assistant"])
+    parser.add_argument('--tolerance', type=float, default=4.0,
+                        help="Seconds after a label's end a detection still counts as a hit")
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    argv = sys.argv[1:]
+    args = parse_args(argv)
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args)))
+        return
+
+    print("Wake Word Replay Benchmark")
+    print("=" * 40)
+    engines = args.engine or ["vosk:vosk-model"]
+    results = []
+    for spec in engines:
+        print(f"🔧 Running {spec}...")
+        results.append(run_isolated(spec, argv))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
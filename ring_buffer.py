@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity sample buffer addressed by absolute stream position
+
+    Every sample ever written has a position (0, 1, 2, ...). The buffer keeps
+    the most recent `capacity` of them and hands out windows as NumPy views
+    without copying. Storage is mirrored (each sample is written twice,
+    `capacity` apart) so any window up to `capacity` long is contiguous even
+    when it wraps around the end of the ring.
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.written = 0  # Write cursor: total samples written since creation/reset
+        self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+
+    @property
+    def oldest(self):
+        """Position of the oldest sample still held in the buffer"""
+        return max(0, self.written - self.capacity)
+
+    @property
+    def nbytes(self):
+        """Bytes of sample storage held by the buffer"""
+        return self._data.nbytes
+
+    def reset(self):
+        """Forget all samples and rewind the write cursor"""
+        self.written = 0
+
+    def write(self, samples):
+        """Append samples (converted to the buffer dtype without rescaling)"""
+        samples = np.asarray(samples)
+        count = len(samples)
+        if count == 0:
+            return
+        if count > self.capacity:
+            # Only the newest `capacity` samples can survive anyway
+            self.written += count - self.capacity
+            samples = samples[-self.capacity:]
+            count = self.capacity
+
+        start = self.written % self.capacity
+        first = min(count, self.capacity - start)
+
+        # Primary copy
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:]
+        # Mirror copy, so reads never have to stitch across the wrap point
+        self._data[self.capacity + start:self.capacity + start + first] = samples[:first]
+        self._data[self.capacity:self.capacity + count - first] = samples[first:]
+
+        self.written += count
+
+    def view(self, start, length):
+        """Return a contiguous read-only view of samples [start, start + length)
+
+        The view stays valid until the writer has advanced another
+        `capacity - length` samples past its end.
+        """
+        if length > self.capacity:
+            raise ValueError(f"Window of {length} samples exceeds ring capacity {self.capacity}")
+        if start < self.oldest:
+            raise ValueError(f"Samples from {start} have already been overwritten (oldest is {self.oldest})")
+        if start + length > self.written:
+            raise ValueError(f"Samples up to {start + length} have not been written yet (written {self.written})")
+
+        offset = start % self.capacity
+        window = self._data[offset:offset + length]
+        window.flags.writeable = False
+        return window
+
+    def lag(self, cursor):
+        """How many samples a reader at `cursor` is behind the writer"""
+        return self.written - cursor
+
+    def is_overrun(self, cursor):
+        """True if the writer has overwritten samples a reader at `cursor` hasn't consumed"""
+        return cursor < self.oldest
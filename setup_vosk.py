@@ -1,86 +1,569 @@
 #!/usr/bin/env python3
 """
-Setup script for Vosk model download and configuration
+Setup script for Vosk (and faster-whisper) model download and configuration
+
+Models are fetched into a content-addressed store: every file is kept once
+under objects/<sha256> and model directories are hard links into it, so
+images built from one store (or models sharing files) hold a single copy.
+The working paths the assistant uses (vosk-model, whisper-tiny, ...) are
+symlinks into the store.
+
+Downloads resume through HTTP Range after an interruption (in this run or
+the next), can fetch ranged chunks in parallel, and are checked against a
+pinned or server-advertised sha256. tar archives are extracted while they
+stream, so the archive itself never hits the SD card; zip archives (which
+need random access) are downloaded to the store first and deleted after
+extraction.
+
+    python setup_vosk.py                                   # dependencies + small Vosk model
+    python setup_vosk.py whisper-tiny --no-deps --workers 4
+    python setup_vosk.py vosk-small-en --base-url http://localhost:8000   # local mirror
+    python setup_vosk.py --verify
 """
 
 import os
-import requests
+import sys
+import json
+import time
+import shutil
+import hashlib
 import tarfile
 import zipfile
-from pathlib import Path
+import argparse
+import threading
+from urllib.parse import urlsplit
 
-def download_file(url, filename):
-    """Download a file with progress indicator"""
-    print(f"Downloading {filename}...")
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-    
-    total_size = int(response.headers.get('content-length', 0))
-    downloaded = 0
-    
-    with open(filename, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
+CHUNK_BYTES = 256 * 1024
+MIN_RANGE_BYTES = 4 * 1024 * 1024  # Smallest piece worth its own connection
+RETRIES = 5
+
+# Refuse links, devices and absolute paths in archives where tarfile can (Python >= 3.11.4)
+TAR_FILTER = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+
+STORE_PATH = os.environ.get('MODEL_STORE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache"), "embedded-audio", "models")
+
+WHISPER_FILES = ("config.json", "model.bin", "tokenizer.json", "vocabulary.txt")
+
+# name -> where to fetch it and the path the assistant loads it from. 'sha256' pins an
+# archive's checksum; without one, checksums the server advertises are used
+MODELS = {
+    # Small English model (~50MB) - optimized for Raspberry Pi memory
+    'vosk-small-en': {'archive': "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip",
+                      'dest': "vosk-model"},
+    'whisper-tiny': {'files': "https://huggingface.co/Systran/faster-whisper-tiny/resolve/main",
+                     'dest': "whisper-tiny"},
+    'whisper-base': {'files': "https://huggingface.co/Systran/faster-whisper-base/resolve/main",
+                     'dest': "whisper-base"},
+    'whisper-small': {'files': "https://huggingface.co/Systran/faster-whisper-small/resolve/main",
+                      'dest': "whisper-small"},
+}
+
+
+class ChecksumError(ValueError):
+    """Downloaded data doesn't match its expected sha256"""
+
+
+def mirror_url(url, base_url=None):
+    """The same path on a mirror (e.g. http://localhost:8000) instead of the original host"""
+    if not base_url:
+        return url
+    return base_url.rstrip('/') + urlsplit(url).path
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _advertised_sha256(response):
+    """sha256 the server vouches for (Hugging Face sends it as the LFS ETag), or None"""
+    for r in list(response.history) + [response]:
+        for header in ('x-linked-etag', 'etag'):
+            value = r.headers.get(header, '').strip('"').lower()
+            if len(value) == 64 and all(c in '0123456789abcdef' for c in value):
+                return value
+    return None
+
+
+def _retry(action, what):
+    """Run action() until it succeeds, backing off between attempts (resumable actions only)"""
+    import requests
+    for attempt in range(1, RETRIES + 1):
+        try:
+            return action()
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == RETRIES:
+                raise
+            delay = min(2 ** attempt, 30)
+            print(f"\n⚠️ {what}: {e}; resuming in {delay}s ({attempt}/{RETRIES})")
+            time.sleep(delay)
+
+
+class _Progress:
+    """Thread-safe byte counter printing a percentage line"""
+
+    def __init__(self, total, done=0):
+        self.total = total
+        self.done = done
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.done += count
+            if self.total:
+                print(f"\rProgress: {self.done / self.total * 100:.1f}%", end='', flush=True)
+
+
+def _fetch_range(session, url, path, start, end, on_chunk):
+    """Write bytes [start, end] of url at the same offset in path, reporting each chunk"""
+    import requests
+    headers = {'Range': f"bytes={start}-{end}"}
+    with session.get(url, headers=headers, stream=True, timeout=30) as response:
+        if response.status_code != 206:
+            raise requests.ConnectionError(f"range request answered with HTTP {response.status_code}")
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            offset = start
+            for chunk in response.iter_content(CHUNK_BYTES):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+                on_chunk(len(chunk))
+        finally:
+            os.close(fd)
+
+
+def _download_ranges(url, part_path, size, workers, progress):
+    """Fetch url in `workers` ranged pieces, resuming each from the .ranges state file"""
+    import requests
+    state_path = part_path + '.ranges'
+    try:
+        with open(state_path) as f:
+            ranges = json.load(f)  # [[start, end, bytes done], ...]
+    except (OSError, ValueError):
+        ranges = None
+    if not ranges or ranges[-1][1] != size - 1 or not os.path.exists(part_path):
+        step = -(-size // workers)
+        ranges = [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+    progress.done = sum(done for _, _, done in ranges)
+    lock = threading.Lock()
+    errors = []
+
+    def save():
+        with open(state_path, 'w') as f:
+            json.dump(ranges, f)
+    save()  # The layout itself, so even an early interruption resumes into the same .part
+
+    def worker(piece):
+        session = requests.Session()
+
+        def on_chunk(count):
+            # Record progress as it lands (saved every few MB), so a retry or the next
+            # run continues from here
+            with lock:
+                piece[2] += count
+                if piece[2] % (16 * CHUNK_BYTES) < count:
+                    save()
+            progress.add(count)
+
+        def fetch():
+            start, end, done = piece
+            if start + done <= end:
+                _fetch_range(session, url, part_path, start + done, end, on_chunk)
+        try:
+            _retry(fetch, f"range {piece[0]}-{piece[1]}")
+        except Exception as e:
+            with lock:
+                save()
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(piece,), daemon=True) for piece in ranges]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    os.remove(state_path)
+
+
+def _download_sequential(session, url, part_path, progress):
+    """Append to part_path from where it stopped (restarting if the server ignores Range)"""
+    import requests
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Range': f"bytes={offset}-"} if offset else {}
+    with session.get(url, headers=headers, stream=True, timeout=30) as response:
+        if offset and response.status_code == 416:
+            if response.headers.get('content-range', '') == f"bytes */{offset}":
+                return  # Already complete
+            os.remove(part_path)  # Longer than the file now served; start over
+            raise requests.ConnectionError(f"HTTP 416 for bytes={offset}- "
+                                           f"(Content-Range: {response.headers.get('content-range')})")
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            offset = 0  # Server sent the whole file
+        progress.done = offset
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(CHUNK_BYTES):
                 f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    progress = (downloaded / total_size) * 100
-                    print(f"\rProgress: {progress:.1f}%", end='', flush=True)
-    
-    print(f"\n{filename} downloaded successfully!")
+                progress.add(len(chunk))
+
+
+def download_file(url, filename, sha256=None, workers=1):
+    """Download url to filename, resuming a previous attempt and verifying its sha256
+
+    Data lands in filename.part until it is complete and verified. With
+    workers > 1 (and a server that supports ranges) the file is fetched in
+    that many parallel ranged pieces. `sha256` pins the checksum; otherwise
+    one advertised by the server is used if present. Returns the sha256.
+    """
+    import requests
+    print(f"Downloading {filename}...")
+    session = requests.Session()
+    size, expected, ranges = None, sha256, False
+    head = session.head(url, allow_redirects=True, timeout=30)
+    if head.ok:
+        url = head.url  # After redirects (CDN), so ranged requests go straight there
+        size = int(head.headers.get('content-length', 0)) or None
+        expected = sha256 or _advertised_sha256(head)
+        ranges = head.headers.get('accept-ranges', '').lower() == 'bytes'
+    part_path = filename + '.part'
+    state_path = part_path + '.ranges'
+    progress = _Progress(size)
+
+    # A .ranges file means an interrupted parallel run: its .part is pre-sized with
+    # holes, so only the ranged download can resume it (whatever `workers` is now)
+    resume_ranges = os.path.exists(state_path)
+    if ranges and size and (resume_ranges or workers > 1 and size >= 2 * MIN_RANGE_BYTES):
+        _download_ranges(url, part_path, size, max(min(workers, size // MIN_RANGE_BYTES), 1), progress)
+    else:
+        if resume_ranges:
+            # Can't resume it by ranges now; appending to it would keep the holes
+            for path in (part_path, state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        _retry(lambda: _download_sequential(session, url, part_path, progress), filename)
+
+    digest = file_sha256(part_path)
+    if expected and digest != expected:
+        os.remove(part_path)
+        raise ChecksumError(f"{filename}: sha256 {digest} does not match the expected {expected}")
+    os.replace(part_path, filename)
+    print(f"\n{filename} downloaded successfully!" + (" (sha256 verified)" if expected else ""))
+    return digest
+
+
+class _ResumingReader:
+    """Sequential file-like view of a URL's body, hashing it as it is read
+
+    A transfer that breaks off is reopened with a Range request from the
+    byte it stopped at (with backoff), so a consumer such as a streaming
+    tarfile never sees the interruption. A server that ignores the range
+    is skipped forward instead.
+    """
+
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+        self.offset = 0
+        self.size = None
+        self.digest = hashlib.sha256()
+        self.response = None
+        self.advertised = None  # sha256 the server vouched for, if any
+        self._connect()
+
+    def _connect(self):
+        import requests
+        headers = {'Range': f"bytes={self.offset}-"} if self.offset else {}
+        response = self.session.get(self.url, headers=headers, stream=True, timeout=30)
+        response.raise_for_status()
+        self.response = response
+        if not self.offset:
+            self.advertised = _advertised_sha256(response)
+            self.size = int(response.headers.get('content-length', 0)) or None
+        elif response.status_code != 206:
+            skip = self.offset  # Whole body again; throw away what we already have
+            while skip:
+                data = response.raw.read(min(skip, CHUNK_BYTES))
+                if not data:
+                    raise requests.ConnectionError("transfer ended while skipping to the resume point")
+                skip -= len(data)
+
+    def _read(self, size):
+        import requests
+        if self.response is None:
+            self._connect()
+        data = self.response.raw.read(size if size >= 0 else None)
+        if not data and size and self.size and self.offset < self.size:
+            raise requests.ConnectionError(f"transfer ended at byte {self.offset} of {self.size}")
+        return data
+
+    def read(self, size=-1):
+        import requests
+        import urllib3
+        for attempt in range(1, RETRIES + 1):
+            try:
+                data = self._read(size)
+                break
+            except (requests.ConnectionError, requests.Timeout, urllib3.exceptions.HTTPError) as e:
+                if self.response is not None:
+                    self.response.close()
+                    self.response = None
+                if attempt == RETRIES:
+                    raise
+                delay = min(2 ** attempt, 30)
+                print(f"\n⚠️ {self.url}: {e}; resuming at byte {self.offset} in {delay}s ({attempt}/{RETRIES})")
+                time.sleep(delay)
+        self.offset += len(data)
+        self.digest.update(data)
+        return data
+
+    def drain(self):
+        """Hash whatever the reader's consumer left unread (tar padding)"""
+        while self.read(CHUNK_BYTES):
+            pass
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+
+
+def _inside(root, name):
+    """Path of an archive member under root, refusing absolute paths and '..' escapes"""
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([path, os.path.realpath(root)]) != os.path.realpath(root):
+        raise ValueError(f"Archive member escapes the extraction directory: {name}")
+    return path
+
+
+def stream_extract(url, extract_to, sha256=None):
+    """Extract a tar archive as it downloads (nothing but the members is written)
+
+    Interrupted transfers resume where they stopped (see _ResumingReader).
+    """
+    import requests
+    print(f"Streaming {url} into {extract_to}/...")
+    reader = _ResumingReader(requests.Session(), url)
+    try:
+        expected = sha256 or reader.advertised
+        with tarfile.open(fileobj=reader, mode='r|*') as tar:
+            for member in tar:
+                if not (member.isfile() or member.isdir()):
+                    continue  # Links and devices have no place in a model
+                _inside(extract_to, member.name)
+                tar.extract(member, extract_to, **TAR_FILTER)
+        reader.drain()
+    finally:
+        reader.close()
+    digest = reader.digest.hexdigest()
+    if expected and digest != expected:
+        raise ChecksumError(f"{url}: sha256 {digest} does not match the expected {expected}")
+    return digest
+
 
 def extract_model(archive_path, extract_to="vosk-model"):
-    """Extract the downloaded model archive"""
+    """Extract a downloaded zip or tar archive into extract_to"""
     print(f"Extracting {archive_path}...")
-    
     if archive_path.endswith('.zip'):
         with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall('.')
-    elif archive_path.endswith('.tar.gz'):
-        with tarfile.open(archive_path, 'r:gz') as tar_ref:
-            tar_ref.extractall('.')
-    
-    # Find the extracted directory and rename it
-    for item in os.listdir('.'):
-        if os.path.isdir(item) and item.startswith('vosk-model'):
-            if item != extract_to:
-                os.rename(item, extract_to)
-            break
-    
+            for name in zip_ref.namelist():
+                _inside(extract_to, name)
+            zip_ref.extractall(extract_to)
+    else:
+        with tarfile.open(archive_path, 'r:*') as tar_ref:
+            members = [m for m in tar_ref.getmembers() if m.isfile() or m.isdir()]
+            for member in members:
+                _inside(extract_to, member.name)
+            tar_ref.extractall(extract_to, members=members, **TAR_FILTER)
     print(f"Model extracted to {extract_to}/")
 
-def setup_vosk_model():
+
+def _model_root(directory):
+    """Archives usually wrap the model in one top-level directory; return the model itself"""
+    entries = os.listdir(directory)
+    if len(entries) == 1 and os.path.isdir(os.path.join(directory, entries[0])):
+        return os.path.join(directory, entries[0])
+    return directory
+
+
+class ModelStore:
+    """Content-addressed model storage
+
+    objects/ab/<sha256> holds each distinct file once (read-only);
+    models/<name>/ rebuilds a model's directory out of hard links to those
+    objects, and manifests/<name>.json records path -> sha256 for verify().
+    """
+
+    def __init__(self, root=STORE_PATH):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.models = os.path.join(root, "models")
+        self.manifests = os.path.join(root, "manifests")
+        self.tmp = os.path.join(root, "tmp")  # Same filesystem, so objects can be renamed in
+        for path in (self.objects, self.models, self.manifests, self.tmp):
+            os.makedirs(path, exist_ok=True)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def model_path(self, name):
+        return os.path.join(self.models, name)
+
+    def _manifest_path(self, name):
+        return os.path.join(self.manifests, name + ".json")
+
+    def manifest(self, name):
+        try:
+            with open(self._manifest_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def has(self, name):
+        return self.manifest(name) is not None and os.path.isdir(self.model_path(name))
+
+    def scratch(self, name):
+        """Empty working directory for a download in progress (kept across runs for resuming)"""
+        path = os.path.join(self.tmp, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def add_file(self, path, digest=None):
+        """Move a file into the object store (dropping it if already there); returns its sha256"""
+        digest = digest or file_sha256(path)
+        target = self.object_path(digest)
+        if os.path.exists(target):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+            os.chmod(target, 0o444)
+        return digest
+
+    def add_tree(self, name, tree, digests=None):
+        """Store every file under tree as model `name`, replacing any previous version"""
+        manifest = {}
+        for root, _, files in os.walk(tree):
+            for filename in files:
+                path = os.path.join(root, filename)
+                relpath = os.path.relpath(path, tree)
+                manifest[relpath] = self.add_file(path, (digests or {}).get(relpath))
+
+        # Build the linked directory aside, then swap it in
+        building = os.path.join(self.tmp, name + ".building")
+        shutil.rmtree(building, ignore_errors=True)
+        for relpath, digest in manifest.items():
+            target = os.path.join(building, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(self.object_path(digest), target)
+            except OSError:
+                shutil.copyfile(self.object_path(digest), target)  # No hard links (e.g. FAT)
+        shutil.rmtree(self.model_path(name), ignore_errors=True)
+        os.replace(building, self.model_path(name))
+        with open(self._manifest_path(name), 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        shutil.rmtree(tree, ignore_errors=True)
+        return manifest
+
+    def verify(self, name):
+        """Paths of model `name` whose contents no longer match the manifest"""
+        manifest = self.manifest(name) or {}
+        bad = []
+        for relpath, digest in manifest.items():
+            path = os.path.join(self.model_path(name), relpath)
+            if not os.path.exists(path) or file_sha256(path) != digest:
+                bad.append(relpath)
+        return bad
+
+    def link(self, name, dest):
+        """Point dest (the path the assistant loads) at the stored model"""
+        target = self.model_path(name)
+        if os.path.islink(dest):
+            if os.readlink(dest) == target:
+                return
+            os.remove(dest)
+        elif os.path.exists(dest):
+            print(f"⚠️ {dest} exists and is not a link into the model store; leaving it alone")
+            return
+        os.symlink(target, dest)
+
+
+def _fetch_archive(store, name, url, sha256, workers):
+    """Archive model -> store tree (streamed for tar, via a temporary file for zip)"""
+    work = store.scratch(name)
+    extract_to = os.path.join(work, "extracted")
+    shutil.rmtree(extract_to, ignore_errors=True)
+    if url.endswith('.zip'):
+        archive = os.path.join(work, os.path.basename(urlsplit(url).path))
+        download_file(url, archive, sha256=sha256, workers=workers)
+        extract_model(archive, extract_to)
+        os.remove(archive)
+    else:
+        stream_extract(url, extract_to, sha256)  # Resumes by itself
+    manifest = store.add_tree(name, _model_root(extract_to))
+    shutil.rmtree(work, ignore_errors=True)
+    return manifest
+
+
+def _fetch_files(store, name, base, workers):
+    """Model published as separate files (faster-whisper repositories) -> store tree"""
+    import requests
+    work = store.scratch(name)
+    digests = {}
+    for filename in WHISPER_FILES:
+        path = os.path.join(work, filename)
+        if os.path.exists(path):
+            continue  # Finished in an earlier, interrupted run
+        try:
+            digests[filename] = download_file(f"{base}/{filename}", path, workers=workers)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404 and filename != "model.bin":
+                print(f"ℹ️ {filename} not published for {name}; skipping")
+                continue
+            raise
+    return store.add_tree(name, work, digests)  # Moves the files out and removes work
+
+
+def provision(name, store=None, base_url=None, workers=4, dest=None):
+    """Make model `name` (see MODELS) available at its working path; returns that path"""
+    spec = MODELS[name]
+    store = store or ModelStore()
+    dest = dest or spec['dest']
+    if not store.has(name):
+        if 'archive' in spec:
+            _fetch_archive(store, name, mirror_url(spec['archive'], base_url), spec.get('sha256'), workers)
+        else:
+            _fetch_files(store, name, mirror_url(spec['files'], base_url), workers)
+        print(f"📦 {name} stored in {store.model_path(name)}")
+    store.link(name, dest)
+    return dest
+
+
+def setup_vosk_model(store=None, base_url=None, workers=4):
     """Download and setup a small Vosk model for wake word detection"""
-    
-    # Small English model (~50MB) - optimized for Raspberry Pi memory
-    model_url = "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip"
-    model_filename = "vosk-model-small-en-us-0.15.zip"
-    
     print("Vosk Model Setup for Wake Word Detection")
     print("=" * 50)
-    
+
     # Check if model already exists
-    if os.path.exists("vosk-model"):
+    if os.path.exists("vosk-model") and not os.path.islink("vosk-model"):
         print("✅ Vosk model already exists at 'vosk-model/'")
         return
-    
+
     try:
-        # Download the model
-        download_file(model_url, model_filename)
-        
-        # Extract the model
-        extract_model(model_filename)
-        
-        # Clean up the archive
-        os.remove(model_filename)
-        
+        provision('vosk-small-en', store, base_url, workers)
         print("✅ Vosk model setup complete!")
         print("📁 Model location: ./vosk-model/")
         print("🎉 You can now run the voice assistant!")
-        
+
     except Exception as e:
         print(f"❌ Error setting up Vosk model: {e}")
-        print("Please check your internet connection and try again.")
+        print("Please check your internet connection and try again - the download resumes where it stopped.")
 
 def install_dependencies():
     """Install required Python packages"""
@@ -88,17 +571,52 @@ def install_dependencies():
     os.system("pip install -r requirements.txt")
     print("✅ Dependencies installed!")
 
+def verify_store(store):
+    """Re-hash every stored model; returns the number of damaged files"""
+    damaged = 0
+    for filename in sorted(os.listdir(store.manifests)):
+        name = filename[:-len(".json")]
+        bad = store.verify(name)
+        damaged += len(bad)
+        print(f"{'❌' if bad else '✅'} {name}" + (f": {', '.join(bad)}" if bad else ""))
+    return damaged
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Install Python dependencies and provision models")
+    parser.add_argument('models', nargs='*', metavar='model',
+                        help=f"Models to provision ({', '.join(sorted(MODELS))}); default vosk-small-en")
+    parser.add_argument('--store', default=STORE_PATH, help="Content-addressed model store")
+    parser.add_argument('--base-url', help="Fetch from this mirror (same paths) instead of the original hosts")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel ranged connections per file")
+    parser.add_argument('--no-deps', action='store_true', help="Skip pip install")
+    parser.add_argument('--verify', action='store_true', help="Re-hash the store and exit")
+    args = parser.parse_args()
+    unknown = [name for name in args.models if name not in MODELS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+    store = ModelStore(args.store)
+
+    if args.verify:
+        sys.exit(1 if verify_store(store) else 0)
+
     print("Voice Assistant Setup")
     print("=" * 30)
-    
+
     # Install dependencies
-    install_dependencies()
-    
-    # Setup Vosk model
-    setup_vosk_model()
-    
+    if not args.no_deps:
+        install_dependencies()
+
+    # Setup models (the small Vosk model by default)
+    if not args.models:
+        setup_vosk_model(store, args.base_url, args.workers)
+    for name in args.models:
+        try:
+            print(f"✅ {name} ready at {provision(name, store, args.base_url, args.workers)}/")
+        except Exception as e:
+            print(f"❌ Error provisioning {name}: {e}")
+            sys.exit(1)
+
     print("\n🚀 Setup complete! You can now run:")
     print("   python voice_assistant_test.py")
     print("\nOr test wake word detection alone:")
-    print("   python wake_word_detector.py") 
\ No newline at end of file
+    print("   python wake_word_detector.py")
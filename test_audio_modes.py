@@ -3,10 +3,10 @@
 Test script to check audio device capabilities for mono vs stereo recording
 """
 
-import alsaaudio
 import time
 import wave
 import util
+from audio_bus import AudioBus
 
 def test_recording_mode(channels, mode_name):
     """Test if the device supports a specific recording mode"""
@@ -14,10 +14,9 @@ def test_recording_mode(channels, mode_name):
     
     try:
         # Try to open the device with the specified channel count
-        inp = alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NONBLOCK,
-                           channels=channels, rate=16000, 
-                           format=alsaaudio.PCM_FORMAT_S32_LE,
-                           periodsize=160, device="hw:0,0")
+        bus = AudioBus(device="hw:0,0", channels=channels, rate=16000,
+                       sample_format="S32_LE", periodsize=160)
+        inp = bus.subscribe(f"test_{mode_name.lower()}")
         
         print(f"✅ {mode_name} recording: Device opened successfully")
         
@@ -34,10 +33,9 @@ def test_recording_mode(channels, mode_name):
             start_time = time.time()
             
             while time.time() - start_time < 2.0:
-                length, data = inp.read()
-                if length > 0:
+                data = inp.read(timeout=0.1)
+                if data:
                     file.writeframes(data)
-                time.sleep(0.01)
         
         inp.close()
         print(f"✅ {mode_name} recording: Successfully recorded to {filepath}")
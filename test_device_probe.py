@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the capture device probe cache: it is keyed by the card's
+hardware, not by how busy the device currently is
+
+    python -m pytest test_device_probe.py
+"""
+
+import pytest
+import device_probe
+
+PCM_INFO = """card: 1
+device: 0
+subdevice: 0
+stream: CAPTURE
+id: USB Audio
+name: USB Audio
+subname: subdevice #0
+class: 0
+subclass: 0
+subdevices_count: 1
+subdevices_avail: {avail}"""
+
+
+@pytest.fixture
+def proc(monkeypatch):
+    """Fake /proc/asound files for card 1; returns the path -> contents dict to edit"""
+    files = {
+        '/proc/asound/card1/id': "Microphone",
+        '/proc/asound/card1/usbid': "0d8c:0014",
+        '/proc/asound/card1/pcm0c/info': PCM_INFO.format(avail=1),
+    }
+    monkeypatch.setattr(device_probe, '_read', lambda path: files.get(path, ""))
+    return files
+
+
+class _FakePcm:
+    def info(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def opens():
+    """open_pcm that accepts only 16 kHz mono S16; returns (open_pcm, list of opens)"""
+    performed = []
+
+    def open_pcm(device, channels, rate, sample_format, periodsize):
+        performed.append((channels, rate, sample_format, periodsize))
+        if (channels, rate, sample_format) != (1, 16000, "S16_LE"):
+            raise OSError("unsupported")
+        return _FakePcm()
+    return open_pcm, performed
+
+
+def test_cached_probe_survives_another_client_opening_the_device(proc, opens, tmp_path):
+    open_pcm, performed = opens
+    cache_path = str(tmp_path / "device_probe.json")
+    first = device_probe.load_capabilities("hw:1,0", cache_path, open_pcm=open_pcm)
+    probes = len(performed)
+    assert first.supports(1, 16000, "S16_LE")
+
+    proc['/proc/asound/card1/pcm0c/info'] = PCM_INFO.format(avail=0)  # Someone else has it open
+    second = device_probe.load_capabilities("hw:1,0", cache_path, open_pcm=open_pcm)
+
+    assert len(performed) == probes
+    assert second.identity == first.identity
+    assert second.configs == first.configs
+
+
+def test_different_hardware_is_probed_again(proc, opens, tmp_path):
+    open_pcm, performed = opens
+    cache_path = str(tmp_path / "device_probe.json")
+    first = device_probe.load_capabilities("hw:1,0", cache_path, open_pcm=open_pcm)
+    probes = len(performed)
+
+    proc['/proc/asound/card1/usbid'] = "046d:0825"
+    proc['/proc/asound/card1/pcm0c/info'] = PCM_INFO.format(avail=1).replace("USB Audio", "Webcam")
+    second = device_probe.load_capabilities("hw:1,0", cache_path, open_pcm=open_pcm)
+
+    assert len(performed) > probes
+    assert second.identity != first.identity
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for ModelRegistry's concurrent loading: different models load in
+parallel, acquirers of a model that is still loading share that load
+
+    python -m pytest test_model_registry.py
+"""
+
+import time
+import threading
+import pytest
+import model_registry
+from model_registry import ModelRegistry
+
+LOAD_SECONDS = 0.3
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Slow fake engines; returns the list of (engine, path) loads performed"""
+    performed = []
+
+    def loader(engine):
+        def load(path, compute_type, threads, **options):
+            performed.append((engine, path))
+            time.sleep(LOAD_SECONDS)
+            if path == "missing":
+                raise FileNotFoundError(path)
+            return object()
+        return load
+
+    monkeypatch.setattr(model_registry, 'ENGINES', {
+        'vosk': (loader('vosk'), lambda model: None),
+        'whisper': (loader('whisper'), lambda model: None),
+    })
+    return performed
+
+
+def _acquire_all(registry, requests):
+    """acquire() each (engine, path) on its own thread; returns results (model or exception)"""
+    results = [None] * len(requests)
+
+    def run(i, engine, path):
+        try:
+            results[i] = registry.acquire(engine, path, warm_up=False)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_different_models_load_in_parallel(loads):
+    registry = ModelRegistry()
+    start = time.monotonic()
+    vosk, whisper = _acquire_all(registry, [("vosk", "vosk-model"), ("whisper", "tiny")])
+
+    assert time.monotonic() - start < 1.8 * LOAD_SECONDS
+    assert vosk is not whisper
+    assert registry.loads == 2
+
+
+def test_same_model_loads_once(loads):
+    registry = ModelRegistry()
+    results = _acquire_all(registry, [("whisper", "tiny")] * 4)
+
+    assert loads == [("whisper", "tiny")]
+    assert all(model is results[0] for model in results)
+    assert registry.stats()['models'][0]['refcount'] == 4
+    assert (registry.loads, registry.hits) == (1, 3)
+
+
+def test_failed_load_reaches_every_waiter_and_can_be_retried(loads):
+    registry = ModelRegistry()
+    results = _acquire_all(registry, [("vosk", "missing")] * 3)
+
+    assert len(loads) == 1
+    assert all(isinstance(result, FileNotFoundError) for result in results)
+    assert registry.stats()['models'] == []
+
+    with pytest.raises(FileNotFoundError):
+        registry.acquire("vosk", "missing", warm_up=False)
+    assert len(loads) == 2
+
+
+def test_release_is_not_blocked_by_a_load(loads):
+    registry = ModelRegistry(max_idle_models=0)
+    model = registry.acquire("vosk", "vosk-model", warm_up=False)
+    loader = threading.Thread(target=registry.acquire, args=("whisper", "tiny"), kwargs={'warm_up': False})
+    loader.start()
+    time.sleep(LOAD_SECONDS / 3)
+
+    start = time.monotonic()
+    registry.release(model)
+    assert time.monotonic() - start < LOAD_SECONDS / 3
+    loader.join()
+    assert registry.unloads == 1
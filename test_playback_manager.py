@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for PlaybackManager's period writes: streamed files that need
+resampling reach the device as whole periods with no silence inserted
+between them
+
+    python -m pytest test_playback_manager.py
+"""
+
+import wave
+import numpy as np
+from playback_manager import PlaybackManager, FormatConverter
+
+PERIOD = 256
+
+
+class _FakePcm:
+    """Records every write instead of playing it"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+    def close(self):
+        pass
+
+
+def _write_wav(path, rate, seconds):
+    # Offset tone: every source sample is well away from zero
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (8000 + 6000 * np.sin(2 * np.pi * 440 * t)).astype('<i2')
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(samples.tobytes())
+    return samples.tobytes()
+
+
+def test_streamed_resampled_file_has_no_inserted_silence(tmp_path):
+    path = str(tmp_path / "long.wav")
+    data = _write_wav(path, 44100, 1.0)
+    pcm = _FakePcm()
+    manager = PlaybackManager(periodsize=PERIOD, rate=48000, max_cached_seconds=0,
+                              pcm_factory=lambda manager, *pcm_format: pcm)
+
+    assert manager.play(path).result(timeout=10) is True
+    manager.close()
+
+    # What the converter produces for the file's periods, back to back
+    converter = FormatConverter((1, 44100, "S16_LE"), (1, 48000, "S16_LE"))
+    step = PERIOD * 2
+    expected = b''.join(converter.convert(data[i:i + step]) for i in range(0, len(data), step))
+
+    period_bytes = PERIOD * 2
+    assert all(len(write) == period_bytes for write in pcm.writes)
+    written = b''.join(pcm.writes)
+    assert written[:len(expected)] == expected
+    assert not any(written[len(expected):])  # Only the final period is padded
+    assert len(written) - len(expected) < period_bytes
+
+    samples = np.frombuffer(written[:len(expected)], dtype='<i2')
+    assert np.count_nonzero(samples[PERIOD:] == 0) == 0  # Past the resampler's warm-up
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Tests for model provisioning against a local HTTP server: resumed and
+parallel ranged downloads, checksum rejection, streamed tar extraction
+and the content-addressed store
+
+    python -m pytest test_setup_vosk.py
+"""
+
+import io
+import os
+import re
+import json
+import hashlib
+import tarfile
+import zipfile
+import threading
+import http.server
+import pytest
+import setup_vosk
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the server's files with Range support; can cut transfers short"""
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body):
+        server = self.server
+        data = server.files.get(self.path)
+        rng = self.headers.get('Range')
+        server.requests.append((self.command, self.path, rng))
+        if data is None:
+            self.send_error(404)
+            return
+        start, end = 0, len(data) - 1
+        if rng and server.ranges:
+            match = re.match(r'bytes=(\d+)-(\d*)', rng)
+            start, end = int(match.group(1)), int(match.group(2) or end)
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(data)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        if server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if self.path in server.etags:
+            self.send_header('ETag', f'"{server.etags[self.path]}"')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if not body:
+            return
+
+        payload = data[start:end + 1]
+        with server.lock:
+            cut = server.cut_after.pop(0) if server.cut_after else None
+        if cut is not None and cut < len(payload):
+            # Send part of the body, then drop the connection mid-transfer
+            self.wfile.write(payload[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    httpd.daemon_threads = True
+    httpd.files = {}  # path -> bytes
+    httpd.etags = {}  # path -> value of the ETag header
+    httpd.requests = []  # (method, path, Range header)
+    httpd.cut_after = []  # Byte counts at which the next GETs are cut short
+    httpd.ranges = True
+    httpd.lock = threading.Lock()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(setup_vosk.time, 'sleep', lambda seconds: None)
+
+
+def _payload(size, seed=0):
+    return bytes((i * 31 + seed) % 251 for i in range(size))
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _gets(server, path):
+    return [rng for method, request_path, rng in server.requests if method == 'GET' and request_path == path]
+
+
+def test_download_resumes_after_truncated_transfer(server, tmp_path):
+    data = _payload(1024 * 1024)
+    server.files['/model.bin'] = data
+    server.cut_after = [600000, 300000]  # Two broken transfers before one completes
+    target = str(tmp_path / "model.bin")
+
+    digest = setup_vosk.download_file(server.url + "/model.bin", target, sha256=_sha256(data))
+
+    assert digest == _sha256(data)
+    with open(target, 'rb') as f:
+        assert f.read() == data
+    # Each retry continues from the last whole chunk written to the .part file
+    chunk = setup_vosk.CHUNK_BYTES
+    assert _gets(server, '/model.bin') == [None, f"bytes={2 * chunk}-", f"bytes={3 * chunk}-"]
+    assert not os.path.exists(target + ".part")
+
+
+def test_download_restarts_when_server_ignores_ranges(server, tmp_path):
+    data = _payload(200000)
+    server.files['/model.bin'] = data
+    server.ranges = False
+    server.cut_after = [80000]
+    target = str(tmp_path / "model.bin")
+
+    setup_vosk.download_file(server.url + "/model.bin", target, sha256=_sha256(data))
+
+    with open(target, 'rb') as f:
+        assert f.read() == data
+
+
+def test_download_in_parallel_ranged_pieces(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(setup_vosk, 'MIN_RANGE_BYTES', 64 * 1024)
+    data = _payload(1024 * 1024, seed=7)
+    server.files['/model.bin'] = data
+    server.cut_after = [30000]  # One piece breaks off and resumes
+    target = str(tmp_path / "model.bin")
+
+    setup_vosk.download_file(server.url + "/model.bin", target, sha256=_sha256(data), workers=4)
+
+    with open(target, 'rb') as f:
+        assert f.read() == data
+    ranges = _gets(server, '/model.bin')
+    starts = sorted(int(re.match(r'bytes=(\d+)-', rng).group(1)) for rng in ranges)
+    piece = len(data) // 4
+    assert sorted(set(starts)) == [0, piece, 2 * piece, 3 * piece]
+    assert len(ranges) == 5  # Four pieces, one of them fetched again after breaking off
+    assert not os.path.exists(target + ".part.ranges")
+
+
+def _interrupted_parallel_download(server, target, monkeypatch):
+    """Run a 4-piece download whose every piece breaks off, leaving .part and .part.ranges"""
+    monkeypatch.setattr(setup_vosk, 'MIN_RANGE_BYTES', 64 * 1024)
+    monkeypatch.setattr(setup_vosk, 'RETRIES', 1)
+    server.cut_after = [2 * setup_vosk.CHUNK_BYTES + 1000] * 4  # Two whole chunks land in each piece
+    with pytest.raises(Exception):
+        setup_vosk.download_file(server.url + "/model.bin", target, workers=4)
+    monkeypatch.undo()
+    assert os.path.getsize(target + ".part") == len(server.files['/model.bin'])
+    assert os.path.exists(target + ".part.ranges")
+    server.requests.clear()
+
+
+def test_interrupted_parallel_download_resumes_by_ranges_with_one_worker(server, tmp_path, monkeypatch):
+    data = os.urandom(4 * 1024 * 1024)
+    server.files['/model.bin'] = data
+    target = str(tmp_path / "model.bin")
+    _interrupted_parallel_download(server, target, monkeypatch)
+
+    setup_vosk.download_file(server.url + "/model.bin", target, sha256=_sha256(data), workers=1)
+
+    with open(target, 'rb') as f:
+        assert f.read() == data
+    # Each piece continues from the last whole chunk it wrote
+    piece, resume = len(data) // 4, 2 * setup_vosk.CHUNK_BYTES
+    assert sorted(_gets(server, '/model.bin')) == \
+        sorted(f"bytes={start + resume}-{start + piece - 1}" for start in range(0, len(data), piece))
+    assert not os.path.exists(target + ".part.ranges")
+
+
+def test_interrupted_parallel_download_restarts_when_ranges_are_gone(server, tmp_path, monkeypatch):
+    data = os.urandom(4 * 1024 * 1024)
+    server.files['/model.bin'] = data
+    target = str(tmp_path / "model.bin")
+    _interrupted_parallel_download(server, target, monkeypatch)
+    server.ranges = False  # Sequential download now; the pre-sized .part must not be appended to
+
+    setup_vosk.download_file(server.url + "/model.bin", target, sha256=_sha256(data), workers=4)
+
+    with open(target, 'rb') as f:
+        assert f.read() == data
+    assert _gets(server, '/model.bin') == [None]
+    assert not os.path.exists(target + ".part.ranges")
+
+
+def test_part_longer_than_the_file_is_downloaded_again(server, tmp_path):
+    data = _payload(100000, seed=5)
+    server.files['/model.bin'] = data
+    target = str(tmp_path / "model.bin")
+    with open(target + ".part", 'wb') as f:
+        f.write(_payload(150000, seed=6))  # Left over from a different file
+
+    setup_vosk.download_file(server.url + "/model.bin", target, sha256=_sha256(data))
+
+    with open(target, 'rb') as f:
+        assert f.read() == data
+    assert _gets(server, '/model.bin') == ["bytes=150000-", None]
+
+
+def test_checksum_mismatch_is_rejected(server, tmp_path):
+    server.files['/model.bin'] = _payload(50000)
+    target = str(tmp_path / "model.bin")
+
+    with pytest.raises(setup_vosk.ChecksumError):
+        setup_vosk.download_file(server.url + "/model.bin", target, sha256="0" * 64)
+
+    assert not os.path.exists(target)
+    assert not os.path.exists(target + ".part")
+
+
+def test_advertised_checksum_mismatch_is_rejected(server, tmp_path):
+    server.files['/model.bin'] = _payload(50000)
+    server.etags['/model.bin'] = _sha256(b"something else")
+    target = str(tmp_path / "model.bin")
+
+    with pytest.raises(setup_vosk.ChecksumError):
+        setup_vosk.download_file(server.url + "/model.bin", target)
+    assert not os.path.exists(target)
+
+
+def _tar_gz(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_stream_extract_resumes_with_range(server, tmp_path):
+    # Random-looking data so the compressed archive stays large enough to cut
+    files = {'model/am/final.mdl': os.urandom(200000), 'model/conf/model.conf': b"--sample-frequency=16000\n"}
+    archive = _tar_gz(files)
+    server.files['/model.tar.gz'] = archive
+    server.cut_after = [60000]
+    extract_to = str(tmp_path / "extracted")
+
+    digest = setup_vosk.stream_extract(server.url + "/model.tar.gz", extract_to, sha256=_sha256(archive))
+
+    assert digest == _sha256(archive)
+    for name, data in files.items():
+        with open(os.path.join(extract_to, name), 'rb') as f:
+            assert f.read() == data
+    assert _gets(server, '/model.tar.gz') == [None, "bytes=60000-"]
+
+
+def test_stream_extract_skips_ahead_when_server_ignores_ranges(server, tmp_path):
+    files = {'model/am/final.mdl': os.urandom(200000)}
+    archive = _tar_gz(files)
+    server.files['/model.tar.gz'] = archive
+    server.ranges = False
+    server.cut_after = [60000]
+    extract_to = str(tmp_path / "extracted")
+
+    assert setup_vosk.stream_extract(server.url + "/model.tar.gz", extract_to) == _sha256(archive)
+    with open(os.path.join(extract_to, 'model/am/final.mdl'), 'rb') as f:
+        assert f.read() == files['model/am/final.mdl']
+
+
+def test_stream_extract_rejects_checksum_mismatch(server, tmp_path):
+    server.files['/model.tar.gz'] = _tar_gz({'model/final.mdl': b"weights"})
+
+    with pytest.raises(setup_vosk.ChecksumError):
+        setup_vosk.stream_extract(server.url + "/model.tar.gz", str(tmp_path / "extracted"), sha256="0" * 64)
+
+
+def _publish_whisper(server, repository, files):
+    for name, data in files.items():
+        server.files[f"/Systran/{repository}/resolve/main/{name}"] = data
+
+
+def test_store_deduplicates_with_hard_links(server, tmp_path):
+    shared = {'config.json': b'{"alignment_heads": []}', 'tokenizer.json': b'{"model": {}}'}
+    _publish_whisper(server, "faster-whisper-tiny", {**shared, 'model.bin': _payload(40000, seed=1)})
+    _publish_whisper(server, "faster-whisper-base", {**shared, 'model.bin': _payload(40000, seed=2)})
+    store = setup_vosk.ModelStore(str(tmp_path / "store"))
+
+    tiny = setup_vosk.provision('whisper-tiny', store, base_url=server.url, dest=str(tmp_path / "whisper-tiny"))
+    base = setup_vosk.provision('whisper-base', store, base_url=server.url, dest=str(tmp_path / "whisper-base"))
+
+    # vocabulary.txt isn't published (404) and is skipped
+    assert sorted(os.listdir(tiny)) == ['config.json', 'model.bin', 'tokenizer.json']
+    for name in shared:
+        assert os.stat(os.path.join(tiny, name)).st_ino == os.stat(os.path.join(base, name)).st_ino
+    assert os.stat(os.path.join(tiny, 'model.bin')).st_ino != os.stat(os.path.join(base, 'model.bin')).st_ino
+    objects = [name for _, _, names in os.walk(store.objects) for name in names]
+    assert len(objects) == 4  # Two shared files plus two model.bin
+
+    # Already stored: nothing is fetched again
+    fetched = len(server.requests)
+    setup_vosk.provision('whisper-tiny', store, base_url=server.url, dest=str(tmp_path / "whisper-tiny"))
+    assert len(server.requests) == fetched
+
+
+def test_store_verify_finds_damaged_files(tmp_path):
+    store = setup_vosk.ModelStore(str(tmp_path / "store"))
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "model.bin").write_bytes(b"weights")
+    (tree / "config.json").write_bytes(b"{}")
+    store.add_tree('model', str(tree))
+    assert store.verify('model') == []
+
+    damaged = os.path.join(store.model_path('model'), "model.bin")
+    os.chmod(damaged, 0o644)
+    with open(damaged, 'wb') as f:
+        f.write(b"corrupt")
+    assert store.verify('model') == ['model.bin']
+
+
+def test_provision_zip_archive_from_mirror(server, tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('vosk-model-small-en-us-0.15/am/final.mdl', b"weights")
+        archive.writestr('vosk-model-small-en-us-0.15/conf/model.conf', b"--sample-frequency=16000\n")
+    server.files['/vosk/models/vosk-model-small-en-us-0.15.zip'] = buffer.getvalue()
+    store = setup_vosk.ModelStore(str(tmp_path / "store"))
+    dest = str(tmp_path / "vosk-model")
+
+    setup_vosk.provision('vosk-small-en', store, base_url=server.url, dest=dest)
+
+    assert os.path.islink(dest)
+    with open(os.path.join(dest, 'am', 'final.mdl'), 'rb') as f:
+        assert f.read() == b"weights"
+    assert sorted(json.load(open(os.path.join(store.manifests, 'vosk-small-en.json')))) == \
+        ['am/final.mdl', 'conf/model.conf']
+    assert not os.listdir(store.tmp)  # The archive was removed after extraction
@@ -76,10 +76,10 @@ class WakeWordComparison:
         print("\n🛑 Stopping detectors...")
         
         if self.vosk_detector:
-            self.vosk_detector.stop_listening()
+            self.vosk_detector.close()
         
         if self.whisper_detector:
-            self.whisper_detector.stop_listening()
+            self.whisper_detector.close()
         
         # Show results
         print("\n📊 COMPARISON RESULTS")
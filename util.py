@@ -10,21 +10,36 @@ def create_file(directory, filename, content=""):
 
 def stereo_to_mono(stereo_data, bit_depth=32):
     """Convert stereo PCM audio to mono by averaging left and right channels"""
+    from dsp import downmix
+
     if bit_depth == 16:
-        # Convert stereo bytes to numpy array of int16
-        stereo = np.frombuffer(stereo_data, dtype='<i2')  # little-endian int16
-        # Reshape to [samples, 2] where each row is [left, right]
-        stereo_pairs = stereo.reshape(-1, 2)
-        # Average left and right channels
-        mono = np.mean(stereo_pairs, axis=1, dtype=np.int16)
-        return mono.tobytes()
+        dtype = '<i2'  # little-endian int16
     elif bit_depth == 32:
-        # Convert stereo bytes to numpy array of int32
-        stereo = np.frombuffer(stereo_data, dtype='<i4')  # little-endian int32
-        # Reshape to [samples, 2] where each row is [left, right]
-        stereo_pairs = stereo.reshape(-1, 2)
-        # Average left and right channels
-        mono = np.mean(stereo_pairs, axis=1, dtype=np.int32)
-        return mono.tobytes()
+        dtype = '<i4'  # little-endian int32
     else:
         raise ValueError(f"Unsupported bit depth: {bit_depth}")
+    # Reshape to [samples, 2] where each row is [left, right]
+    stereo_pairs = np.frombuffer(stereo_data, dtype=dtype).reshape(-1, 2)
+    # Average in a wider type (no overflow or truncation), rounded back to the same width
+    return downmix(stereo_pairs).tobytes()
+
+def read_wav_mono(filepath, target_rate=16000):
+    """Load a 16/24/32-bit PCM WAV file as mono float32 in [-1, 1] at target_rate"""
+    import wave
+    from dsp import PcmConverter, PolyphaseResampler
+
+    with wave.open(filepath, 'rb') as file:
+        channels = file.getnchannels()
+        sample_width = file.getsampwidth()
+        rate = file.getframerate()
+        raw = file.readframes(file.getnframes())
+
+    formats = {2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+    if sample_width not in formats:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    mono = PcmConverter(formats[sample_width], channels, mono=True).decode(raw)
+
+    if rate != target_rate:
+        return PolyphaseResampler(rate, target_rate).process(mono).copy()
+    return mono.copy()
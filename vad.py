@@ -0,0 +1,224 @@
+import math
+import collections
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Per-frame speech/non-speech decision from energy and spectral flatness
+
+    Frames must be above an adaptive noise floor by `energy_margin_db` and
+    spectrally "peaky" (flatness below `flatness_threshold`) to count as
+    speech. Very loud frames count regardless of flatness so fricatives
+    aren't clipped. The noise floor falls quickly and rises slowly.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, energy_margin_db=9.0,
+                 loud_margin_db=20.0, flatness_threshold=0.45, min_energy_db=-65.0):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.energy_margin_db = energy_margin_db
+        self.loud_margin_db = loud_margin_db
+        self.flatness_threshold = flatness_threshold
+        self.min_energy_db = min_energy_db
+
+        self.noise_floor_db = None
+        self._window = np.hanning(self.frame_size).astype(np.float32)
+
+    def reset(self):
+        """Forget the learned noise floor"""
+        self.noise_floor_db = None
+
+    def is_speech(self, frame):
+        """Classify one float32 frame normalized to [-1, 1]"""
+        energy_db = 10.0 * math.log10(float(np.dot(frame, frame)) / len(frame) + 1e-12)
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy_db
+        elif energy_db < self.noise_floor_db:
+            # Track quiet passages quickly
+            self.noise_floor_db += 0.5 * (energy_db - self.noise_floor_db)
+        else:
+            # Creep up slowly so sustained speech doesn't become the floor
+            self.noise_floor_db += 0.01 * (energy_db - self.noise_floor_db)
+
+        above_floor = energy_db - self.noise_floor_db
+        if energy_db < self.min_energy_db or above_floor < self.energy_margin_db:
+            return False
+        if above_floor >= self.loud_margin_db:
+            return True
+
+        power = np.abs(np.fft.rfft(frame * self._window)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power))) / np.mean(power)
+        return bool(flatness < self.flatness_threshold)
+
+
+class VadGate:
+    """Streaming gate that forwards only speech regions, with pre/post padding
+
+    Feed arbitrary-length blocks to process(); it returns the samples to pass
+    on to the recognizer (possibly empty). `pre_padding` seconds before
+    speech onset and `post_padding` seconds after the last speech frame are
+    forwarded too, so word edges and the recognizer's endpointing survive.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, pre_padding=0.3, post_padding=0.5,
+                 min_speech_frames=2, dtype=np.float32, **vad_options):
+        self.vad = VoiceActivityDetector(sample_rate, frame_ms, **vad_options)
+        self.sample_rate = sample_rate
+        self.frame_size = self.vad.frame_size
+        self.dtype = np.dtype(dtype)
+        self.pre_frames = max(int(pre_padding * 1000 / frame_ms), min_speech_frames)
+        self.post_frames = int(post_padding * 1000 / frame_ms)
+        self.min_speech_frames = min_speech_frames
+
+        # Input samples are normalized by this before classification
+        self._scale = np.float32(1.0 if self.dtype.kind == 'f' else 1 << (8 * self.dtype.itemsize - 1))
+
+        self.is_open = False
+        self.just_closed = False  # True after a process() call that ended a speech region
+        self.frames_total = 0
+        self.frames_forwarded = 0
+
+        # Stream positions: samples consumed and forwarded so far, plus where each
+        # contiguous forwarded run started in the input (see input_position())
+        self.samples_in = 0
+        self.samples_out = 0
+        self._runs = collections.deque(maxlen=256)  # (output position, input position)
+        self._next_input = None  # Input position that would continue the current run
+
+        self._partial = np.zeros(self.frame_size, dtype=self.dtype)
+        self._partial_len = 0
+        self._frame = np.zeros(self.frame_size, dtype=np.float32)
+        self._lookback = np.zeros((self.pre_frames, self.frame_size), dtype=self.dtype)
+        self._lookback_pos = np.zeros(self.pre_frames, dtype=np.int64)  # Input position of each frame
+        self._lookback_head = 0
+        self._lookback_count = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._out = np.zeros(self.frame_size * 64, dtype=self.dtype)
+
+    @property
+    def skipped_fraction(self):
+        """Fraction of audio seen so far that was not forwarded"""
+        if self.frames_total == 0:
+            return 0.0
+        return 1.0 - self.frames_forwarded / self.frames_total
+
+    @property
+    def silence_seconds(self):
+        """Length of the pause at the end of the current speech region (0 while closed)"""
+        if not self.is_open:
+            return 0.0
+        return self._silence_run * self.frame_size / self.sample_rate
+
+    @property
+    def nbytes(self):
+        """Bytes of sample storage held by the gate (padding frames and output buffer)"""
+        return self._lookback.nbytes + self._out.nbytes + self._partial.nbytes + self._frame.nbytes
+
+    def stats(self):
+        """Counters describing how much audio the gate has held back"""
+        return {
+            'frames_total': self.frames_total,
+            'frames_forwarded': self.frames_forwarded,
+            'skipped_fraction': self.skipped_fraction,
+            'noise_floor_db': self.vad.noise_floor_db,
+            'is_open': self.is_open,
+        }
+
+    def input_position(self, output_position):
+        """Map a position in the forwarded audio back to the input stream position
+
+        Exact for the most recent 256 speech regions; older positions map to
+        the oldest region remembered.
+        """
+        runs = tuple(self._runs)  # Snapshot: callers may run on another thread than process()
+        if not runs:
+            return output_position
+        for out_start, in_start in reversed(runs):
+            if out_start <= output_position:
+                return in_start + (output_position - out_start)
+        out_start, in_start = runs[0]
+        return in_start + (output_position - out_start)
+
+    def reset(self):
+        """Close the gate and drop any buffered audio"""
+        self.is_open = False
+        self.just_closed = False
+        self._partial_len = 0
+        self._lookback_count = 0
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def process(self, samples):
+        """Consume a block of samples and return the samples to forward"""
+        self.just_closed = False
+        out_len = 0
+        offset = 0
+        total = len(samples)
+
+        while offset < total:
+            # Assemble the next full frame from the leftover partial frame and new input
+            take = min(self.frame_size - self._partial_len, total - offset)
+            self._partial[self._partial_len:self._partial_len + take] = samples[offset:offset + take]
+            self._partial_len += take
+            offset += take
+            self.samples_in += take
+            if self._partial_len < self.frame_size:
+                break
+            self._partial_len = 0
+            out_len = self._push_frame(self._partial, self.samples_in - self.frame_size, out_len)
+
+        return self._out[:out_len]
+
+    def _push_frame(self, frame, position, out_len):
+        """Classify one full frame and append whatever should be forwarded to the output"""
+        self.frames_total += 1
+        np.divide(frame, self._scale, out=self._frame, casting='unsafe')
+        speech = self.vad.is_speech(self._frame)
+
+        if self.is_open:
+            out_len = self._emit(frame, position, out_len)
+            if speech:
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+                if self._silence_run > self.post_frames:
+                    self.is_open = False
+                    self.just_closed = True
+                    self._speech_run = 0
+            return out_len
+
+        # Remember recent frames so they can be released as pre-padding
+        self._lookback[self._lookback_head] = frame
+        self._lookback_pos[self._lookback_head] = position
+        self._lookback_head = (self._lookback_head + 1) % self.pre_frames
+        self._lookback_count = min(self._lookback_count + 1, self.pre_frames)
+
+        self._speech_run = self._speech_run + 1 if speech else 0
+        if self._speech_run >= self.min_speech_frames:
+            # Speech onset: release the pre-padding (which includes the onset frames)
+            self.is_open = True
+            self._silence_run = 0
+            first = self._lookback_head - self._lookback_count
+            for i in range(self._lookback_count):
+                slot = (first + i) % self.pre_frames
+                out_len = self._emit(self._lookback[slot], int(self._lookback_pos[slot]), out_len)
+            self._lookback_count = 0
+        return out_len
+
+    def _emit(self, frame, position, out_len):
+        """Append a frame (starting at input `position`) to the reusable output buffer"""
+        if position != self._next_input:
+            self._runs.append((self.samples_out, position))
+        self._next_input = position + self.frame_size
+        self.samples_out += self.frame_size
+
+        end = out_len + self.frame_size
+        if end > len(self._out):
+            grown = np.zeros(max(end, 2 * len(self._out)), dtype=self.dtype)
+            grown[:out_len] = self._out[:out_len]
+            self._out = grown
+        self._out[out_len:end] = frame
+        self.frames_forwarded += 1
+        return end
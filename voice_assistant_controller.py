@@ -1,38 +1,139 @@
-import time
 import threading
-from wake_word_detector import WakeWordDetector
+from metrics import format_stats
+from model_registry import ModelRegistry
+from memory import PROFILES, check_budget, planned_models, profile_options, snapshot, format_snapshot
+
+# Wake word engines; only the selected one's stack (vosk or faster-whisper) is ever imported.
+# "cascade" runs Vosk on everything and Whisper only on the candidates Vosk nominates
+BACKENDS = ("vosk", "whisper", "cascade")
+
+
+def create_detector(backend="vosk", **options):
+    """Build the wake word detector for a backend, importing its engine on demand"""
+    if backend == "vosk":
+        from wake_word_detector import WakeWordDetector
+        return WakeWordDetector(**options)
+    if backend == "whisper":
+        from whisper_detection import WhisperWakeWordDetector
+        return WhisperWakeWordDetector(**options)
+    if backend == "cascade":
+        from cascade_detector import CascadeWakeWordDetector
+        return CascadeWakeWordDetector(**options)
+    raise ValueError(f"Unknown wake word backend: {backend}")
+
+
+def create_recorder(profile="default", **options):
+    """RecordingManager with a profile's buffer caps (explicit options take precedence)"""
+    from recording_manager import RecordingManager
+    return RecordingManager(**{**profile_options(profile, 'recording'), **options})
+
+
+def create_player(profile="default", **options):
+    """PlaybackManager with a profile's clip cache limits (explicit options take precedence)"""
+    from playback_manager import PlaybackManager
+    return PlaybackManager(**{**profile_options(profile, 'playback'), **options})
+
 
 class VoiceAssistantController:
     """Main controller for the voice assistant system"""
     
-    def __init__(self, wake_words=["hey furby", "hey assistant"]):
+    def __init__(self, wake_words=["hey furby", "hey assistant"], stats_interval=300, backend="vosk",
+                 model_path=None, verifier_model=None, profile="default", memory_budget_mb=None,
+                 device=None):
         self.wake_words = wake_words
+        self.backend = backend
+        self.model_path = model_path  # None uses the backend's default model
+        self.verifier_model = verifier_model  # Whisper model size for the cascade backend
+        self.device = device  # ALSA capture device; None uses the detector's default (hw:0,0)
+        self.stats_interval = stats_interval  # Seconds between pipeline summaries (None to disable)
+        
+        # A profile presets model choices and buffer caps (see memory.PROFILES); the budget
+        # is checked before any model loads and also bounds the models kept loaded
+        self.profile = profile
+        self.memory_budget_mb = memory_budget_mb or PROFILES[profile].get('memory_budget_mb')
         self.wake_word_detector = None
+        self.recorder = None  # Built on demand by setup_recorder() / setup_player()
+        self.player = None
         self.is_listening = False
+        self._stop_event = threading.Event()
         
         # Initialize wake word detector
         self.setup_wake_word_detector()
     
     def setup_wake_word_detector(self):
         """Initialize the wake word detector"""
+        options = profile_options(self.profile, 'detector', self.backend)
+        options['wake_words'] = self.wake_words
+        if self.model_path:
+            options['model_path'] = self.model_path
+        if self.backend == "cascade" and self.verifier_model:
+            options['verifier_model'] = self.verifier_model
+        if self.device:
+            options['device'] = self.device
+        
+        # Fail before loading anything if the models can't fit (raises MemoryBudgetError)
+        if self.memory_budget_mb:
+            check_budget(self.memory_budget_mb, planned_models(self.backend, options))
+        registry = ModelRegistry.shared()
+        registry.max_idle_models = profile_options(self.profile, 'registry').get('max_idle_models',
+                                                                                 registry.max_idle_models)
+        if self.memory_budget_mb:
+            registry.memory_budget = self.memory_budget_mb * 1024 * 1024
+        
         try:
-            self.wake_word_detector = WakeWordDetector(wake_words=self.wake_words)
+            # The model loads in the background so capture can start right away
+            self.wake_word_detector = create_detector(self.backend, load_in_background=True, **options)
             self.wake_word_detector.set_wake_word_callback(self.on_wake_word_detected)
             print("✅ Wake word detector initialized")
         except Exception as e:
             print(f"❌ Error initializing wake word detector: {e}")
             self.wake_word_detector = None
     
+    def setup_recorder(self, **options):
+        """Recording manager sharing the detector's capture stream, capped by the profile"""
+        if not self.recorder:
+            if self.wake_word_detector:
+                options.setdefault('audio_bus', self.wake_word_detector.audio_bus)
+            elif self.device:
+                options.setdefault('device', self.device)
+            self.recorder = create_recorder(self.profile, **options)
+        return self.recorder
+    
+    def setup_player(self, **options):
+        """Playback manager whose clip cache is capped by the profile"""
+        if not self.player:
+            self.player = create_player(self.profile, **options)
+        return self.player
+    
     def on_wake_word_detected(self, text):
         """Called when wake word is detected"""
         print(f"🎤 Wake word detected: '{text}'")
+        detection = self.wake_word_detector.last_detection
+        if detection and not detection.get('precise_end', True):
+            print("⚠️ No word timings for the wake phrase; the prompt may miss its first words")
         
-        # TODO: Add prompt recording here
-        # TODO: Add backend communication here
-        
-        # For now, just log the detection
+        # The prompt starts where the wake phrase ended (already in the lookback ring) and
+        # ends on trailing silence; read it on its own thread, since this callback runs on
+        # the thread that keeps filling the ring
+        prompt = self.wake_word_detector.open_prompt()
+        threading.Thread(target=self._capture_prompt, args=(prompt,), name="prompt-capture",
+                         daemon=True).start()
+    
+    def _capture_prompt(self, prompt):
+        """Collect the spoken prompt and hand it on"""
+        audio = prompt.read_all()
+        latency = prompt.finished_at - prompt.opened_at if prompt.finished_at else 0.0
+        print(f"📝 Prompt captured: {prompt.duration:.2f}s ({prompt.end_reason}), "
+              f"endpointed {latency:.2f}s after the wake word")
+        if prompt.speech_started:
+            self.handle_prompt(audio)
         print("👂 Continuing to listen for wake words...")
     
+    def handle_prompt(self, audio):
+        """Process a captured prompt (mono samples at the detector's rate)"""
+        # TODO: Add backend communication here
+        pass
+    
     def listen(self):
         """Start the voice assistant listening loop"""
         if not self.wake_word_detector:
@@ -43,22 +144,40 @@ class VoiceAssistantController:
         print("👂 Listening for wake words:", self.wake_words)
         
         # Start wake word detection
+        self._stop_event.clear()
         self.wake_word_detector.start_listening()
         self.is_listening = True
         
         try:
-            # Keep the main thread alive
-            while self.is_listening:
-                time.sleep(1)
+            # Keep the main thread alive until stop() is called, summarizing periodically
+            while not self._stop_event.wait(self.stats_interval):
+                self.print_stats()
         except KeyboardInterrupt:
             self.stop()
     
+    def print_stats(self):
+        """Print a summary of detector stage timings and counters"""
+        if not self.wake_word_detector:
+            return
+        print("📊 Wake word pipeline stats:")
+        print(format_stats(self.wake_word_detector.stats()))
+        memory = snapshot({'detector': self.wake_word_detector, 'models': ModelRegistry.shared(),
+                           'recorder': self.recorder, 'player': self.player})
+        print(f"🧠 Memory: {format_snapshot(memory, self.memory_budget_mb)}")
+    
     def stop(self):
         """Stop the voice assistant"""
         print("🛑 Stopping Voice Assistant Controller...")
         self.is_listening = False
+        self._stop_event.set()
         
         if self.wake_word_detector:
             self.wake_word_detector.stop_listening()
+            self.print_stats()
+            self.wake_word_detector.close()
+        if self.recorder and self.recorder.recording:
+            self.recorder.stop_recording()
+        if self.player:
+            self.player.close()
         
         print("✅ Voice Assistant Controller stopped")
@@ -1,35 +1,111 @@
 import json
 import time
 import threading
-import alsaaudio
-import vosk
 import numpy as np
+from audio_bus import AudioBus, Gap
+from vad import VadGate
+from ring_buffer import RingBuffer
+from prompt_capture import PromptStream, find_phrase_end
+from phrase_index import PhraseIndex
+from metrics import Metrics, merge_stats, now_ns
+from model_registry import ModelRegistry
 
 class WakeWordDetector:
     """Wake word detection service using Vosk model"""
     
-    def __init__(self, model_path="vosk-model", wake_words=["hey assistant", "hey furby"], sample_rate=16000):
+    def __init__(self, model_path="vosk-model", wake_words=["hey assistant", "hey furby"], sample_rate=16000, audio_bus=None, use_vad=True, use_grammar=True,
+                 model_registry=None, load_in_background=False, startup_buffer_seconds=15.0,
+                 lookback_seconds=10.0, device="hw:0,0"):
         self.model_path = model_path
         self.wake_words = [word.lower() for word in wake_words]
+        self.phrase_index = PhraseIndex(self.wake_words)  # Rebuilt whenever the list changes
         self.sample_rate = sample_rate
-        self.device = "hw:0,0"
+        self.device = device  # Capture device when no audio_bus is given
         self.is_listening = False
         self.wake_word_callback = None
         
+        # Shared capture stream (one device open for every consumer)
+        self.audio_bus = audio_bus or AudioBus.shared(self.device)
+        self.subscription = None
+        self.listening_thread = None
+        
+        # Only speech regions (plus padding) reach the recognizer when VAD is enabled
+        self.vad_gate = VadGate(sample_rate=sample_rate, dtype=np.int16) if use_vad else None
+        
+        # Every captured sample (before VAD) stays available for a few seconds, addressed by
+        # stream position, so the prompt after a wake word can start exactly where it ended
+        self.lookback = RingBuffer(int(lookback_seconds * sample_rate), dtype=np.int16)
+        self._lookback_cond = threading.Condition()
+        self.last_detection = None  # {'text', 'end_sample', 'precise_end', 'detected_sample', 'time'}
+        self._fed = 0  # Samples fed to the recognizer since it was created (Vosk's time base)
+        
+        # In grammar mode the recognizer only knows the wake phrases (plus [unk]),
+        # and partial results are checked on every chunk so it fires mid-utterance
+        self.use_grammar = use_grammar
+        self.rec_lock = threading.RLock()
+        
+        # Always-on stage timings and counters (see stats())
+        self.metrics = Metrics()
+        self._vad_timer = self.metrics.stage('vad')
+        self._recognizer_timer = self.metrics.stage('recognizer')
+        self._result_timer = self.metrics.stage('result')  # Result()/PartialResult() decoding
+        self._callback_timer = self.metrics.stage('callback')
+        
+        # Models are shared process-wide, so a second detector or a restart doesn't reload
+        self.model_registry = model_registry or ModelRegistry.shared()
+        
+        # With load_in_background, capture can start while the model is still loading;
+        # the subscription buffers up to startup_buffer_seconds until it is ready
+        self.model_ready = threading.Event()
+        self.startup_buffer_seconds = startup_buffer_seconds
+        
         # Initialize Vosk model
         self.model = None
         self.rec = None
-        self.setup_model()
+        if load_in_background:
+            threading.Thread(target=self.setup_model, name="vosk-model-load", daemon=True).start()
+        else:
+            self.setup_model()
     
     def setup_model(self):
         """Initialize the Vosk model"""
         try:
-            self.model = vosk.Model(self.model_path)
-            self.rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
+            self.model = self.model_registry.acquire("vosk", self.model_path)
+            self.rec = self._create_recognizer()
             print(f"Vosk model loaded from {self.model_path}")
         except Exception as e:
             print(f"Error loading Vosk model: {e}")
             print("Please ensure Vosk model is installed and path is correct")
+        finally:
+            self.model_ready.set()
+    
+    def _grammar(self):
+        """JSON grammar of the wake phrases; [unk] soaks up everything else"""
+        return json.dumps(self.wake_words + ["[unk]"])
+    
+    def _create_recognizer(self):
+        """Build a recognizer (grammar-constrained in wake-word mode)"""
+        import vosk
+        if self.use_grammar:
+            rec = vosk.KaldiRecognizer(self.model, self.sample_rate, self._grammar())
+        else:
+            rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        # Word timings locate the end of the wake phrase (partial words need vosk >= 0.3.45)
+        rec.SetWords(True)
+        if hasattr(rec, 'SetPartialWords'):
+            rec.SetPartialWords(True)
+        self._fed = 0
+        return rec
+    
+    def set_wake_words(self, wake_words):
+        """Swap the wake word list at runtime without reloading the Vosk model"""
+        with self.rec_lock:
+            self.wake_words = [word.lower() for word in wake_words]
+            self.phrase_index = PhraseIndex(self.wake_words)
+            if self.rec and self.use_grammar:
+                self.rec.SetGrammar(self._grammar())
+                self.rec.Reset()
+        print(f"Wake words updated: {self.wake_words}")
     
     def set_wake_word_callback(self, callback):
         """Set callback function to be called when wake word is detected"""
@@ -37,106 +113,228 @@ class WakeWordDetector:
     
     def start_listening(self):
         """Start continuous listening for wake words"""
-        if not self.model:
+        if self.model_ready.is_set() and not self.model:
             print("Cannot start listening - model not loaded")
             return
         
+        if self.listening_thread and self.listening_thread.is_alive():
+            return
+        
         self.is_listening = True
         print("Starting wake word detection...")
         
+        # Receive 16kHz mono 16-bit audio from the shared capture stream
+        self.subscription = self.audio_bus.subscribe("vosk", channels=1, rate=self.sample_rate,
+                                                     sample_format="S16_LE",
+                                                     max_periods=self._queue_periods())
+        
         # Start listening in a separate thread
-        listening_thread = threading.Thread(target=self._listen_loop)
-        listening_thread.daemon = True
-        listening_thread.start()
+        self.listening_thread = threading.Thread(target=self._listen_loop)
+        self.listening_thread.daemon = True
+        self.listening_thread.start()
+    
+    def _queue_periods(self):
+        """Subscription depth: room for the startup backlog if the model is still loading"""
+        if self.model_ready.is_set():
+            return 64
+        periods_per_second = self.audio_bus.rate / self.audio_bus.periodsize
+        return max(64, int(self.startup_buffer_seconds * periods_per_second) + 1)
     
     def stop_listening(self):
         """Stop listening for wake words"""
         self.is_listening = False
+        if self.subscription:
+            # Closing the subscription wakes the listening thread immediately
+            self.subscription.close()
+            self.subscription = None
+        if self.listening_thread and self.listening_thread is not threading.current_thread():
+            self.listening_thread.join()
+        self.listening_thread = None
+        with self._lookback_cond:
+            # Let open prompt streams see that capture has stopped
+            self._lookback_cond.notify_all()
+        if self.vad_gate:
+            print(f"VAD skipped {self.vad_gate.skipped_fraction:.1%} of audio")
         print("Stopping wake word detection...")
     
+    def close(self):
+        """Stop listening and give the model back to the registry"""
+        self.stop_listening()
+        self.model_ready.wait()  # A background load still has to be released
+        with self.rec_lock:
+            self.rec = None
+        if self.model:
+            self.model_registry.release(self.model)
+            self.model = None
+    
     def _listen_loop(self):
         """Main listening loop - runs continuously"""
+        subscription = self.subscription
         try:
-            # Open audio device for capture at native 48kHz stereo
-            audio = alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NONBLOCK,
-                                 channels=2, rate=48000, 
-                                 format=alsaaudio.PCM_FORMAT_S16_LE,
-                                 periodsize=1024, device=self.device)
+            # Audio captured meanwhile waits in the subscription queue
+            while self.is_listening and not self.model_ready.wait(0.1):
+                pass
+            if not self.model:
+                print("Wake word detection not started - model failed to load")
+                return
             
             print("Wake word detection active...")
             
             while self.is_listening:
-                # Read audio data
-                length, data = audio.read()
+                # Wait for the next 16kHz mono period from the audio bus
+                processed_data = subscription.read(timeout=0.1)
                 
-                if length > 0 and self.rec:
-                    # Process 48kHz stereo audio to 16kHz mono for Vosk
-                    processed_data = self._process_audio_for_vosk(data)
+                if isinstance(processed_data, Gap):
+                    self._on_gap(processed_data)
+                elif processed_data and self.rec:
+                    samples = np.frombuffer(processed_data, dtype=np.int16)
+                    with self._lookback_cond:
+                        self.lookback.write(samples)
+                        self._lookback_cond.notify_all()
                     
-                    if processed_data:
-                        # Process audio through Vosk
-                        if self.rec.AcceptWaveform(processed_data):
-                            # Get recognition result
-                            result = json.loads(self.rec.Result())
-                            text = result.get('text', '').lower()
-                            
-                            if text:
-                                print(f"Heard: {text}")
-                                
-                                # Check for wake words
-                                if self._contains_wake_word(text):
-                                    print(f"Wake word detected: {text}")
-                                    if self.wake_word_callback:
-                                        self.wake_word_callback(text)
-                
-                time.sleep(0.01)  # Small delay to prevent busy waiting
+                    if self.vad_gate:
+                        # Forward only speech regions to Vosk
+                        start = now_ns()
+                        speech = self.vad_gate.process(samples)
+                        self._vad_timer.record(now_ns() - start)
+                        if len(speech):
+                            self._accept_audio(speech.tobytes())
+                        if self.vad_gate.just_closed:
+                            # Speech ended - flush whatever Vosk hasn't endpointed yet
+                            with self.rec_lock:
+                                start = now_ns()
+                                result = self.rec.FinalResult()
+                                self._result_timer.record(now_ns() - start)
+                                self._handle_result(result)
+                    else:
+                        self._accept_audio(processed_data)
         
         except Exception as e:
             print(f"Error in listening loop: {e}")
-        finally:
-            try:
-                audio.close()
-            except:
-                pass
     
-    def _process_audio_for_vosk(self, raw_data):
-        """Process 48kHz stereo audio to 16kHz mono for Vosk"""
-        try:
-            # Convert raw bytes to numpy array (16-bit stereo)
-            stereo_data = np.frombuffer(raw_data, dtype=np.int16)
-            
-            if len(stereo_data) == 0:
-                return b''
-            
-            # Reshape to stereo (2 channels) 
-            if len(stereo_data) % 2 != 0:
-                # Odd number of samples, trim one
-                stereo_data = stereo_data[:-1]
-            
-            stereo_data = stereo_data.reshape(-1, 2)
-            
-            # Convert stereo to mono (average channels)
-            mono_data = np.mean(stereo_data, axis=1).astype(np.int16)
-            
-            # Resample from 48000 Hz to 16000 Hz (3:1 ratio)
-            # Simple decimation: take every 3rd sample
-            if len(mono_data) >= 3:
-                resampled_data = mono_data[::3]
-            else:
-                resampled_data = mono_data
-            
-            return resampled_data.tobytes()
+    def _on_gap(self, gap):
+        """Audio is missing here: drop the partial hypothesis so nothing is decoded across the hole"""
+        self.metrics.count(f'gaps_{gap.reason}')
+        with self.rec_lock:
+            if self.rec:
+                # Vosk keeps its time base across Reset(), so _fed stays valid
+                self.rec.Reset()
+        if self.vad_gate:
+            self.vad_gate.reset()
+    
+    def _accept_audio(self, data):
+        """Feed a chunk to Vosk and check the final or partial result"""
+        with self.rec_lock:
+            start = now_ns()
+            endpoint = self.rec.AcceptWaveform(data)
+            self._recognizer_timer.record(now_ns() - start)
+            self._fed += len(data) // 2
+            if endpoint:
+                # Get recognition result
+                start = now_ns()
+                result = self.rec.Result()
+                self._result_timer.record(now_ns() - start)
+                self._handle_result(result)
+            elif self.use_grammar:
+                # Fire as soon as the phrase is decoded instead of waiting for an endpoint
+                start = now_ns()
+                result = json.loads(self.rec.PartialResult())
+                self._result_timer.record(now_ns() - start)
+                partial = result.get('partial', '').lower()
+                wake_word = partial and self._matched_wake_word(partial)
+                if wake_word:
+                    self.rec.Reset()
+                    self._on_wake_word(partial, *self._phrase_end(result.get('partial_result'), wake_word))
+    
+    def _handle_result(self, result_json):
+        """Check a Vosk result for wake words and fire the callback"""
+        result = json.loads(result_json)
+        text = result.get('text', '').lower()
+        
+        if text:
+            print(f"Heard: {text}")
             
-        except Exception as e:
-            print(f"⚠️ Audio processing error: {e}")
-            return b''
+            # Check for wake words
+            wake_word = self._matched_wake_word(text)
+            if wake_word:
+                self._on_wake_word(text, *self._phrase_end(result.get('result'), wake_word))
+    
+    def _phrase_end(self, words, wake_word):
+        """(stream position where the wake phrase ended, whether Vosk word timings located it)"""
+        end = find_phrase_end([(word['word'], word['end']) for word in words or []], wake_word,
+                              self.phrase_index)
+        # Without timings, the phrase ended somewhere in the chunk just decoded
+        fed_position = int(end * self.sample_rate) if end is not None else self._fed
+        # Vosk only heard the VAD-forwarded audio; map back to the full stream
+        if self.vad_gate:
+            fed_position = self.vad_gate.input_position(fed_position)
+        return fed_position, end is not None
+    
+    def _on_wake_word(self, text, end_sample, precise_end=True):
+        """Report a detection"""
+        print(f"Wake word detected: {text}")
+        self.last_detection = {
+            'text': text,
+            'end_sample': end_sample,
+            'precise_end': precise_end,
+            'detected_sample': self.lookback.written,
+            'time': time.time(),
+        }
+        self.metrics.count('detections')
+        if self.wake_word_callback:
+            start = now_ns()
+            self.wake_word_callback(text)
+            self._callback_timer.record(now_ns() - start)
+    
+    def stats(self):
+        """Stage timings (read -> callback) and counters for the whole pipeline"""
+        subscription = self.subscription
+        stats = merge_stats(self.audio_bus.stats(),
+                            subscription.stats() if subscription else None,
+                            self.metrics.stats())
+        if self.vad_gate:
+            stats['counters']['vad_skipped_fraction'] = round(self.vad_gate.skipped_fraction, 3)
+        return stats
+    
+    def memory_footprint(self):
+        """Bytes held by the capture queue, VAD and lookback ring (the model is the registry's)"""
+        subscription = self.subscription
+        footprint = {
+            'capture_queue': subscription.pending_bytes() if subscription else 0,
+            'lookback': self.lookback.nbytes,
+        }
+        if self.vad_gate:
+            footprint['vad'] = self.vad_gate.nbytes
+        return footprint
+    
+    def open_prompt(self, start=None, **options):
+        """Stream the audio after the last wake word until the speaker stops
+
+        Starts at the end of the wake phrase (or `start`, a stream position)
+        and is read from the lookback ring, so words spoken before the
+        callback ran are not lost. Options go to PromptStream. Read it from
+        a thread other than the callback's - the callback runs on the
+        listening thread, which is what fills the ring.
+        """
+        if start is None:
+            detection = self.last_detection
+            start = detection['end_sample'] if detection else self.lookback.written
+        noise_floor_db = self.vad_gate.vad.noise_floor_db if self.vad_gate else None
+        return PromptStream(self.lookback, self._lookback_cond, start, self.sample_rate,
+                            is_active=lambda: self.is_listening, noise_floor_db=noise_floor_db, **options)
+    
+    def _matched_wake_word(self, text):
+        """The wake word found in text (exactly or as a near-miss), or None"""
+        match = self.phrase_index.best(text)
+        if not match:
+            return None
+        if not match.exact:
+            print(f"Near-miss wake word: '{text}' ~ '{match.phrase}' (score {match.score:.2f})")
+        return match.phrase
     
     def _contains_wake_word(self, text):
         """Check if text contains any of the wake words"""
-        for wake_word in self.wake_words:
-            if wake_word in text:
-                return True
-        return False
+        return self._matched_wake_word(text) is not None
 
 # Example usage
 if __name__ == "__main__":
@@ -152,5 +350,5 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        detector.stop_listening()
+        detector.close()
         print("Wake word detection stopped") 
\ No newline at end of file
@@ -0,0 +1,153 @@
+import time
+import threading
+import collections
+from concurrent.futures import Future
+import numpy as np
+from whisper_pool import Segment
+
+
+class WhisperBatcher:
+    """Combines transcribe() calls from several streams into batched Whisper calls
+
+    Whisper's encoder always runs on a padded 30 s input, however short the
+    window, so N windows encoded together cost far less than N separate
+    calls. Requests that arrive within max_wait of each other (up to
+    max_batch) are stacked into one encode + greedy generate on the
+    underlying ctranslate2 model. Batched results carry text only (the
+    segment spans the whole window, no word timings), so a request asking
+    for word_timestamps - a detector aligning the window that matched - or
+    one that ends up alone goes through the model's normal transcribe()
+    with all its options. transcribe() matches WhisperModel.transcribe(),
+    so detectors can use a batcher in place of a model.
+    """
+
+    def __init__(self, model, max_batch=4, max_wait=0.05, language="en", sample_rate=16000, max_length=128):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.language = language
+        self.sample_rate = sample_rate
+        self.max_length = max_length  # Tokens per window; wake word windows are short
+
+        self.batches = 0
+        self.windows = 0
+        self.fallbacks = 0  # Windows transcribed on their own
+        self._batching = True  # Cleared if the installed faster-whisper lacks the internals used
+        self._tokenizer = None
+        self._padded = None
+
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self._thread = threading.Thread(target=self._batch_loop, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def transcribe(self, audio, **options):
+        """Queue one window and block until its batch has run; returns (segments, info)"""
+        future = Future()
+        with self._cond:
+            if self.closed:
+                raise RuntimeError("Whisper batcher is closed")
+            self._pending.append((audio, options, future))
+            self._cond.notify_all()
+        return future.result()
+
+    def _batch_loop(self):
+        """Collect up to max_batch requests (waiting at most max_wait) and run them"""
+        while True:
+            with self._cond:
+                while not self._pending and not self.closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            self._run(batch)
+
+    def _run(self, batch):
+        # Word timings need the model's own transcribe()
+        aligned = [request for request in batch if request[1].get('word_timestamps')]
+        if aligned:
+            self._run_each(aligned)
+            batch = [request for request in batch if not request[1].get('word_timestamps')]
+        if not batch:
+            return
+        if len(batch) == 1 or not self._batching:
+            self._run_each(batch)
+            return
+        try:
+            texts = self._transcribe_batch([audio for audio, _, _ in batch])
+        except (AttributeError, TypeError, ImportError) as e:
+            print(f"⚠️ Batched Whisper unavailable ({e}); transcribing windows one at a time")
+            self._batching = False
+            self._run_each(batch)
+            return
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.windows += len(batch)
+        for (audio, _, future), text in zip(batch, texts):
+            future.set_result(([Segment(text, 0.0, len(audio) / self.sample_rate, [])], None))
+
+    def _run_each(self, batch):
+        for audio, options, future in batch:
+            self.fallbacks += 1
+            try:
+                segments, info = self.model.transcribe(audio, **options)
+                future.set_result((list(segments), info))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _transcribe_batch(self, windows):
+        """One encoder + greedy decoder pass over several windows; returns their texts"""
+        import ctranslate2
+        from faster_whisper.tokenizer import Tokenizer
+
+        model = self.model
+        extractor = model.feature_extractor
+        if self._tokenizer is None:
+            self._tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual,
+                                        task="transcribe", language=self.language)
+            self._padded = np.zeros((self.max_batch, extractor.n_samples), dtype=np.float32)
+
+        # Pad every window to Whisper's 30 s input ourselves (the extractor's padding
+        # argument changed meaning between faster-whisper releases)
+        padded = self._padded[:len(windows)]
+        padded.fill(0.0)
+        for row, window in zip(padded, windows):
+            row[:len(window)] = window
+        features = np.stack([extractor(row, padding=0)[:, :extractor.nb_max_frames] for row in padded])
+
+        prompt = model.get_prompt(self._tokenizer, [], without_timestamps=True)
+        results = model.model.generate(ctranslate2.StorageView.from_array(np.ascontiguousarray(features)),
+                                       [prompt] * len(windows), beam_size=1, max_length=self.max_length,
+                                       suppress_blank=True)
+        return [self._tokenizer.decode(result.sequences_ids[0]).strip() for result in results]
+
+    def stats(self):
+        """Batch counters"""
+        return {
+            'batches': self.batches,
+            'batched_windows': self.windows,
+            'mean_batch_size': round(self.windows / self.batches, 2) if self.batches else 0.0,
+            'unbatched_windows': self.fallbacks,
+        }
+
+    def memory_footprint(self):
+        """Bytes of the padded batch input (allocated on the first batched call)"""
+        return {'padded_batch': self._padded.nbytes if self._padded is not None else 0}
+
+    def close(self):
+        """Finish queued requests and stop the batching thread"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._thread.join()
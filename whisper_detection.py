@@ -1,43 +1,144 @@
 import json
 import time
 import threading
-import alsaaudio
 import numpy as np
-import io
-import wave
-from faster_whisper import WhisperModel
+from audio_bus import AudioBus, Gap
+from ring_buffer import RingBuffer
+from vad import VadGate
+from prompt_capture import PromptStream, align_phrase_end
+from phrase_index import PhraseIndex
+from inference_queue import InferenceQueue, DROP_OLDEST
+from metrics import Metrics, merge_stats, now_ns
+from model_registry import ModelRegistry
 
 class WhisperWakeWordDetector:
     """Wake word detection service using Faster-Whisper model"""
     
-    def __init__(self, model_path="base", wake_words=["hey furby", "hey assistant"], sample_rate=16000):
+    def __init__(self, model_path="base", wake_words=["hey furby", "hey assistant"], sample_rate=16000, audio_bus=None, use_vad=True,
+                 num_workers=1, max_pending_windows=2, queue_policy=DROP_OLDEST, model_registry=None,
+                 load_in_background=False, startup_buffer_seconds=15.0, lookback_seconds=10.0,
+                 max_segment_seconds=4.0, min_segment_seconds=1.0, pause_seconds=0.25,
+                 overlap_seconds=1.0, refractory_seconds=2.0, num_processes=0, cpu_threads=None,
+                 cpu_affinity=None, transcriber=None, device="hw:0,0", fuzzy_match=False):
         self.model_path = model_path
         self.wake_words = [word.lower() for word in wake_words]
+        # Whisper transcribes open vocabulary, so near-misses ("hey ferby") are opt-in:
+        # accepting them raises the false trigger rate
+        self.phrase_index = PhraseIndex(self.wake_words, fuzzy=fuzzy_match)
         self.sample_rate = sample_rate
-        self.device = "hw:0,0"
+        self.device = device  # Capture device when no audio_bus is given
         self.is_listening = False
         self.wake_word_callback = None
         
-        # Audio buffer for processing chunks
-        self.audio_buffer = bytearray()
-        self.buffer_duration = 3.0  # Process 3 seconds of audio at a time
-        self.buffer_size = int(self.sample_rate * self.buffer_duration * 2)  # 16-bit samples
+        # Shared capture stream (one device open for every consumer)
+        self.audio_bus = audio_bus or AudioBus.shared(self.device)
+        self.subscription = None
+        self.listening_thread = None
+        
+        # Fixed-size ring of float32 samples; segments are handed to Whisper as views into it.
+        # A segment closes at a pause in speech (or when speech ends), so each utterance is
+        # decoded once; only a segment cut at max_segment_seconds overlaps the next one
+        self.buffer_size = int(self.sample_rate * max_segment_seconds)  # Longest segment
+        self.min_segment_size = int(self.sample_rate * min_segment_seconds)  # Shortest one a pause may close
+        self.pause_seconds = pause_seconds
+        self.overlap_size = int(self.sample_rate * overlap_seconds)
+        self.window_start = 0  # Stream position of the next segment to queue
+        self.decoded_until = 0  # Stream position up to which audio has been queued for transcription
+        self.min_flush_size = int(self.sample_rate * 0.3)  # Shortest tail worth transcribing
+        self.samples_queued = 0
+        self.samples_requeued = 0  # Queued audio that an earlier segment already covered
+        
+        # A wake word seen in two overlapping segments ends at (almost) the same stream
+        # position; detections closer than the refractory period to the last one are dropped
+        self.refractory_size = int(self.sample_rate * refractory_seconds)
+        self._last_detection_end = None
+        self._detection_lock = threading.Lock()
+        
+        # Inference runs on worker threads fed by a bounded queue of ring windows,
+        # so the capture thread never waits on the model. With num_processes the model runs
+        # in separate processes instead (see WhisperPool), one thread feeding each
+        self.num_processes = num_processes
+        self.cpu_threads = cpu_threads
+        self.cpu_affinity = cpu_affinity  # One list of cores per process, e.g. [[2], [3]]
+        self.num_workers = max(num_workers, num_processes)
+        
+        # Anything with WhisperModel.transcribe() that is shared with other detectors
+        # (e.g. a WhisperBatcher); used instead of loading a model, and never released here
+        self.transcriber = transcriber
+        self.worker_threads = []
+        
+        # The ring must hold every pending window plus one in flight per worker
+        ring_windows = max_pending_windows + self.num_workers + 1
+        self.audio_buffer = RingBuffer(self.buffer_size * ring_windows, dtype=np.float32)
+        
+        # Coalesced windows are capped so they still fit comfortably in the ring
+        # (and never exceed Whisper's 30 second input)
+        max_window = min(self.audio_buffer.capacity // 2, int(self.sample_rate * 30.0))
+        self.inference_queue = InferenceQueue(max_pending=max_pending_windows, policy=queue_policy,
+                                              max_window=max_window)
+        
+        # Always-on stage timings and counters (see stats())
+        self.metrics = Metrics()
+        self._vad_timer = self.metrics.stage('vad')
+        self._recognizer_timer = self.metrics.stage('recognizer')
+        self._align_timer = self.metrics.stage('align')
+        self._callback_timer = self.metrics.stage('callback')
+        
+        # Only speech regions (plus padding) enter the ring when VAD is enabled
+        self.vad_gate = VadGate(sample_rate=sample_rate, dtype=np.float32) if use_vad else None
+        
+        # Every captured sample (before VAD) stays available for a few seconds, addressed by
+        # stream position, so the prompt after a wake word can start exactly where it ended
+        self.lookback = RingBuffer(int(lookback_seconds * sample_rate), dtype=np.float32)
+        self._lookback_cond = threading.Condition()
+        self.last_detection = None  # {'text', 'end_sample', 'precise_end', 'detected_sample', 'time'}
+        
+        # Models are shared process-wide and warmed up in the background after loading
+        self.model_registry = model_registry or ModelRegistry.shared()
+        
+        # With load_in_background, capture can start while the model is still loading;
+        # the subscription buffers up to startup_buffer_seconds until it is ready
+        self.model_ready = threading.Event()
+        self.startup_buffer_seconds = startup_buffer_seconds
         
         # Initialize Whisper model
         self.model = None
-        self.setup_model()
+        if load_in_background:
+            threading.Thread(target=self.setup_model, name="whisper-model-load", daemon=True).start()
+        else:
+            self.setup_model()
     
     def setup_model(self):
         """Initialize the Faster-Whisper model"""
         try:
-            print(f"🔧 Loading Faster-Whisper model: {self.model_path}")
+            if self.transcriber:
+                self.model = self.transcriber
+                return
+            if self.num_processes:
+                # Models live in the worker processes, outside the registry
+                from whisper_pool import WhisperPool
+                pool = WhisperPool(self.model_path, self.num_processes, cpu_threads=self.cpu_threads,
+                                   cores=self.cpu_affinity, sample_rate=self.sample_rate,
+                                   max_window_seconds=self.inference_queue.max_window / self.sample_rate)
+                try:
+                    pool.wait_ready()
+                except Exception:
+                    pool.close()
+                    raise
+                self.model = pool
+                print(f"✅ Faster-Whisper pool ready: {self.model_path}")
+                return
             # Use CPU by default for Raspberry Pi, can change to "cuda" if GPU available
-            self.model = WhisperModel(self.model_path, device="cpu", compute_type="int8")
-            print(f"✅ Faster-Whisper model loaded: {self.model_path}")
+            self.model = self.model_registry.acquire("whisper", self.model_path, compute_type="int8",
+                                                     device="cpu", num_workers=self.num_workers,
+                                                     threads=self.cpu_threads)
+            print(f"✅ Faster-Whisper model ready: {self.model_path}")
         except Exception as e:
             print(f"❌ Error loading Faster-Whisper model: {e}")
             print("Make sure faster-whisper is installed: pip install faster-whisper")
             self.model = None
+        finally:
+            self.model_ready.set()
     
     def set_wake_word_callback(self, callback):
         """Set callback function to be called when wake word is detected"""
@@ -45,121 +146,202 @@ class WhisperWakeWordDetector:
     
     def start_listening(self):
         """Start continuous listening for wake words"""
-        if not self.model:
+        if self.model_ready.is_set() and not self.model:
             print("❌ Cannot start listening - model not loaded")
             return
         
+        if self.listening_thread and self.listening_thread.is_alive():
+            return
+        
         self.is_listening = True
         print("🚀 Starting Whisper wake word detection...")
         print(f"👂 Listening for: {self.wake_words}")
         
+        # Receive 16kHz mono float32 audio (already normalized) from the shared capture stream
+        self.subscription = self.audio_bus.subscribe("whisper", channels=1, rate=self.sample_rate,
+                                                     sample_format="FLOAT_LE",
+                                                     max_periods=self._queue_periods())
+        
+        # Start inference workers
+        self.inference_queue.reopen()
+        self.worker_threads = []
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._inference_loop, name=f"whisper-worker-{i}")
+            worker.daemon = True
+            worker.start()
+            self.worker_threads.append(worker)
+        
         # Start listening in a separate thread
-        listening_thread = threading.Thread(target=self._listen_loop)
-        listening_thread.daemon = True
-        listening_thread.start()
+        self.listening_thread = threading.Thread(target=self._listen_loop)
+        self.listening_thread.daemon = True
+        self.listening_thread.start()
+    
+    def _queue_periods(self):
+        """Subscription depth: room for the startup backlog if the model is still loading"""
+        if self.model_ready.is_set():
+            return 64
+        periods_per_second = self.audio_bus.rate / self.audio_bus.periodsize
+        return max(64, int(self.startup_buffer_seconds * periods_per_second) + 1)
     
     def stop_listening(self):
         """Stop listening for wake words"""
         self.is_listening = False
+        if self.subscription:
+            # Closing the subscription wakes the listening thread immediately
+            self.subscription.close()
+            self.subscription = None
+        if self.listening_thread and self.listening_thread is not threading.current_thread():
+            self.listening_thread.join()
+        self.listening_thread = None
+        with self._lookback_cond:
+            # Let open prompt streams see that capture has stopped
+            self._lookback_cond.notify_all()
+        
+        # Wake the workers; a window already being transcribed is allowed to finish
+        self.inference_queue.close()
+        for worker in self.worker_threads:
+            if worker is not threading.current_thread():
+                worker.join()
+        self.worker_threads = []
+        
+        stats = self.inference_queue.stats()
+        print(f"📊 Whisper segments: {stats['queued']} queued, {stats['processed']} processed, "
+              f"{stats['dropped']} dropped, {stats['coalesced']} coalesced")
+        if self.vad_gate:
+            print(f"📉 VAD skipped {self.vad_gate.skipped_fraction:.1%} of audio")
         print("🛑 Stopping Whisper wake word detection...")
     
+    def close(self):
+        """Stop listening and give the model back to the registry"""
+        self.stop_listening()
+        self.model_ready.wait()  # A background load still has to be released
+        if self.model is self.transcriber:
+            pass
+        elif self.num_processes and self.model:
+            self.model.close()
+        elif self.model:
+            self.model_registry.release(self.model)
+        self.model = None
+    
     def _listen_loop(self):
         """Main listening loop - runs continuously"""
+        subscription = self.subscription
         try:
-            # Open audio device for capture at native 48kHz stereo
-            audio = alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NONBLOCK,
-                                 channels=2, rate=48000, 
-                                 format=alsaaudio.PCM_FORMAT_S16_LE,
-                                 periodsize=1024, device=self.device)
+            # Audio captured meanwhile waits in the subscription queue
+            while self.is_listening and not self.model_ready.wait(0.1):
+                pass
+            if not self.model:
+                print("❌ Whisper detection not started - model failed to load")
+                return
             
             print("👂 Whisper wake word detection active...")
             
             while self.is_listening:
-                # Read audio data
-                length, data = audio.read()
+                # Wait for the next 16kHz mono float32 period from the audio bus
+                processed_data = subscription.read(timeout=0.1)
                 
-                if length > 0:
-                    # Process 48kHz stereo audio to 16kHz mono
-                    processed_data = self._process_audio_for_whisper(data)
+                if isinstance(processed_data, Gap):
+                    self._on_gap(processed_data)
+                elif processed_data:
+                    samples = np.frombuffer(processed_data, dtype=np.float32)
+                    with self._lookback_cond:
+                        self.lookback.write(samples)
+                        self._lookback_cond.notify_all()
                     
-                    if processed_data:
-                        # Add to buffer
-                        self.audio_buffer.extend(processed_data)
-                        
-                        # Process buffer when it's full enough
-                        if len(self.audio_buffer) >= self.buffer_size:
-                            self._process_audio_buffer()
-                
-                time.sleep(0.01)  # Small delay to prevent busy waiting
+                    if self.vad_gate:
+                        # Only speech regions are buffered for transcription
+                        start = now_ns()
+                        samples = self.vad_gate.process(samples)
+                        self._vad_timer.record(now_ns() - start)
+                    
+                    # Add to ring buffer
+                    self.audio_buffer.write(samples)
+                    
+                    self._segment_audio()
         
         except Exception as e:
             print(f"❌ Error in Whisper listening loop: {e}")
-        finally:
-            try:
-                audio.close()
-            except:
-                pass
     
-    def _process_audio_for_whisper(self, raw_data):
-        """Process 48kHz stereo audio to 16kHz mono for Whisper"""
-        try:
-            # Convert raw bytes to numpy array (16-bit stereo)
-            stereo_data = np.frombuffer(raw_data, dtype=np.int16)
-            
-            if len(stereo_data) == 0:
-                return b''
-            
-            # Reshape to stereo (2 channels) 
-            if len(stereo_data) % 2 != 0:
-                # Odd number of samples, trim one
-                stereo_data = stereo_data[:-1]
-            
-            stereo_data = stereo_data.reshape(-1, 2)
-            
-            # Convert stereo to mono (average channels)
-            mono_data = np.mean(stereo_data, axis=1).astype(np.int16)
-            
-            # Resample from 48000 Hz to 16000 Hz (3:1 ratio)
-            # Simple decimation: take every 3rd sample
-            if len(mono_data) >= 3:
-                resampled_data = mono_data[::3]
+    def _on_gap(self, gap):
+        """Audio is missing here: close the current segment so no window straddles the hole"""
+        self.metrics.count(f'gaps_{gap.reason}')
+        if self.vad_gate:
+            self.vad_gate.reset()
+        self._flush_audio_buffer()
+    
+    def _segment_audio(self):
+        """Queue a segment when speech pauses or ends, or when it reaches its maximum length"""
+        while self.audio_buffer.written - self.window_start >= self.buffer_size:
+            self._queue_window(self.buffer_size)
+            # No pause to cut at - overlap the next segment so a word on the cut isn't split
+            self.window_start += self.buffer_size - self.overlap_size
+        
+        if not self.vad_gate:
+            return
+        if self.vad_gate.just_closed:
+            # Speech ended - transcribe the tail instead of waiting for a full segment
+            self._flush_audio_buffer()
+        elif (self.audio_buffer.written - self.window_start >= self.min_segment_size
+              and self.vad_gate.silence_seconds >= self.pause_seconds):
+            # A pause inside speech - nothing straddles it, so the next segment needs no overlap
+            self._flush_audio_buffer()
+    
+    def _queue_window(self, length):
+        """Hand the segment starting at window_start to the inference workers"""
+        self.inference_queue.put(self.window_start, length)
+        self.samples_queued += length
+        self.samples_requeued += max(0, self.decoded_until - self.window_start)
+        self.decoded_until = max(self.decoded_until, self.window_start + length)
+    
+    def _flush_audio_buffer(self):
+        """Queue audio left over at the end of a speech region or before a pause"""
+        if self.audio_buffer.written - self.decoded_until >= self.min_flush_size:
+            self._queue_window(self.audio_buffer.written - self.window_start)
+        # The next speech region starts a fresh window with no overlap
+        self.window_start = self.audio_buffer.written
+    
+    def _inference_loop(self):
+        """Worker loop - transcribe queued windows until the queue is closed"""
+        while self.is_listening:
+            window = self.inference_queue.get(timeout=0.5)
+            if window is None:
+                continue
+            start, length = window
+            if self._process_audio_buffer(start, length):
+                self.inference_queue.mark_processed()
             else:
-                resampled_data = mono_data
-            
-            return resampled_data.tobytes()
-            
-        except Exception as e:
-            print(f"⚠️ Whisper audio processing error: {e}")
-            return b''
+                self.inference_queue.mark_dropped()
     
-    def _process_audio_buffer(self):
-        """Process accumulated audio buffer with Whisper"""
+    def _process_audio_buffer(self, start, length):
+        """Transcribe one window of the ring buffer; returns False if it was lost"""
         try:
-            # Convert buffer to numpy array for Whisper
-            audio_np = np.frombuffer(self.audio_buffer[:self.buffer_size], dtype=np.int16)
+            # The capture thread may have lapped a window that waited too long
+            if self.audio_buffer.is_overrun(start):
+                return False
             
-            # Convert to float32 and normalize (Whisper expects float32 in [-1, 1])
-            audio_float = audio_np.astype(np.float32) / 32768.0
+            # Zero-copy view of the window, already float32 in [-1, 1] as Whisper expects
+            # (a pool copies it once, into shared memory)
+            audio_float = self.audio_buffer.view(start, length)
             
-            # Create a temporary WAV file in memory for Whisper
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(self.sample_rate)  # 16kHz
-                wav_file.writeframes(self.audio_buffer[:self.buffer_size])
-            
-            wav_buffer.seek(0)
-            
-            # Transcribe with Whisper
+            # Transcribe with Whisper straight from the array (no container encode/decode)
+            start_time = now_ns()
             segments, info = self.model.transcribe(
-                wav_buffer,
+                audio_float,
                 language="en",  # Force English for better performance
                 beam_size=1,    # Fast beam size for real-time
                 best_of=1,      # Single candidate for speed
-                temperature=0.0 # Deterministic output
+                temperature=0.0  # Deterministic output
             )
             
+            # Features are computed inside transcribe(); if the writer overwrote the
+            # window meanwhile the result is garbage
+            if self.audio_buffer.is_overrun(start):
+                return False
+            
+            # Segments are decoded lazily, so collect them before stopping the clock
+            segments = list(segments)
+            self._recognizer_timer.record(now_ns() - start_time)
+            
             # Process segments and check for wake words
             for segment in segments:
                 text = segment.text.lower().strip()
@@ -167,26 +349,135 @@ class WhisperWakeWordDetector:
                     print(f"🎤 Whisper heard: {text}")
                     
                     # Check for wake words
-                    if self._contains_wake_word(text):
-                        print(f"🎯 Whisper wake word detected: {text}")
-                        if self.wake_word_callback:
-                            self.wake_word_callback(text)
-            
-            # Shift buffer - keep last 1 second for overlap
-            overlap_size = int(self.sample_rate * 1.0 * 2)  # 1 second * 16-bit
-            self.audio_buffer = self.audio_buffer[self.buffer_size - overlap_size:]
+                    wake_word = self._matched_wake_word(text)
+                    if wake_word:
+                        end_sample, precise = self._phrase_end(segment, wake_word, start, length)
+                        if self._is_new_detection(end_sample):
+                            self._on_wake_word(text, end_sample, precise)
+            return True
             
         except Exception as e:
             print(f"⚠️ Whisper processing error: {e}")
-            # Clear buffer on error
-            self.audio_buffer.clear()
+            return False
+    
+    def _phrase_end(self, segment, wake_word, window_start, length):
+        """(stream position where the wake phrase ended, whether word timings located it)
+
+        Windows are transcribed without word timings (they cost an extra
+        alignment pass); only a window that matched is decoded again with
+        them. Without timings the phrase ends with its segment, which may be
+        well after the phrase itself.
+        """
+        start_time = now_ns()
+        try:
+            end = align_phrase_end(self.model, self.audio_buffer.view(window_start, length), wake_word,
+                                   self.phrase_index, language="en", beam_size=1, best_of=1, temperature=0.0)
+            if self.audio_buffer.is_overrun(window_start):
+                end = None  # Overwritten while aligning
+        except Exception as e:
+            print(f"⚠️ Whisper word alignment error: {e}")
+            end = None
+        self._align_timer.record(now_ns() - start_time)
+        precise = end is not None
+        if not precise:
+            end = segment.end
+        ring_position = min(window_start + int(end * self.sample_rate), self.audio_buffer.written)
+        # The ring only holds VAD-forwarded audio; map back to the full stream
+        if self.vad_gate:
+            ring_position = self.vad_gate.input_position(ring_position)
+        return ring_position, precise
+    
+    def _is_new_detection(self, end_sample):
+        """False for a repeat of the last detection (same audio seen in an overlapping segment)"""
+        with self._detection_lock:
+            last = self._last_detection_end
+            if last is not None and abs(end_sample - last) < self.refractory_size:
+                self.metrics.count('duplicates_suppressed')
+                return False
+            self._last_detection_end = end_sample
+            return True
+    
+    def _on_wake_word(self, text, end_sample, precise_end=True):
+        """Report a detection"""
+        print(f"🎯 Whisper wake word detected: {text}")
+        self.last_detection = {
+            'text': text,
+            'end_sample': end_sample,
+            'precise_end': precise_end,
+            'detected_sample': self.lookback.written,
+            'time': time.time(),
+        }
+        self.metrics.count('detections')
+        if self.wake_word_callback:
+            start_time = now_ns()
+            self.wake_word_callback(text)
+            self._callback_timer.record(now_ns() - start_time)
+    
+    def open_prompt(self, start=None, **options):
+        """Stream the audio after the last wake word until the speaker stops
+
+        Starts at the end of the wake phrase (or `start`, a stream position)
+        and is read from the lookback ring. Options go to PromptStream.
+        """
+        if start is None:
+            detection = self.last_detection
+            start = detection['end_sample'] if detection else self.lookback.written
+        noise_floor_db = self.vad_gate.vad.noise_floor_db if self.vad_gate else None
+        return PromptStream(self.lookback, self._lookback_cond, start, self.sample_rate,
+                            is_active=lambda: self.is_listening, noise_floor_db=noise_floor_db, **options)
+    
+    def inference_stats(self):
+        """Counters for queued, dropped, coalesced and processed windows"""
+        return self.inference_queue.stats()
+    
+    def stats(self):
+        """Stage timings (read -> callback) and counters for the whole pipeline"""
+        subscription = self.subscription
+        stats = merge_stats(self.audio_bus.stats(),
+                            subscription.stats() if subscription else None,
+                            self.metrics.stats())
+        for name, value in self.inference_queue.stats().items():
+            stats['counters'][f'windows_{name}'] = value
+        if self.vad_gate:
+            stats['counters']['vad_skipped_fraction'] = round(self.vad_gate.skipped_fraction, 3)
+        if self.num_processes and self.model:
+            for name, value in self.model.stats().items():
+                stats['counters'][f'pool_{name}'] = value
+        if self.samples_queued:
+            stats['counters']['redecoded_fraction'] = round(self.samples_requeued / self.samples_queued, 3)
+        return stats
+    
+    def memory_footprint(self):
+        """Bytes held by the capture queue, VAD and rings (plus the worker pool, if any)"""
+        subscription = self.subscription
+        footprint = {
+            'capture_queue': subscription.pending_bytes() if subscription else 0,
+            'segment_ring': self.audio_buffer.nbytes,
+            'lookback': self.lookback.nbytes,
+        }
+        if self.vad_gate:
+            footprint['vad'] = self.vad_gate.nbytes
+        if self.num_processes and self.model:
+            for name, size in self.model.memory_footprint().items():
+                footprint[f'pool_{name}'] = size
+        return footprint
+    
+    def buffer_lag(self):
+        """Seconds of captured audio not yet queued for transcription"""
+        return self.audio_buffer.lag(self.window_start) / self.sample_rate
+    
+    def _matched_wake_word(self, text):
+        """The wake word found in text (exactly, or as a near-miss with fuzzy_match), or None"""
+        match = self.phrase_index.best(text)
+        if not match:
+            return None
+        if not match.exact:
+            print(f"≈ Near-miss wake word: '{text}' ~ '{match.phrase}' (score {match.score:.2f})")
+        return match.phrase
     
     def _contains_wake_word(self, text):
         """Check if text contains any of the wake words"""
-        for wake_word in self.wake_words:
-            if wake_word in text:
-                return True
-        return False
+        return self._matched_wake_word(text) is not None
 
 # Example usage
 if __name__ == "__main__":
@@ -205,5 +496,5 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        detector.stop_listening()
+        detector.close()
         print("🛑 Whisper wake word detection stopped") 
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import time
+import threading
+import collections
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+import numpy as np
+from memory import rss_bytes
+
+# Picklable stand-ins for faster-whisper's results (only what the detectors read)
+Word = collections.namedtuple('Word', 'word start end')
+Segment = collections.namedtuple('Segment', 'text start end words')
+
+
+def _attach(name):
+    """Open the parent's shared memory block; only the parent ever unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block too, but spawned workers share
+        # the parent's resource tracker, where registering a name twice is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(index, shm_name, slots, slot_size, tasks, results, model_path, compute_type,
+                 cpu_threads, cores):
+    """Worker process: load the model, then transcribe slots until told to stop"""
+    from model_registry import ENGINES
+
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    block = _attach(shm_name)
+    audio = np.ndarray((slots, slot_size), dtype=np.float32, buffer=block.buf)
+    try:
+        start = time.monotonic()
+        load, warm_up = ENGINES['whisper']
+        model = load(model_path, compute_type, cpu_threads)
+        warm_up(model)
+        results.put(('ready', index, time.monotonic() - start))
+    except Exception as e:
+        results.put(('failed', index, f"{type(e).__name__}: {e}"))
+        del audio
+        block.close()
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, slot, length, options = task
+        try:
+            start = time.monotonic()
+            segments, _ = model.transcribe(audio[slot, :length], **options)
+            segments = [Segment(s.text, s.start, s.end,
+                                [Word(w.word, w.start, w.end) for w in (getattr(s, 'words', None) or [])])
+                        for s in segments]
+            results.put(('done', task_id, (segments, time.monotonic() - start)))
+        except Exception as e:
+            results.put(('error', task_id, f"{type(e).__name__}: {e}"))
+    del audio
+    block.close()
+
+
+class WhisperPool:
+    """Faster-Whisper models running in worker processes
+
+    Keeps ctranslate2's compute threads out of the capture process. Audio is
+    copied into one of a fixed set of shared-memory slots and only
+    (slot, length) goes over the task queue; results come back as small
+    namedtuples. transcribe() matches WhisperModel.transcribe(), so a pool
+    can stand in for a model. Each worker can be given its own cpu_threads
+    and pinned to a set of cores, e.g. cores=[[2], [3]] for two workers on
+    the two cores capture doesn't use.
+    """
+
+    def __init__(self, model_path="base", num_processes=1, compute_type="int8", cpu_threads=None,
+                 cores=None, slots=None, max_window_seconds=30.0, sample_rate=16000):
+        if cores is not None and len(cores) != num_processes:
+            raise ValueError(f"Need one core set per worker ({num_processes}), got {len(cores)}")
+        self.model_path = model_path
+        self.num_processes = num_processes
+        self.slots = slots or 2 * num_processes  # One being decoded and one queued per worker
+        self.slot_size = int(max_window_seconds * sample_rate)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_size * 4)
+        self._audio = np.ndarray((self.slots, self.slot_size), dtype=np.float32, buffer=self._shm.buf)
+        self._free_slots = collections.deque(range(self.slots))
+        self._cond = threading.Condition()
+        self._futures = {}  # task id -> (Future, slot)
+        self._next_task = 0
+        self.closed = False
+
+        self.tasks_done = 0
+        self.tasks_failed = 0
+        self.slot_waits = 0  # transcribe() calls that had to wait for a free slot
+        self.busy_seconds = 0.0
+        self.load_seconds = {}
+        self._ready = threading.Event()
+        self._error = None
+
+        # Spawned, not forked: the parent is multithreaded (capture, inference threads)
+        context = multiprocessing.get_context('spawn')
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._processes = []
+        for i in range(num_processes):
+            process = context.Process(
+                target=_worker_main, name=f"whisper-pool-{i}", daemon=True,
+                args=(i, self._shm.name, self.slots, self.slot_size, self._tasks, self._results,
+                      model_path, compute_type, cpu_threads, cores[i] if cores else None))
+            process.start()
+            self._processes.append(process)
+
+        self._result_thread = threading.Thread(target=self._result_loop, name="whisper-pool-results",
+                                               daemon=True)
+        self._result_thread.start()
+        print(f"🔧 Starting {num_processes} Whisper worker process(es): {model_path}")
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has loaded its model; raises if one failed"""
+        if not self._ready.wait(timeout):
+            return False
+        if self._error:
+            raise RuntimeError(self._error)
+        return True
+
+    def submit(self, audio, **options):
+        """Copy audio into a free slot and queue it; returns a Future of (segments, info)"""
+        if len(audio) > self.slot_size:
+            raise ValueError(f"Window of {len(audio)} samples exceeds the slot size {self.slot_size}")
+        with self._cond:
+            if not self._free_slots:
+                self.slot_waits += 1
+            while not self._free_slots and not self.closed:
+                self._cond.wait()
+            if self.closed:
+                raise RuntimeError("Whisper pool is closed")
+            slot = self._free_slots.popleft()
+            task_id = self._next_task
+            self._next_task += 1
+            future = Future()
+            self._futures[task_id] = (future, slot)
+
+        np.copyto(self._audio[slot, :len(audio)], audio, casting='same_kind')
+        self._tasks.put((task_id, slot, len(audio), options))
+        return future
+
+    def transcribe(self, audio, **options):
+        """Drop-in for WhisperModel.transcribe(): blocks for the result"""
+        return self.submit(audio, **options).result()
+
+    def _result_loop(self):
+        """Resolve futures and recycle slots as results come back"""
+        ready = 0
+        while True:
+            message = self._results.get()
+            if message is None:
+                break
+            kind, key, payload = message
+            if kind == 'ready':
+                self.load_seconds[key] = round(payload, 2)
+                ready += 1
+                if ready == self.num_processes:
+                    print(f"✅ Whisper workers ready: {self.load_seconds}")
+                    self._ready.set()
+                continue
+            if kind == 'failed':
+                self._error = f"Whisper worker {key} failed to load: {payload}"
+                self._ready.set()
+                continue
+
+            with self._cond:
+                entry = self._futures.pop(key, None)
+                if entry is None:
+                    continue  # Already failed by close()
+                future, slot = entry
+                self._free_slots.append(slot)
+                if kind == 'done':
+                    self.tasks_done += 1
+                    self.busy_seconds += payload[1]
+                else:
+                    self.tasks_failed += 1
+                self._cond.notify()
+            if kind == 'done':
+                future.set_result((payload[0], None))
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def stats(self):
+        """Task, slot and worker counters"""
+        with self._cond:
+            return {
+                'processes': self.num_processes,
+                'tasks_done': self.tasks_done,
+                'tasks_failed': self.tasks_failed,
+                'tasks_pending': len(self._futures),
+                'slot_waits': self.slot_waits,
+                'busy_seconds': round(self.busy_seconds, 2),
+            }
+
+    def memory_footprint(self):
+        """Shared-memory slots plus the resident size of each worker process"""
+        footprint = {'shared_memory': self._shm.size}
+        for process in self._processes:
+            footprint[process.name] = rss_bytes(process.pid) if process.is_alive() else 0
+        return footprint
+
+    def close(self, timeout=5.0):
+        """Stop the workers, fail outstanding calls and free the shared memory"""
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            self._cond.notify_all()
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._results.put(None)
+        self._result_thread.join()
+
+        with self._cond:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future, _ in futures:
+            future.set_exception(RuntimeError("Whisper pool is closed"))
+        self._ready.set()
+
+        del self._audio
+        self._shm.close()
+        self._shm.unlink()